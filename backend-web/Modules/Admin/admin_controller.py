@@ -1,6 +1,16 @@
 # Modules/Admin/admin_controller.py
-from flask import Blueprint, jsonify, request
-from Modules.Auth.auth_middleware import require_auth
+from flask import Blueprint, Response, jsonify, request
+from Modules.Auth.auth_middleware import require_auth, token_cache_stats
+from Modules.Brindes import catalogo_importacao
+from Modules.Brindes.brindes_cache import cache_stats
+from Modules.Brindes.catalogo_busca import busca_stats
+from Modules.Movimentacoes.estoque_compartilhado import contadores_stats
+from Modules.Movimentacoes.movimentacoes_service import resgate_stats
+from Modules.Movimentacoes.reservas import reservas_stats
+from Modules.Auth.auth_executor import auth_stats
+from Modules.Shared import aquecimento, metricas
+from Modules.Shared.assincrono import assincrono_stats
+from . import relatorios_service
 
 admin_bp = Blueprint("admin", __name__)
 
@@ -10,4 +20,132 @@ def admin_dashboard():
     if request.user["role"] != "admin":
         return jsonify({"message": "Forbidden"}), 403
     return jsonify({"message": "Bem-vindo, admin!"})
+
+@admin_bp.route("/api/admin/metrics", methods=["GET"])
+@require_auth
+def admin_metrics():
+    # histogramas por rota e por span + bytes lidos, no formato texto do Prometheus
+    if request.user["role"] != "admin":
+        return jsonify({"message": "Forbidden"}), 403
+    return Response(metricas.prometheus(), mimetype="text/plain; version=0.0.4")
+
+@admin_bp.route("/api/admin/metrics/perfis", methods=["GET"])
+@require_auth
+def admin_metrics_perfis():
+    # relatórios cProfile das requisições lentas amostradas (PROFILE_SAMPLE_RATE)
+    if request.user["role"] != "admin":
+        return jsonify({"message": "Forbidden"}), 403
+    return jsonify(metricas.perfis())
+
+@admin_bp.route("/api/admin/cache", methods=["GET"])
+@require_auth
+def admin_cache_stats():
+    # contadores de hit/miss/refresh do cache de catálogo e estoque, índices de busca, warm start
+    # e leituras coalescidas do modo async
+    if request.user["role"] != "admin":
+        return jsonify({"message": "Forbidden"}), 403
+    return jsonify({**cache_stats(), "busca": busca_stats(), "aquecimento": aquecimento.ultimo(),
+                    "estoque_compartilhado": contadores_stats(), "assincrono": assincrono_stats()})
+
+@admin_bp.route("/api/admin/auth", methods=["GET"])
+@require_auth
+def admin_auth_stats():
+    # fila e latência do executor de bcrypt + cache de tokens do middleware
+    if request.user["role"] != "admin":
+        return jsonify({"message": "Forbidden"}), 403
+    return jsonify({**auth_stats(), "token_cache": token_cache_stats()})
+
+def _periodo():
+    # ?de=YYYY-MM-DD&ate=YYYY-MM-DD (ambos opcionais, inclusivos)
+    return relatorios_service.periodo(request.args.get("de"), request.args.get("ate"))
+
+@admin_bp.route("/api/admin/reports/resgates", methods=["GET"])
+@require_auth
+def admin_report_resgates():
+    # resgates por variante (?agrupar=dia para a série diária); ?status= filtra um status
+    if request.user["role"] != "admin":
+        return jsonify({"message": "Forbidden"}), 403
+    try:
+        de, ate = _periodo()
+    except ValueError:
+        return jsonify({"message": "Data inválida (use YYYY-MM-DD)"}), 400
+    status = request.args.get("status")
+    if request.args.get("agrupar") == "dia":
+        return jsonify(relatorios_service.resgates_por_dia(de, ate, status))
+    return jsonify(relatorios_service.resgates_por_variante(de, ate, status))
+
+@admin_bp.route("/api/admin/reports/pontos", methods=["GET"])
+@require_auth
+def admin_report_pontos():
+    # pontos emitidos x resgatados por departamento
+    if request.user["role"] != "admin":
+        return jsonify({"message": "Forbidden"}), 403
+    try:
+        de, ate = _periodo()
+    except ValueError:
+        return jsonify({"message": "Data inválida (use YYYY-MM-DD)"}), 400
+    return jsonify(relatorios_service.pontos_por_departamento(de, ate))
+
+@admin_bp.route("/api/admin/reports/estoque-baixo", methods=["GET"])
+@require_auth
+def admin_report_estoque_baixo():
+    # variantes com estoque disponível <= ?limite= (padrão 10)
+    if request.user["role"] != "admin":
+        return jsonify({"message": "Forbidden"}), 403
+    try:
+        limite = int(request.args.get("limite", 10))
+    except ValueError:
+        return jsonify({"message": "limite deve ser inteiro"}), 400
+    return jsonify(relatorios_service.estoque_baixo(limite))
+
+@admin_bp.route("/api/admin/reports/stats", methods=["GET"])
+@require_auth
+def admin_report_stats():
+    # linhas e hits/incrementais/reconstruções das tabelas colunares
+    if request.user["role"] != "admin":
+        return jsonify({"message": "Forbidden"}), 403
+    return jsonify(relatorios_service.relatorios_stats())
+
+def _tamanho(stream):
+    # tamanho de um arquivo enviado (para o progresso), se der para saber
+    try:
+        atual = stream.tell()
+        total = stream.seek(0, 2)
+        stream.seek(atual)
+        return total
+    except (AttributeError, OSError):
+        return None
+
+@admin_bp.route("/api/admin/catalogo/importar", methods=["POST"])
+@require_auth
+def admin_catalogo_importar():
+    # CSV do fornecedor no corpo (text/csv) ou no campo "arquivo" (multipart); ?validar=1 só valida
+    if request.user["role"] != "admin":
+        return jsonify({"message": "Forbidden"}), 403
+    if request.mimetype == "multipart/form-data":
+        arquivo = request.files.get("arquivo")
+        if arquivo is None:
+            return jsonify({"message": "Envie o CSV no campo 'arquivo'"}), 400
+        origem, total = arquivo.stream, _tamanho(arquivo.stream)
+    else:
+        origem, total = request.stream, request.content_length
+    validar = request.args.get("validar") in ("1", "true")
+    resultado = catalogo_importacao.importar(origem, total_bytes=total, validar_apenas=validar)
+    return jsonify(resultado), (200 if resultado["ok"] else 400)
+
+@admin_bp.route("/api/admin/catalogo/importacoes", methods=["GET"])
+@require_auth
+def admin_catalogo_importacoes():
+    # importações recentes deste worker, com o progresso da que estiver rodando
+    if request.user["role"] != "admin":
+        return jsonify({"message": "Forbidden"}), 403
+    return jsonify(catalogo_importacao.importacoes())
+
+@admin_bp.route("/api/admin/reservas", methods=["GET"])
+@require_auth
+def admin_reservas():
+    # prazo e varredura das reservas em 'processing' (deste worker) + resgates e confirmações recusadas
+    if request.user["role"] != "admin":
+        return jsonify({"message": "Forbidden"}), 403
+    return jsonify({**reservas_stats(), "resgates": resgate_stats()})
 # --- IGNORE ---
\ No newline at end of file
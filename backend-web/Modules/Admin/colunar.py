@@ -0,0 +1,294 @@
+# Modules/Admin/colunar.py
+"""
+Cópia colunar (arrays NumPy) do log de movimentações e do extrato de pontos,
+usada pelos relatórios do admin (relatorios_service).
+
+- Cada coluna é um array tipado (ids int32, quantidades int64, tipo/status como
+  códigos int8, data como dias desde 1970-01-01 em int32).
+- Os arrays ficam em cache no processo e também em disco, ao lado do arquivo de
+  origem (<arquivo>.colunas/<coluna>.<geracao>.npy + meta.json). Um processo novo
+  abre a cópia em disco com mmap em vez de reler o .txt.
+- Os dois arquivos são só de acréscimo: linhas novas no fim são lidas a partir do
+  último offset e concatenadas; eventos de status do log de movimentações
+  atualizam a coluna de status. Se o arquivo foi reescrito (compactação, encolheu,
+  o trecho já lido mudou), as colunas são refeitas.
+- Com o backend SQLite as colunas são montadas a partir do banco e refeitas
+  quando o contador de versão do domínio muda (sem cópia em disco).
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from Modules.Movimentacoes import movimentacoes_repository as movs_repo
+from Modules.Pontos import pontos_repository
+from Modules.Shared.db_connection import usar_sqlite, versao
+from Modules.Shared.metricas import span
+from Modules.Shared.record_loader import Schema, ler_desde
+
+_TAIL_BYTES = 64
+
+# cópia em disco regravada quando acumula esta quantidade de linhas novas
+SALVAR_A_CADA = 10000
+
+DIA_INVALIDO = np.iinfo(np.int32).min
+
+TIPOS_MOV = {"OUT": 0, "IN": 1}
+STATUS_MOV = {"processing": 0, "confirmed": 1, "canceled": 2}
+TIPOS_PONTO = {"credito": 0, "debito": 1}
+STATUS_PONTO = {"confirmado": 0, "processando": 1, "cancelado": 2}
+
+Colunas = Dict[str, np.ndarray]
+
+def _codigos(valores: Sequence[str], mapa: Dict[str, int]) -> np.ndarray:
+    # texto -> código int8 (-1 para valores fora do mapa)
+    return np.fromiter((mapa.get(v, -1) for v in valores), dtype=np.int8, count=len(valores))
+
+def _dia_ou_nat(texto: str) -> np.datetime64:
+    try:
+        return np.datetime64(texto, "D")
+    except ValueError:
+        return np.datetime64("NaT", "D")
+
+def dias(datas: Sequence[str]) -> np.ndarray:
+    """ "YYYY-MM-DD[ HH:MM:SS]" -> dias desde 1970-01-01 (DIA_INVALIDO se ilegível). """
+    textos = [d[:10] for d in datas]
+    try:
+        datas64 = np.array(textos, dtype="datetime64[D]")
+    except ValueError:
+        datas64 = np.array([_dia_ou_nat(t) for t in textos], dtype="datetime64[D]")
+    saida = datas64.astype(np.int64)
+    saida[np.isnat(datas64)] = DIA_INVALIDO
+    return saida.astype(np.int32)
+
+def dia(texto: str) -> int:
+    # uma data "YYYY-MM-DD" -> dias desde 1970-01-01; ValueError se inválida
+    return int(np.datetime64(texto[:10], "D").astype(np.int64))
+
+def _colunas_movs(registros: List[Any]) -> Tuple[Colunas, List[Tuple[int, int]]]:
+    # movimentações -> colunas; eventos de status -> [(mov_id, código do status)]
+    movs = [r for r in registros if r.TYPE != movs_repo.EVENT_TYPE]
+    eventos = [(r.MOV_ID, STATUS_MOV.get(r.STATUS, -1)) for r in registros if r.TYPE == movs_repo.EVENT_TYPE]
+    n = len(movs)
+    colunas = {
+        "mov_id": np.fromiter((m.MOV_ID for m in movs), dtype=np.int64, count=n),
+        "user_id": np.fromiter((m.USER_ID for m in movs), dtype=np.int32, count=n),
+        "variant_id": np.fromiter((m.VARIANT_ID for m in movs), dtype=np.int32, count=n),
+        "qtd": np.fromiter((m.QTD for m in movs), dtype=np.int64, count=n),
+        "pontos": np.fromiter((m.POINTS_TOTAL for m in movs), dtype=np.int64, count=n),
+        "tipo": _codigos([m.TYPE for m in movs], TIPOS_MOV),
+        "status": _codigos([m.STATUS for m in movs], STATUS_MOV),
+        "dia": dias([m.CREATED_AT for m in movs]),
+    }
+    return colunas, eventos
+
+def _inteiro(valor: str) -> int:
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return -1
+
+def _colunas_pontos(registros: List[Any]) -> Tuple[Colunas, List[Tuple[int, int]]]:
+    n = len(registros)
+    colunas = {
+        "usuario_id": np.fromiter((_inteiro(p.usuario_id) for p in registros), dtype=np.int32, count=n),
+        "quantidade": np.fromiter((p.quantidade for p in registros), dtype=np.int64, count=n),
+        "tipo": _codigos([p.tipo for p in registros], TIPOS_PONTO),
+        "status": _codigos([p.status for p in registros], STATUS_PONTO),
+        "dia": dias([p.data_movimento for p in registros]),
+    }
+    return colunas, []
+
+def _aplicar_eventos(colunas: Colunas, eventos: List[Tuple[int, int]]) -> Colunas:
+    # último status de cada mov_id vale; devolve colunas novas (os arrays antigos não mudam)
+    if not eventos or not len(colunas["mov_id"]):
+        return colunas
+    ids = colunas["mov_id"]
+    ordem = np.argsort(ids, kind="stable")
+    ordenados = ids[ordem]
+    alvo = np.fromiter((e[0] for e in eventos), dtype=np.int64, count=len(eventos))
+    novo = np.fromiter((e[1] for e in eventos), dtype=np.int8, count=len(eventos))
+    pos = np.minimum(np.searchsorted(ordenados, alvo), len(ordenados) - 1)
+    achados = ordenados[pos] == alvo
+    status = np.array(colunas["status"])  # cópia: o original pode ser um mmap só leitura
+    status[ordem[pos[achados]]] = novo[achados]
+    return {**colunas, "status": status}
+
+class TabelaColunar:
+    """
+    Colunas de um arquivo só de acréscimo, mantidas em dia de forma incremental.
+    `colunas()` devolve um dict de arrays que não é alterado depois (atualizações
+    criam arrays novos), então pode ser usado sem trava depois de obtido.
+    """
+
+    def __init__(self, nome: str, arquivo: Callable[[], Path], schema: Schema,
+                 montar: Callable[[List[Any]], Tuple[Colunas, List[Tuple[int, int]]]],
+                 dominio: str, registros_sqlite: Callable[[], Any]):
+        self.nome = nome
+        self._arquivo = arquivo  # chamado a cada uso: os benchmarks trocam o caminho
+        self._schema = schema
+        self._montar = montar
+        self._dominio = dominio
+        self._registros_sqlite = registros_sqlite
+        self._lock = threading.Lock()
+        self._estado: Dict[str, Any] = {}
+        self._stats = {"hits": 0, "incrementais": 0, "reconstrucoes": 0, "mmap": 0}
+        self._limpar()
+
+    def _limpar(self):
+        self._estado = {"arquivo": None, "assinatura": None, "offset": 0, "tail": b"",
+                        "colunas": None, "salvo_linhas": 0}
+
+    # --- cópia em disco -------------------------------------------------
+
+    def _pasta(self, path: Path) -> Path:
+        return path.with_suffix(".colunas")
+
+    def _salvar(self, path: Path):
+        colunas = self._estado["colunas"]
+        pasta = self._pasta(path)
+        pasta.mkdir(exist_ok=True)
+        meta_path = pasta / "meta.json"
+        # geração única por gravação: dois processos salvando juntos não pisam nos
+        # arquivos um do outro (nem num arquivo que alguém já mapeou)
+        geracao = f"{time.time_ns():x}-{os.getpid()}"
+        for nome, arr in colunas.items():
+            np.save(pasta / f"{nome}.{geracao}.npy", arr)
+        st = os.stat(path)
+        meta = {"geracao": geracao, "ino": st.st_ino, "offset": self._estado["offset"],
+                "tail": self._estado["tail"].hex(), "colunas": sorted(colunas)}
+        tmp = pasta / f"meta.json.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, meta_path)
+        # gerações antigas: quem já abriu via mmap continua lendo (o unlink não afeta o mapeamento)
+        for arquivo in pasta.glob("*.npy"):
+            if not arquivo.name.endswith(f".{geracao}.npy"):
+                try:
+                    arquivo.unlink()
+                except OSError:
+                    pass
+        self._estado["salvo_linhas"] = self._linhas()
+
+    @staticmethod
+    def _ler_meta(meta_path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def _abrir_salvo(self, path: Path, st: os.stat_result) -> bool:
+        # usa a cópia em disco se ela for um prefixo do arquivo atual
+        pasta = self._pasta(path)
+        meta = self._ler_meta(pasta / "meta.json")
+        if not meta or meta["ino"] != st.st_ino or meta["offset"] > st.st_size:
+            return False
+        tail = bytes.fromhex(meta["tail"])
+        if self._ler_tail(path, meta["offset"]) != tail:
+            return False
+        try:
+            colunas = {nome: np.load(pasta / f"{nome}.{meta['geracao']}.npy", mmap_mode="r")
+                       for nome in meta["colunas"]}
+        except (OSError, ValueError):
+            return False
+        self._estado.update({"arquivo": path, "offset": meta["offset"], "tail": tail,
+                             "colunas": colunas})
+        self._estado["salvo_linhas"] = self._linhas()
+        self._stats["mmap"] += 1
+        return True
+
+    # --- atualização ----------------------------------------------------
+
+    def _linhas(self) -> int:
+        colunas = self._estado["colunas"]
+        return len(next(iter(colunas.values()))) if colunas else 0
+
+    @staticmethod
+    def _ler_tail(path: Path, offset: int) -> bytes:
+        inicio = max(offset - _TAIL_BYTES, 0)
+        with open(path, "rb") as f:
+            f.seek(inicio)
+            return f.read(offset - inicio)
+
+    def _acrescentar(self, registros: List[Any]):
+        novas, eventos = self._montar(registros)
+        atuais = self._estado["colunas"]
+        if atuais is None:
+            colunas = novas
+        else:
+            colunas = {nome: np.concatenate([atuais[nome], novas[nome]]) for nome in atuais}
+        self._estado["colunas"] = _aplicar_eventos(colunas, eventos)
+
+    def _atualizar_arquivo(self):
+        path = self._arquivo()
+        if not path.exists():
+            self._limpar()
+            self._estado["colunas"] = self._montar([])[0]
+            return
+        st = os.stat(path)
+        assinatura = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if self._estado["arquivo"] == path and self._estado["assinatura"] == assinatura:
+            self._stats["hits"] += 1
+            return
+
+        anterior = self._estado["assinatura"]
+        incremental = (
+            self._estado["arquivo"] == path
+            and anterior is not None
+            and anterior[2] == st.st_ino
+            and st.st_size >= self._estado["offset"]
+            and self._ler_tail(path, self._estado["offset"]) == self._estado["tail"]
+        )
+        reconstruido = False
+        if incremental:
+            self._stats["incrementais"] += 1
+        else:
+            self._limpar()
+            if not self._abrir_salvo(path, st):
+                self._estado["arquivo"] = path
+                self._stats["reconstrucoes"] += 1
+                reconstruido = True
+
+        registros, offset = ler_desde(path, self._schema, self._estado["offset"])
+        self._acrescentar(registros)
+        self._estado["offset"] = offset
+        self._estado["tail"] = self._ler_tail(path, offset)
+        self._estado["assinatura"] = assinatura
+        if reconstruido or self._linhas() - self._estado["salvo_linhas"] >= SALVAR_A_CADA:
+            try:
+                self._salvar(path)
+            except OSError:
+                pass  # sem permissão de escrita: segue só com o cache em memória
+
+    def _atualizar_sqlite(self):
+        assinatura = ("sqlite", versao(self._dominio))
+        if self._estado["assinatura"] == assinatura:
+            self._stats["hits"] += 1
+            return
+        self._limpar()
+        self._stats["reconstrucoes"] += 1
+        self._acrescentar(list(self._registros_sqlite()))
+        self._estado["assinatura"] = assinatura
+
+    def colunas(self) -> Colunas:
+        with self._lock, span(f"colunar.{self.nome}"):
+            if usar_sqlite():
+                self._atualizar_sqlite()
+            else:
+                self._atualizar_arquivo()
+            return self._estado["colunas"]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "linhas": self._linhas(), "offset": self._estado["offset"]}
+
+movimentacoes = TabelaColunar(
+    "movimentacoes", lambda: movs_repo.MOV_FILE, movs_repo.MOV_SCHEMA, _colunas_movs,
+    "movimentacoes", movs_repo.iter_records)
+
+pontos = TabelaColunar(
+    "pontos", lambda: pontos_repository.PONTOS_FILE, pontos_repository.PONTO_SCHEMA, _colunas_pontos,
+    "pontos", pontos_repository.iter_records)
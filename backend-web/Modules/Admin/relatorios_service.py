@@ -0,0 +1,164 @@
+# Modules/Admin/relatorios_service.py
+"""
+Relatórios do painel admin, calculados sobre as colunas NumPy de colunar.py.
+
+Filtros e agrupamentos são vetorizados (máscaras booleanas + np.bincount), sem
+laço por linha: o custo é proporcional ao número de linhas, mas em C.
+Períodos são dias inteiros (`de` e `ate` inclusive, "YYYY-MM-DD").
+"""
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from Modules.Brindes.brindes_cache import get_catalogo, get_estoque, get_variacao
+from Modules.Shared.db_connection import usar_sqlite, versao
+from Modules.Users import user_repository
+from . import colunar
+
+_lock = threading.Lock()
+
+# departamentos por usuário: user_id -> código, refeito quando users muda
+_deptos: Dict[str, Any] = {"assinatura": None, "codigos": np.zeros(0, np.int16), "nomes": []}
+
+def periodo(de: Optional[str], ate: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    # ("YYYY-MM-DD", "YYYY-MM-DD") -> (dia_de, dia_ate); ValueError se alguma data for inválida
+    return (colunar.dia(de) if de else None, colunar.dia(ate) if ate else None)
+
+def _no_periodo(dias: np.ndarray, de: Optional[int], ate: Optional[int]) -> np.ndarray:
+    mascara = dias != colunar.DIA_INVALIDO
+    if de is not None:
+        mascara &= dias >= de
+    if ate is not None:
+        mascara &= dias <= ate
+    return mascara
+
+def _data(dia: int) -> str:
+    return str(np.datetime64(int(dia), "D"))
+
+def _resgates(de: Optional[int], ate: Optional[int], status: Optional[str]):
+    # colunas + máscara das saídas (OUT) do período; canceladas ficam de fora
+    c = colunar.movimentacoes.colunas()
+    mascara = (c["tipo"] == colunar.TIPOS_MOV["OUT"]) & _no_periodo(c["dia"], de, ate)
+    if status:
+        mascara &= c["status"] == colunar.STATUS_MOV.get(status, -2)
+    else:
+        mascara &= c["status"] != colunar.STATUS_MOV["canceled"]
+    return c, mascara
+
+def resgates_por_variante(de: Optional[int] = None, ate: Optional[int] = None,
+                          status: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Resgates, unidades e pontos por variante no período, da mais resgatada para a menos."""
+    c, mascara = _resgates(de, ate, status)
+    vids = c["variant_id"][mascara]
+    vids_validos = vids >= 0
+    vids = vids[vids_validos]
+    if not len(vids):
+        return []
+    n = int(vids.max()) + 1
+    resgates = np.bincount(vids, minlength=n)
+    unidades = np.bincount(vids, weights=c["qtd"][mascara][vids_validos], minlength=n)
+    pontos = np.bincount(vids, weights=c["pontos"][mascara][vids_validos], minlength=n)
+    ids = np.flatnonzero(resgates)
+    ids = ids[np.argsort(-unidades[ids], kind="stable")]
+
+    linhas = []
+    for vid in ids.tolist():
+        item = get_variacao(vid) or {}
+        linhas.append({
+            "variantId": vid,
+            "sku": item.get("sku"),
+            "name": item.get("name"),
+            "resgates": int(resgates[vid]),
+            "unidades": int(unidades[vid]),
+            "pontos": int(pontos[vid]),
+        })
+    return linhas
+
+def resgates_por_dia(de: Optional[int] = None, ate: Optional[int] = None,
+                     status: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Resgates, unidades e pontos por dia no período (só dias com movimento)."""
+    c, mascara = _resgates(de, ate, status)
+    dias = c["dia"][mascara]
+    if not len(dias):
+        return []
+    base = int(dias.min())
+    rel = dias - base
+    resgates = np.bincount(rel)
+    unidades = np.bincount(rel, weights=c["qtd"][mascara])
+    pontos = np.bincount(rel, weights=c["pontos"][mascara])
+    return [
+        {"data": _data(base + i), "resgates": int(resgates[i]),
+         "unidades": int(unidades[i]), "pontos": int(pontos[i])}
+        for i in np.flatnonzero(resgates).tolist()
+    ]
+
+def _departamentos() -> Tuple[np.ndarray, List[str]]:
+    # (código do departamento indexado por user_id, nomes); -1 = sem departamento
+    if usar_sqlite():
+        assinatura = ("sqlite", versao("usuarios"))
+    else:
+        st = os.stat(user_repository.USERS_FILE)
+        assinatura = (str(user_repository.USERS_FILE), st.st_mtime_ns, st.st_size, st.st_ino)
+    with _lock:
+        if assinatura != _deptos["assinatura"]:
+            usuarios = user_repository.get_all_users(user_repository.USERS_FILE)
+            nomes = sorted({u["departamento"] or "" for u in usuarios})
+            codigo = {nome: i for i, nome in enumerate(nomes)}
+            ids = [(int(u["id"]), codigo[u["departamento"] or ""]) for u in usuarios if str(u["id"]).isdigit()]
+            codigos = np.full(max((i for i, _ in ids), default=-1) + 1, -1, dtype=np.int16)
+            for uid, cod in ids:
+                codigos[uid] = cod
+            _deptos.update({"assinatura": assinatura, "codigos": codigos, "nomes": nomes})
+        return _deptos["codigos"], _deptos["nomes"]
+
+def pontos_por_departamento(de: Optional[int] = None, ate: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Pontos emitidos (créditos) x resgatados (débitos) confirmados, por departamento."""
+    p = colunar.pontos.colunas()
+    codigos, nomes = _departamentos()
+    mascara = (p["status"] == colunar.STATUS_PONTO["confirmado"]) & _no_periodo(p["dia"], de, ate)
+    uids = p["usuario_id"][mascara]
+    # usuário desconhecido (ou id não numérico) cai em "sem departamento" (último balde)
+    conhecidos = (uids >= 0) & (uids < len(codigos))
+    depto = np.full(len(uids), len(nomes), dtype=np.int64)
+    depto[conhecidos] = codigos[uids[conhecidos]]
+    depto[depto < 0] = len(nomes)
+
+    qtd = p["quantidade"][mascara]
+    tipo = p["tipo"][mascara]
+    n = len(nomes) + 1
+    emitidos = np.bincount(depto, weights=np.where(tipo == colunar.TIPOS_PONTO["credito"], qtd, 0), minlength=n)
+    resgatados = np.bincount(depto, weights=np.where(tipo == colunar.TIPOS_PONTO["debito"], qtd, 0), minlength=n)
+    lancamentos = np.bincount(depto, minlength=n)
+
+    rotulos = nomes + ["(sem departamento)"]
+    return [
+        {"departamento": rotulos[i], "emitidos": int(emitidos[i]), "resgatados": int(resgatados[i]),
+         "saldo": int(emitidos[i] - resgatados[i]), "lancamentos": int(lancamentos[i])}
+        for i in np.flatnonzero(lancamentos).tolist()
+    ]
+
+def estoque_baixo(limite: int = 10) -> List[Dict[str, Any]]:
+    """
+    Variantes com estoque disponível (inicial + confirmadas - saídas pendentes)
+    menor ou igual a `limite`, da mais crítica para a menos.
+    """
+    catalogo = get_catalogo()
+    deltas, pendentes = get_estoque()
+    ids = np.fromiter((it["id"] for it in catalogo), dtype=np.int64, count=len(catalogo))
+    inicial = np.fromiter((it["stockInitial"] for it in catalogo), dtype=np.int64, count=len(catalogo))
+    delta = np.fromiter((deltas.get(it["id"], 0) for it in catalogo), dtype=np.int64, count=len(catalogo))
+    pendente = np.fromiter((pendentes.get(it["id"], 0) for it in catalogo), dtype=np.int64, count=len(catalogo))
+    disponivel = inicial + delta - pendente
+    selecionados = np.flatnonzero(disponivel <= limite)
+    selecionados = selecionados[np.argsort(disponivel[selecionados], kind="stable")]
+    return [
+        {"variantId": int(ids[i]), "sku": catalogo[i]["sku"], "name": catalogo[i]["name"],
+         "stockCurrent": int(max(inicial[i] + delta[i], 0)), "pendentes": int(pendente[i]),
+         "disponivel": int(disponivel[i])}
+        for i in selecionados.tolist()
+    ]
+
+def relatorios_stats() -> Dict[str, Any]:
+    return {"movimentacoes": colunar.movimentacoes.stats(), "pontos": colunar.pontos.stats()}
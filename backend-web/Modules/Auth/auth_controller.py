@@ -3,13 +3,20 @@ import jwt
 import datetime
 from flask import Blueprint, request, jsonify, make_response, current_app
 from Modules.Auth.auth_service import autenticar
+from Modules.Auth.auth_executor import AuthSobrecarregado
 
 auth_bp = Blueprint("auth", __name__)
 
-def create_token(payload: dict, expires_minutes=120):
+# cookie de sessão (o mesmo nos modos WSGI e async)
+COOKIE_AUTH = {"httponly": True,
+               "samesite": "Lax",  # em dev Lax é ok; produção pode ser "None" + secure
+               "secure": False}    # em produção: True (HTTPS)
+COOKIE_MAX_AGE = 60*10  # 10 min de validade
+
+def create_token(payload: dict, expires_minutes=120, secret=None):
     exp = datetime.datetime.utcnow() + datetime.timedelta(minutes=expires_minutes)
     payload = {**payload, "exp": exp}
-    return jwt.encode(payload, current_app.config["SECRET_KEY"], algorithm="HS256")
+    return jwt.encode(payload, secret or current_app.config["SECRET_KEY"], algorithm="HS256")
 
 @auth_bp.route("/api/login", methods=["POST"])
 def login():
@@ -17,7 +24,15 @@ def login():
     username = data.get("username")
     password = data.get("password")
 
-    user = autenticar(username, password)
+    if not username or not password:
+        return jsonify({"message": "Credenciais inválidas"}), 401
+
+    try:
+        user = autenticar(username, password)
+    except AuthSobrecarregado as e:
+        resp = make_response(jsonify({"message": "Muitas tentativas de login, tente novamente"}), 503)
+        resp.headers["Retry-After"] = str(e.retry_after)
+        return resp
     if not user:
         return jsonify({"message": "Credenciais inválidas"}), 401
 
@@ -28,19 +43,12 @@ def login():
         "role": user["perfil"]
     }))
     # Cookie HTTP-only, não acessível via JS
-    resp.set_cookie(
-        "auth",
-        token,
-        httponly=True,
-        samesite="Lax",   # em dev Lax é ok; produção pode ser "None" + secure
-        secure=False,     # em produção: True (HTTPS)
-        max_age=60*10   # 10 min de validade
-    )
+    resp.set_cookie("auth", token, max_age=COOKIE_MAX_AGE, **COOKIE_AUTH)
     return resp
 
 @auth_bp.route("/api/logout", methods=["POST"])
 def logout():
     resp = make_response(jsonify({"message": "logout"}))
-    resp.set_cookie("auth", "", httponly=True, samesite="Lax", secure=False, max_age=0)
+    resp.set_cookie("auth", "", max_age=0, **COOKIE_AUTH)
     return resp
 # --- IGNORE ---
\ No newline at end of file
@@ -0,0 +1,31 @@
+# Modules/Auth/auth_controller_async.py
+# login do modo async (asgi.py): diretório e bcrypt no pool; /api/logout continua no Flask
+from werkzeug.http import dump_cookie
+from Modules.Auth.auth_controller import COOKIE_AUTH, COOKIE_MAX_AGE, create_token
+from Modules.Auth.auth_executor import AuthSobrecarregado
+from Modules.Auth.auth_service import autenticar_async
+from Modules.Shared.assincrono import Requisicao, Resposta, Rotas, json_resposta
+
+auth_async = Rotas("auth")
+
+@auth_async.rota("/api/login", methods=["POST"])
+async def login(req: Requisicao) -> Resposta:
+    data = req.json() or {}
+    username = data.get("username")
+    password = data.get("password")
+
+    if not username or not password:
+        return json_resposta({"message": "Credenciais inválidas"}, 401)
+
+    try:
+        user = await autenticar_async(username, password)
+    except AuthSobrecarregado as e:
+        return json_resposta({"message": "Muitas tentativas de login, tente novamente"}, 503,
+                             [("Retry-After", str(e.retry_after))])
+    if not user:
+        return json_resposta({"message": "Credenciais inválidas"}, 401)
+
+    token = create_token({"sub": user["id"], "role": user["perfil"], "nome": user["nome"]},
+                         secret=req.app.config["SECRET_KEY"])
+    cookie = dump_cookie("auth", token, max_age=COOKIE_MAX_AGE, path="/", **COOKIE_AUTH)
+    return json_resposta({"message": "Login OK", "role": user["perfil"]}, headers=[("Set-Cookie", cookie)])
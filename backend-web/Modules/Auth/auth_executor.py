@@ -0,0 +1,157 @@
+# Modules/Auth/auth_executor.py
+"""
+Executor dedicado para a verificação de senha (bcrypt).
+
+- pool de threads (bcrypt libera o GIL) ou de processos, configurável;
+- fila limitada: acima da capacidade falha na hora com AuthSobrecarregado
+  (o controller responde 503 + Retry-After) em vez de segurar os workers do Flask;
+- cache negativo por credencial: depois de uma falha, repetir o mesmo NP com
+  a mesma senha é recusado sem rodar bcrypt por uma janela curta. A chave é
+  um HMAC de NP + senha (chave aleatória do processo), então a senha certa
+  logo depois de um erro de digitação passa, e ninguém bloqueia um NP alheio
+  mandando senhas erradas;
+- métricas de profundidade da fila e latência da verificação.
+
+Configuração por variáveis de ambiente:
+  AUTH_POOL_KIND (thread|process), AUTH_WORKERS, AUTH_QUEUE_SIZE,
+  AUTH_NEGATIVE_TTL (segundos), AUTH_RETRY_AFTER (segundos).
+"""
+import asyncio
+import hashlib
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+import bcrypt
+
+from Modules.Shared.metricas import span
+
+AUTH_POOL_KIND = os.environ.get("AUTH_POOL_KIND", "thread")
+AUTH_WORKERS = int(os.environ.get("AUTH_WORKERS", str(min(4, os.cpu_count() or 1))))
+AUTH_QUEUE_SIZE = int(os.environ.get("AUTH_QUEUE_SIZE", "32"))
+AUTH_NEGATIVE_TTL = float(os.environ.get("AUTH_NEGATIVE_TTL", "1.0"))
+AUTH_RETRY_AFTER = int(os.environ.get("AUTH_RETRY_AFTER", "1"))
+
+class AuthSobrecarregado(Exception):
+    """Fila de verificação cheia: o login deve ser tentado de novo mais tarde."""
+
+    def __init__(self, retry_after: int = AUTH_RETRY_AFTER):
+        super().__init__("Fila de autenticação cheia")
+        self.retry_after = retry_after
+
+_lock = threading.Lock()
+_pool = None
+_vagas = threading.BoundedSemaphore(AUTH_WORKERS + AUTH_QUEUE_SIZE)
+
+# HMAC(NP, senha) -> instante até quando essa tentativa é recusada
+_falhas: Dict[bytes, float] = {}
+_chave_falhas = os.urandom(32)
+
+_stats: Dict[str, Any] = {
+    "em_andamento": 0,
+    "rejeitadas": 0,
+    "cache_negativo_hits": 0,
+    "verificacoes": 0,
+    "latencia_total_s": 0.0,
+    "latencia_max_s": 0.0,
+}
+
+def _checkpw(senha: bytes, senha_hash: bytes) -> bool:
+    return bcrypt.checkpw(senha, senha_hash)
+
+def _get_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            if AUTH_POOL_KIND == "process":
+                _pool = ProcessPoolExecutor(max_workers=AUTH_WORKERS)
+            else:
+                _pool = ThreadPoolExecutor(max_workers=AUTH_WORKERS, thread_name_prefix="auth")
+        return _pool
+
+def _credencial(np, senha) -> bytes:
+    return hmac.new(_chave_falhas, f"{np}\0{senha}".encode("utf-8"), hashlib.sha256).digest()
+
+def bloqueado(np, senha) -> bool:
+    # True se este NP com esta mesma senha falhou há pouco (cache negativo)
+    chave = _credencial(np, senha)
+    with _lock:
+        ate = _falhas.get(chave)
+        if ate is None:
+            return False
+        if ate > time.monotonic():
+            _stats["cache_negativo_hits"] += 1
+            return True
+        del _falhas[chave]
+        return False
+
+def registrar_falha(np, senha):
+    chave = _credencial(np, senha)
+    with _lock:
+        agora = time.monotonic()
+        _falhas[chave] = agora + AUTH_NEGATIVE_TTL
+        # limpeza simples para o dict não crescer sem limite
+        if len(_falhas) > 10000:
+            for chave in [k for k, v in _falhas.items() if v <= agora]:
+                del _falhas[chave]
+
+def _reservar_vaga():
+    if not _vagas.acquire(blocking=False):
+        with _lock:
+            _stats["rejeitadas"] += 1
+        raise AuthSobrecarregado()
+    with _lock:
+        _stats["em_andamento"] += 1
+
+def _liberar_vaga(duracao: Optional[float]):
+    with _lock:
+        _stats["em_andamento"] -= 1
+        if duracao is not None:
+            _stats["verificacoes"] += 1
+            _stats["latencia_total_s"] += duracao
+            _stats["latencia_max_s"] = max(_stats["latencia_max_s"], duracao)
+    _vagas.release()
+
+def verificar_senha(senha: str, senha_hash: str) -> bool:
+    """
+    Roda bcrypt.checkpw no pool. Levanta AuthSobrecarregado se a fila estiver cheia.
+    """
+    _reservar_vaga()
+    duracao = None
+    try:
+        inicio = time.perf_counter()
+        with span("bcrypt.checkpw"):  # inclui a espera na fila do pool
+            ok = _get_pool().submit(_checkpw, senha.encode("utf-8"), senha_hash.encode("utf-8")).result()
+        duracao = time.perf_counter() - inicio
+        return ok
+    finally:
+        _liberar_vaga(duracao)
+
+async def verificar_senha_async(senha: str, senha_hash: str) -> bool:
+    # como verificar_senha, mas espera o pool sem segurar o event loop (modo async)
+    _reservar_vaga()
+    duracao = None
+    try:
+        inicio = time.perf_counter()
+        with span("bcrypt.checkpw"):
+            futuro = _get_pool().submit(_checkpw, senha.encode("utf-8"), senha_hash.encode("utf-8"))
+            ok = await asyncio.wrap_future(futuro)
+        duracao = time.perf_counter() - inicio
+        return ok
+    finally:
+        _liberar_vaga(duracao)
+
+def auth_stats() -> Dict[str, Any]:
+    with _lock:
+        verificacoes = _stats["verificacoes"]
+        return {
+            **_stats,
+            "fila": max(_stats["em_andamento"] - AUTH_WORKERS, 0),
+            "workers": AUTH_WORKERS,
+            "capacidade_fila": AUTH_QUEUE_SIZE,
+            "latencia_media_s": _stats["latencia_total_s"] / verificacoes if verificacoes else 0.0,
+            "credenciais_bloqueadas": len(_falhas),
+        }
@@ -1,20 +1,97 @@
 # Modules/Auth/auth_middleware.py
+import hashlib
+import os
+import threading
+import time
 import jwt
+from collections import OrderedDict
 from functools import wraps
+from typing import Optional, Tuple
 from flask import request, jsonify, current_app
+from Modules.Shared.metricas import span
+
+# Cache LRU de tokens já verificados: digest do token -> (exp, request.user).
+# Evita refazer jwt.decode (HMAC) a cada requisição; a entrada vale até o exp do token.
+# TOKEN_CACHE_SIZE=0 desliga o cache.
+TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", "10000"))
+
+_cache: "OrderedDict[bytes, tuple]" = OrderedDict()
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+def _digest(token: str, secret: str) -> bytes:
+    # a chave entra no digest para que trocar SECRET_KEY invalide o cache
+    return hashlib.sha256(secret.encode("utf-8") + b"\0" + token.encode("utf-8")).digest()
+
+def _cache_get(chave: bytes):
+    with _lock:
+        entrada = _cache.get(chave)
+        if entrada is None:
+            _stats["misses"] += 1
+            return None
+        exp, user = entrada
+        if exp <= time.time():
+            del _cache[chave]
+            _stats["misses"] += 1
+            return None
+        _cache.move_to_end(chave)
+        _stats["hits"] += 1
+        return user
+
+def _cache_put(chave: bytes, exp, user: dict):
+    if not exp:
+        return  # sem exp não dá para saber até quando a entrada vale
+    with _lock:
+        _cache[chave] = (exp, user)
+        _cache.move_to_end(chave)
+        while len(_cache) > TOKEN_CACHE_SIZE:
+            _cache.popitem(last=False)
+            _stats["evictions"] += 1
+
+def token_cache_stats() -> dict:
+    with _lock:
+        return {**_stats, "size": len(_cache), "max_size": TOKEN_CACHE_SIZE}
+
+def usuario_do_token(token: Optional[str], secret: str) -> Tuple[Optional[dict], Optional[str]]:
+    # (usuário, None) de um cookie auth válido, senão (None, mensagem do 401)
+    if not token:
+        return None, "Unauthorized"
+    chave = _digest(token, secret) if TOKEN_CACHE_SIZE > 0 else None
+    user = _cache_get(chave) if chave else None
+    if user is not None:
+        return dict(user), None
+
+    try:
+        with span("jwt.decode"):
+            payload = jwt.decode(token, secret, algorithms=["HS256"])
+    except jwt.ExpiredSignatureError:
+        return None, "Session expired"
+    except jwt.InvalidTokenError:
+        return None, "Invalid token"
+    user = {"id": payload["sub"], "role": payload.get("role"), "nome": payload.get("nome")}
+    if chave:
+        _cache_put(chave, payload.get("exp"), dict(user))
+    return user, None
 
 def require_auth(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
-        token = request.cookies.get("auth")
-        if not token:
-            return jsonify({"message": "Unauthorized"}), 401
-        try:
-            payload = jwt.decode(token, current_app.config["SECRET_KEY"], algorithms=["HS256"])
-            request.user = {"id": payload["sub"], "role": payload.get("role"), "nome": payload.get("nome")}
-        except jwt.ExpiredSignatureError:
-            return jsonify({"message": "Session expired"}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({"message": "Invalid token"}), 401
+        user, erro = usuario_do_token(request.cookies.get("auth"), current_app.config["SECRET_KEY"])
+        if erro:
+            return jsonify({"message": erro}), 401
+        request.user = user
         return fn(*args, **kwargs)
     return wrapper
+
+def require_auth_async(fn):
+    # require_auth das rotas async (Shared/assincrono.py): preenche req.user
+    from Modules.Shared.assincrono import json_resposta
+
+    @wraps(fn)
+    async def wrapper(req, **kwargs):
+        user, erro = usuario_do_token(req.cookies.get("auth"), req.app.config["SECRET_KEY"])
+        if erro:
+            return json_resposta({"message": erro}, 401)
+        req.user = user
+        return await fn(req, **kwargs)
+    return wrapper
@@ -1,10 +1,30 @@
-import bcrypt
-from Modules.Users.user_repository import get_user_by_np
+from Modules.Users.user_directory import get_by_np
+from Modules.Auth.auth_executor import bloqueado, registrar_falha, verificar_senha, verificar_senha_async
+from Modules.Shared.assincrono import em_thread
 
 def autenticar(np, senha_digitada):
-    user = get_user_by_np(np)
+    # NP + senha que falharam há pouco são recusados sem rodar bcrypt (cache negativo)
+    if bloqueado(np, senha_digitada):
+        return None
+    user = get_by_np(np)
+    if not user:
+        registrar_falha(np, senha_digitada)
+        return None
+    # bcrypt roda no pool limitado; levanta AuthSobrecarregado se a fila estiver cheia
+    if verificar_senha(senha_digitada, user["senha_hash"]):
+        return user
+    registrar_falha(np, senha_digitada)
+    return None
+
+async def autenticar_async(np, senha_digitada):
+    # autenticar do modo async: diretório (pode reler users.txt) e bcrypt fora do event loop
+    if bloqueado(np, senha_digitada):
+        return None
+    user = await em_thread(get_by_np, np)
     if not user:
+        registrar_falha(np, senha_digitada)
         return None
-    if bcrypt.checkpw(senha_digitada.encode("utf-8"), user["senha_hash"].encode("utf-8")):
+    if await verificar_senha_async(senha_digitada, user["senha_hash"]):
         return user
+    registrar_falha(np, senha_digitada)
     return None
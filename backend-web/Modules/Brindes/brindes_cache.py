@@ -0,0 +1,299 @@
+# Modules/Brindes/brindes_cache.py
+"""
+Cache em memória (por processo) do catálogo e da tabela de estoque.
+
+- Catálogo: recarregado apenas quando mtime/tamanho de Data_Brindes.txt mudam.
+- Estoque: guarda o offset (em bytes) já lido de Data_Movimentation.txt e, quando
+  o arquivo cresce, lê só o trecho novo e soma na tabela. Se o arquivo foi
+  reescrito (trocado por compactação, encolheu ou o trecho já lido mudou), ou se
+  o log está no modo "rewrite", a tabela é refeita do zero.
+
+Catálogo e estoque podem ser exportados/carregados pelo snapshot de partida
+(Shared/aquecimento.py); o estoque carregado é completado com a cauda do log.
+
+Com o backend SQLite a assinatura do arquivo dá lugar ao contador de versão do
+domínio (tabela meta), e a tabela de estoque vem pronta de estoque_variante.
+
+Com os contadores compartilhados entre processos (Movimentacoes/
+estoque_compartilhado.py, padrão no backend de arquivo) a tabela é copiada
+deles em vez de ler o log; depois da primeira leitura, só as variantes
+tocadas desde então (diário dos contadores) são lidas e atualizadas. Se os
+contadores não servem (fora do ar, ids fora dos slots), volta ao log.
+"""
+import os
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from Modules.Movimentacoes import estoque_compartilhado
+from Modules.Movimentacoes import movimentacoes_repository as movs_repo
+from Modules.Shared.db_connection import usar_sqlite, versao
+from . import brindes_repository
+from .estoque_service import tabela_movimentos
+
+# bytes finais do trecho já lido, usados para detectar reescrita do arquivo
+_TAIL_BYTES = 64
+
+_lock = threading.RLock()
+
+_catalogo: Dict[str, Any] = {"assinatura": None, "items": [], "por_id": {}}
+_estoque: Dict[str, Any] = {"assinatura": None, "offset": 0, "tail": b"", "deltas": {}, "estado": {}, "pendentes": {}}
+# cursor do diário dos contadores compartilhados já aplicado na tabela (None: tabela não veio deles)
+_contadores: Dict[str, Any] = {"cursor": None}
+
+# versões incrementadas a cada recarga do catálogo / mudança no estoque, e as
+# variantes tocadas em cada atualização incremental do estoque (para quem
+# mantém visões derivadas e quer reprocessar só o que mudou)
+_versoes: Dict[str, int] = {"catalogo": 0, "estoque": 0}
+_alteracoes: "deque[Tuple[int, Set[int]]]" = deque(maxlen=256)
+
+_stats: Dict[str, int] = {
+    "catalogo_hits": 0,
+    "catalogo_misses": 0,
+    "estoque_hits": 0,
+    "estoque_misses": 0,
+    "estoque_refreshes": 0,
+}
+
+def _assinatura(path) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+def _ler_tail(offset: int) -> bytes:
+    inicio = max(offset - _TAIL_BYTES, 0)
+    with open(movs_repo.MOV_FILE, "rb") as f:
+        f.seek(inicio)
+        return f.read(offset - inicio)
+
+def get_catalogo() -> List[Dict[str, Any]]:
+    """
+    Variações ativas (mesmo formato de load_brindes_raw).
+    A lista é compartilhada entre requisições: não altere os itens, copie antes.
+    """
+    with _lock:
+        if usar_sqlite():
+            assinatura = ("sqlite", versao("catalogo"))
+        else:
+            assinatura = _assinatura(brindes_repository.DATA_FILE)
+        if assinatura is not None and assinatura == _catalogo["assinatura"]:
+            _stats["catalogo_hits"] += 1
+            return _catalogo["items"]
+        _stats["catalogo_misses"] += 1
+        _catalogo["items"] = brindes_repository.load_brindes_raw()
+        _catalogo["por_id"] = {it["id"]: it for it in _catalogo["items"]}
+        _catalogo["assinatura"] = assinatura
+        _versoes["catalogo"] += 1
+        return _catalogo["items"]
+
+def catalogo_versionado() -> Tuple[List[Dict[str, Any]], int]:
+    # (catálogo, versão): a versão muda a cada recarga, para quem monta índices sobre ele
+    with _lock:
+        catalogo = get_catalogo()
+        return catalogo, _versoes["catalogo"]
+
+def get_variacao(variant_id: int) -> Optional[Dict[str, Any]]:
+    # busca por id em O(1) no catálogo em cache (não altere o item retornado)
+    with _lock:
+        get_catalogo()
+        return _catalogo["por_id"].get(variant_id)
+
+def _reconstruir_estoque():
+    movs, offset = movs_repo.read_movs_since(0)
+    _estoque["estado"] = {}
+    _estoque["pendentes"] = {}
+    _estoque["deltas"] = tabela_movimentos(movs, estado=_estoque["estado"], pendentes=_estoque["pendentes"])
+    _estoque["offset"] = offset
+    _contadores["cursor"] = None
+
+def _estoque_sqlite() -> Tuple[Dict[int, int], Dict[int, int]]:
+    # tabela pronta em estoque_variante; relida só quando a versão das movimentações muda
+    assinatura = ("sqlite", versao("movimentacoes"))
+    if assinatura == _estoque["assinatura"]:
+        _stats["estoque_hits"] += 1
+    else:
+        _stats["estoque_misses"] += 1
+        _estoque["deltas"], _estoque["pendentes"] = movs_repo.tabela_estoque()
+        _estoque["assinatura"] = assinatura
+        _versoes["estoque"] += 1
+        _alteracoes.clear()
+    return _estoque["deltas"], _estoque["pendentes"]
+
+def _aplicar_contadores(valores: Dict[int, Tuple[int, int]]):
+    deltas, pendentes = _estoque["deltas"], _estoque["pendentes"]
+    for vid, (conf, pend) in valores.items():
+        for tabela, valor in ((deltas, conf), (pendentes, pend)):
+            if valor:
+                tabela[vid] = valor
+            else:
+                tabela.pop(vid, None)
+
+def _estoque_compartilhado(assinatura: Tuple[int, int, int]) -> Optional[Tuple[Dict[int, int], Dict[int, int]]]:
+    # tabela a partir dos contadores: só as variantes tocadas desde o último cursor
+    lido = estoque_compartilhado.ler_desde(_contadores["cursor"])
+    if lido is None:
+        return None
+    cursor, valores, completo = lido
+    if cursor != _contadores["cursor"]:
+        _versoes["estoque"] += 1
+        if completo:
+            _stats["estoque_misses"] += 1
+            _estoque.update({"offset": 0, "tail": b"", "deltas": {}, "estado": {}, "pendentes": {}})
+            _aplicar_contadores(valores)
+            _alteracoes.clear()
+        else:
+            _stats["estoque_refreshes"] += 1
+            _aplicar_contadores(valores)
+            _alteracoes.append((_versoes["estoque"], set(valores)))
+        _contadores["cursor"] = cursor
+    else:
+        _stats["estoque_hits"] += 1
+    _estoque["assinatura"] = assinatura
+    return _estoque["deltas"], _estoque["pendentes"]
+
+def get_deltas() -> Dict[int, int]:
+    """
+    Tabela {variant_id: delta confirmado}, atualizada de forma incremental.
+    Não altere o dicionário retornado.
+    """
+    return get_estoque()[0]
+
+def get_estoque() -> Tuple[Dict[int, int], Dict[int, int]]:
+    """
+    (deltas confirmados, saídas pendentes em 'processing') do mesmo instante do log.
+    Não altere os dicionários retornados.
+    """
+    with _lock:
+        if usar_sqlite():
+            return _estoque_sqlite()
+        movs_repo.ensure_file()
+        assinatura = _assinatura(movs_repo.MOV_FILE)
+        if assinatura == _estoque["assinatura"]:
+            _stats["estoque_hits"] += 1
+            return _estoque["deltas"], _estoque["pendentes"]
+        if estoque_compartilhado.ativo():
+            tabela = _estoque_compartilhado(assinatura)
+            if tabela is not None:
+                return tabela
+            if _contadores["cursor"] is not None:
+                # a tabela veio dos contadores, que agora não servem: refaz do log (e segue pela cauda)
+                _contadores["cursor"] = None
+                _estoque["assinatura"] = None
+
+        offset = _estoque["offset"]
+        reescrito = (
+            _estoque["assinatura"] is None
+            or movs_repo.MOV_LOG_MODE != "append"
+            or assinatura[2] != _estoque["assinatura"][2]
+            or assinatura[1] < offset
+            or _ler_tail(offset) != _estoque["tail"]
+        )
+        _versoes["estoque"] += 1
+        if reescrito:
+            _stats["estoque_misses"] += 1
+            _reconstruir_estoque()
+            _alteracoes.clear()
+        else:
+            _stats["estoque_refreshes"] += 1
+            movs, _estoque["offset"] = movs_repo.read_movs_since(offset)
+            tabela_movimentos(movs, _estoque["deltas"], _estoque["estado"], _estoque["pendentes"])
+            estado = _estoque["estado"]
+            _alteracoes.append((_versoes["estoque"], {estado[m.MOV_ID][0] for m in movs if m.MOV_ID in estado}))
+
+        _estoque["tail"] = _ler_tail(_estoque["offset"])
+        _estoque["assinatura"] = assinatura
+        return _estoque["deltas"], _estoque["pendentes"]
+
+def snapshot() -> Tuple[List[Dict[str, Any]], Dict[int, int], Dict[int, int], int, int]:
+    """
+    (catálogo, deltas confirmados, saídas pendentes, versão do catálogo, versão
+    do estoque), todos do mesmo instante. Não altere o que for retornado.
+    """
+    with _lock:
+        catalogo = get_catalogo()
+        deltas, pendentes = get_estoque()
+        return catalogo, deltas, pendentes, _versoes["catalogo"], _versoes["estoque"]
+
+def alteracoes_desde(versao_estoque: int) -> Optional[Set[int]]:
+    """
+    Variantes cujo estoque pode ter mudado depois de `versao_estoque`.
+    None quando não dá para saber (tabela refeita ou histórico curto demais):
+    nesse caso trate todas as variantes como alteradas.
+    """
+    with _lock:
+        if versao_estoque == _versoes["estoque"]:
+            return set()
+        if not _alteracoes or _alteracoes[0][0] > versao_estoque + 1:
+            return None
+        alteradas: Set[int] = set()
+        for versao, variantes in _alteracoes:
+            if versao > versao_estoque:
+                alteradas |= variantes
+        return alteradas
+
+def exportar_catalogo() -> Dict[str, Any]:
+    with _lock:
+        get_catalogo()
+        return {"arquivo": str(brindes_repository.DATA_FILE), "assinatura": _catalogo["assinatura"],
+                "items": _catalogo["items"]}
+
+def carregar_catalogo(estado: Dict[str, Any]) -> bool:
+    # usa o catálogo do snapshot se Data_Brindes.txt não mudou desde então
+    with _lock:
+        path = brindes_repository.DATA_FILE
+        if estado["arquivo"] != str(path) or estado["assinatura"] != _assinatura(path):
+            return False
+        _catalogo.update({"assinatura": estado["assinatura"], "items": estado["items"],
+                          "por_id": {it["id"]: it for it in estado["items"]}})
+        _versoes["catalogo"] += 1
+        return True
+
+def exportar_estoque() -> Dict[str, Any]:
+    with _lock:
+        if estoque_compartilhado.ativo():
+            # os contadores já persistem entre processos: nada a guardar
+            return {"arquivo": str(movs_repo.MOV_FILE), "compartilhado": True}
+        get_estoque()
+        return {**_estoque, "arquivo": str(movs_repo.MOV_FILE)}
+
+def carregar_estoque(estado: Dict[str, Any]) -> bool:
+    """
+    Usa a tabela de estoque do snapshot se o log ainda começa pelo trecho já
+    lido (mesmo inode, não encolheu, mesmo tail). A próxima get_estoque lê só
+    as linhas gravadas depois do snapshot.
+    """
+    with _lock:
+        path = movs_repo.MOV_FILE
+        if estoque_compartilhado.ativo():
+            # nada a carregar: vale se o snapshot já foi gravado assim
+            return estado["arquivo"] == str(path) and bool(estado.get("compartilhado"))
+        if estado.get("compartilhado"):
+            return False
+        if estado["arquivo"] != str(path) or movs_repo.MOV_LOG_MODE != "append":
+            return False
+        assinatura = _assinatura(path)
+        if (assinatura is None or assinatura[2] != estado["assinatura"][2]
+                or assinatura[1] < estado["offset"] or _ler_tail(estado["offset"]) != estado["tail"]):
+            return False
+        _estoque.update({chave: estado[chave] for chave in _estoque})
+        _versoes["estoque"] += 1
+        _alteracoes.clear()
+        return True
+
+def invalidar():
+    # força recarga completa na próxima consulta
+    with _lock:
+        _catalogo["assinatura"] = None
+        _estoque["assinatura"] = None
+        _contadores["cursor"] = None
+
+def cache_stats() -> Dict[str, Any]:
+    with _lock:
+        return {
+            **_stats,
+            "catalogo_itens": len(_catalogo["items"]),
+            "estoque_variantes": len(_estoque["deltas"]),
+            "estoque_offset": _estoque["offset"],
+        }
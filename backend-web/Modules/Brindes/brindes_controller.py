@@ -1,24 +1,79 @@
-from flask import Blueprint, jsonify, request
-from .brindes_service import listar_variacoes, agrupar_por_produto
+from typing import Any, Dict, Optional, Tuple
+from flask import Blueprint, Response, jsonify, request
+from .brindes_service import listar_variacoes, estoque_da_variacao
+from .produtos_view import produtos_json
+from .catalogo_busca import buscar, MAX_LIMIT, ORDENACOES
+
+# parâmetros que ativam a busca paginada em /api/brindes
+_PARAMS_BUSCA = ("q", "category", "size", "tag", "minCost", "maxCost", "sort", "page", "limit")
 
 brindes_bp = Blueprint("brindes", __name__)
 
+def _valores(args, nome: str):
+    # ?category=a,b ou ?category=a&category=b
+    return [v.strip() for arg in args.getlist(nome) for v in arg.split(",") if v.strip()]
+
+def _inteiro(args, nome: str, padrao=None):
+    valor = args.get(nome)
+    return padrao if valor in (None, "") else int(valor)
+
+def parametros_busca(args) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Argumentos de buscar() a partir da query (request.args ou o MultiDict do modo async).
+    (None, None) sem parâmetros de busca (lista completa); (None, erro) se inválidos.
+    """
+    if not any(p in args for p in _PARAMS_BUSCA):
+        return None, None
+    try:
+        page = _inteiro(args, "page", 1)
+        limit = _inteiro(args, "limit", 50)
+        custo_min = _inteiro(args, "minCost")
+        custo_max = _inteiro(args, "maxCost")
+    except ValueError:
+        return None, "page, limit, minCost e maxCost devem ser inteiros"
+    sort = args.get("sort") or "catalogo"
+    if page <= 0 or limit <= 0 or sort not in ORDENACOES:
+        return None, "page/limit devem ser positivos e sort um de cost, -cost, name"
+    return {
+        "q": args.get("q"),
+        "categorias": _valores(args, "category"),
+        "tamanhos": _valores(args, "size"),
+        "tags": _valores(args, "tag"),
+        "custo_min": custo_min,
+        "custo_max": custo_max,
+        "ordenar": sort,
+        "page": page,
+        "limit": min(limit, MAX_LIMIT),
+    }, None
+
 @brindes_bp.route("/api/brindes", methods=["GET"])
 def api_listar_variacoes():
-    # retorna as variações com estoque atual
-    data = listar_variacoes()
-    return jsonify(data), 200
+    """
+    Sem parâmetros: todas as variações com estoque atual (lista).
+    Com busca/filtros, resposta paginada {"items", "total", "page", "limit", "pages"}:
+      ?q=caneta&category=Escritorio&size=M&tag=novo&minCost=10&maxCost=100
+      &sort=cost|-cost|name&page=1&limit=50
+    """
+    busca, erro = parametros_busca(request.args)
+    if erro:
+        return jsonify({"ok": False, "error": erro}), 400
+    if busca is None:
+        data = listar_variacoes()
+        return jsonify(data), 200
+    return jsonify(buscar(**busca)), 200
 
 @brindes_bp.route("/api/brindes/produtos", methods=["GET"])
 def api_agrupar_produtos():
-    # retorna produtos agrupados (cards)
-    data = agrupar_por_produto()
-    return jsonify(data), 200
+    # retorna produtos agrupados (cards): corpo pré-serializado + ETag (304 se não mudou)
+    body, etag = produtos_json()
+    resp = Response(body, mimetype="application/json")
+    resp.set_etag(etag)
+    return resp.make_conditional(request)
 
 @brindes_bp.route("/api/brindes/<int:variant_id>/estoque", methods=["GET"])
 def api_estoque_variant(variant_id):
-    items = listar_variacoes()
-    item = next((i for i in items if i["id"] == variant_id), None)
-    if not item:
+    # stockCurrent: confirmado; stockAvailable: descontadas as reservas em processing
+    estoque = estoque_da_variacao(variant_id)
+    if estoque is None:
         return jsonify({"ok": False, "error": "Variante não encontrada"}), 404
-    return jsonify({"variantId": variant_id, "stockCurrent": item["stockCurrent"]}), 200
+    return jsonify({"variantId": variant_id, **estoque}), 200
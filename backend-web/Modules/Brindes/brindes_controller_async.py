@@ -0,0 +1,46 @@
+# Modules/Brindes/brindes_controller_async.py
+"""
+Rotas de brindes do modo async (asgi.py), com as mesmas respostas de
+brindes_controller. Leituras iguais e simultâneas (mesma consulta, mesmos
+arquivos de dados) rodam uma vez só no pool (assincrono.unico).
+"""
+from typing import Tuple
+from werkzeug.http import parse_etags, quote_etag
+from Modules.Movimentacoes import movimentacoes_repository
+from Modules.Shared.assincrono import Requisicao, Resposta, Rotas, assinatura, json_resposta, unico
+from . import brindes_repository
+from .brindes_controller import parametros_busca
+from .brindes_service import listar_variacoes, estoque_da_variacao
+from .catalogo_busca import buscar
+from .produtos_view import produtos_json
+
+brindes_async = Rotas("brindes")
+
+def _dados() -> Tuple:
+    # catálogo e estoque dependem destes dois arquivos
+    return assinatura(brindes_repository.DATA_FILE, movimentacoes_repository.MOV_FILE)
+
+@brindes_async.rota("/api/brindes")
+async def api_listar_variacoes(req: Requisicao) -> Resposta:
+    busca, erro = parametros_busca(req.args)
+    if erro:
+        return json_resposta({"ok": False, "error": erro}, 400)
+    if busca is None:
+        return json_resposta(await unico(("brindes", _dados()), listar_variacoes))
+    resultado = await unico(("brindes/busca", req.query_string, _dados()), lambda: buscar(**busca))
+    return json_resposta(resultado)
+
+@brindes_async.rota("/api/brindes/produtos")
+async def api_agrupar_produtos(req: Requisicao) -> Resposta:
+    body, etag = await unico(("produtos", _dados()), produtos_json)
+    headers = [("ETag", quote_etag(etag))]
+    if parse_etags(req.headers.get("if-none-match")).contains(etag):
+        return Resposta(b"", 304, headers, tipo=None)
+    return Resposta(body, 200, headers)
+
+@brindes_async.rota("/api/brindes/<int:variant_id>/estoque")
+async def api_estoque_variant(req: Requisicao, variant_id: int) -> Resposta:
+    estoque = await unico(("estoque", variant_id, _dados()), estoque_da_variacao, variant_id)
+    if estoque is None:
+        return json_resposta({"ok": False, "error": "Variante não encontrada"}, 404)
+    return json_resposta({"variantId": variant_id, **estoque})
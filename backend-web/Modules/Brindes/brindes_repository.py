@@ -1,58 +1,81 @@
 # backend-web/Modules/Brindes/brindes_repository.py
-import csv
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from Modules.Shared.record_loader import Schema, iter_arquivo, texto, texto_ou_none, inteiro
+from Modules.Shared.db_connection import usar_sqlite, get_connection
+from Modules.Shared.metricas import span
 
 DATA_FILE = Path(__file__).resolve().parents[3] / "dados-teste" / "Data_Brindes.txt"
 
-def _int_or_zero(val: Any) -> int:
-    try:
-        return int(str(val).strip())
-    except Exception:
-        return 0
+# campos do catálogo e os nomes de coluna aceitos para cada um
+BRINDE_SCHEMA = Schema("Brinde", [
+    ("ativo", ("Ativo",), texto),
+    ("id", ("ID", "Id"), inteiro),
+    ("product_id", ("PRODUCT_ID", "Product_ID", "ProductId", "Product_Id", "Product", "PRODUCTID"), inteiro),
+    ("sku", ("SKU", "Sku"), texto),
+    ("name", ("Nome", "Name"), texto),
+    ("description", ("Descricao", "Description"), texto),
+    ("details", ("Detalhes",), texto),
+    ("category", ("Categoria", "Category"), texto),
+    ("size", ("Tamanho", "Size"), texto_ou_none),
+    ("pointsCost", ("Custo", "Cost"), inteiro),
+    ("stockInitial", ("Estoque_Inicial", "EstoqueInicial", "Estoque"), inteiro),
+    ("imageUrl", ("URL", "Url", "Image"), texto_ou_none),
+    ("createdAt", ("Data_Cadastro", "created_at"), texto),
+    ("updatedAt", ("Ultima_Modificacao", "updated_at"), texto),
+    ("tags", ("Tags",), texto),
+])
+
+# backend SQLite: colunas na ordem do BRINDE_SCHEMA, na ordem do arquivo importado
+_SQL_ATIVOS = (f"SELECT {', '.join(BRINDE_SCHEMA.Record._fields)} FROM brindes "
+               "WHERE ativo = '1' ORDER BY linha")
+
+def _item(r) -> Optional[Dict[str, Any]]:
+    # variação normalizada a partir de um registro BRINDE_SCHEMA (None se inválida/inativa)
+    if r.ativo != "1":
+        return None
+
+    item = {
+        "id": r.id,
+        "product_id": r.product_id,
+        "sku": r.sku,
+        "name": r.name,
+        "description": r.description,
+        "details": r.details,
+        "category": r.category,
+        "size": r.size,
+        "pointsCost": r.pointsCost,
+        "stockInitial": r.stockInitial,
+        "imageUrl": r.imageUrl,
+        "createdAt": r.createdAt,
+        "updatedAt": r.updatedAt,
+        "active": 1,
+        "tags": r.tags,
+    }
+
+    # fallback: if product_id missing, use id as product_id (single-variant product)
+    if not item["product_id"] or item["product_id"] == 0:
+        item["product_id"] = item["id"]
+
+    # sanity: require id and name
+    if item["id"] and item["name"]:
+        return item
+    return None
 
 def load_brindes_raw() -> List[Dict[str, Any]]:
     """
-    Lê o CSV no formato novo e retorna lista de variações (raw) com campos normalizados.
+    Lê o CSV no formato novo (ou a tabela brindes, no backend SQLite) e retorna
+    lista de variações (raw) com campos normalizados.
     Este nome é usado por brindes_service.py.
     """
-    items: List[Dict[str, Any]] = []
-    if not DATA_FILE.exists():
-        return items
-
-    with open(DATA_FILE, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f, delimiter=";")
-        for row in reader:
-            ativo = (row.get("Ativo") or "").strip()
-            if ativo != "1":
-                continue
-
-            item = {
-                "id": _int_or_zero(row.get("ID") or row.get("Id") or 0),
-                "product_id": _int_or_zero(row.get("PRODUCT_ID") or row.get("Product_ID") or row.get("ProductId") or row.get("Product_Id") or row.get("Product") or row.get("ProductId") or row.get("PRODUCTID") or 0),
-                "sku": (row.get("SKU") or row.get("Sku") or "").strip(),
-                "name": (row.get("Nome") or row.get("Nome") or row.get("Name") or "").strip(),
-                "description": (row.get("Descricao") or row.get("Descricao") or row.get("Description") or "").strip(),
-                "details": (row.get("Detalhes") or row.get("Detalhes") or "").strip(),
-                "category": (row.get("Categoria") or row.get("Categoria") or row.get("Category") or "").strip(),
-                "size": (row.get("Tamanho") or row.get("Tamanho") or row.get("Size") or "").strip() or None,
-                "pointsCost": _int_or_zero(row.get("Custo") or row.get("Cost") or 0),
-                "stockInitial": _int_or_zero(row.get("Estoque_Inicial") or row.get("EstoqueInicial") or row.get("Estoque") or 0),
-                "imageUrl": (row.get("URL") or row.get("Url") or row.get("Image") or "").strip() or None,
-                "createdAt": (row.get("Data_Cadastro") or row.get("Data_Cadastro") or row.get("created_at") or "").strip(),
-                "updatedAt": (row.get("Ultima_Modificacao") or row.get("Ultima_Modificacao") or row.get("updated_at") or "").strip(),
-                "active": 1,
-                "tags": (row.get("Tags") or "").strip(),
-            }
-
-            # fallback: if product_id missing, use id as product_id (single-variant product)
-            if not item["product_id"] or item["product_id"] == 0:
-                item["product_id"] = item["id"]
-
-            # sanity: require id and name
-            if item["id"] and item["name"]:
-                items.append(item)
-    return items
+    with span("brindes.load"):
+        if usar_sqlite():
+            registros = (BRINDE_SCHEMA.Record(*row) for row in get_connection().execute(_SQL_ATIVOS))
+        elif DATA_FILE.exists():
+            registros = iter_arquivo(DATA_FILE, BRINDE_SCHEMA)
+        else:
+            return []
+        return [item for item in map(_item, registros) if item]
 
 # backward compatibility helper (in case other modules import load_brindes)
 def load_brindes() -> List[Dict[str, Any]]:
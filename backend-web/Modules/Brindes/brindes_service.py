@@ -1,61 +1,32 @@
-from typing import List, Dict, Any
-from .brindes_repository import load_brindes_raw
-from .estoque_service import estoque_atual_map
+import json
+from typing import List, Dict, Any, Optional
+from .brindes_cache import get_catalogo, get_variacao, get_estoque
+from .estoque_service import disponivel_for, stock_for
+from .produtos_view import produtos_json
 
 def listar_variacoes() -> List[Dict[str, Any]]:
-    # variações cruas + estoque atual
-    items = load_brindes_raw()
-    stock_map = estoque_atual_map(items)
+    # variações cruas + estoque atual e disponível (catálogo e estoque vêm do cache do processo)
+    items = [dict(it) for it in get_catalogo()]
+    deltas, pendentes = get_estoque()
+    ids = [it["id"] for it in items]
+    iniciais = {it["id"]: it["stockInitial"] for it in items}
+    stock_map = stock_for(ids, iniciais, deltas)
+    disponivel = disponivel_for(ids, iniciais, deltas, pendentes)
     for it in items:
         it["stockCurrent"] = stock_map.get(it["id"], it["stockInitial"])
+        it["stockAvailable"] = disponivel[it["id"]]
     return items
 
-def agrupar_por_produto() -> List[Dict[str, Any]]:
-    # agrupa por product_id para uso do frontend (card + sizes)
-    items = listar_variacoes()
-    groups: Dict[int, Dict[str, Any]] = {}
-
-    for it in items:
-        pid = it["product_id"]
-        if pid not in groups:
-            groups[pid] = {
-                "product_id": pid,
-                "name": it["name"].replace(" - P","").replace(" - M","").replace(" - G","").replace(" - GG","").strip(),
-                "description": it["description"],
-                "details": it["details"],
-                "category": it["category"],
-                "imageUrl": it["imageUrl"],
-                "variants": [],
-            }
-        # adiciona variante
-        groups[pid]["variants"].append({
-            "id": it["id"],
-            "sku": it["sku"],
-            "size": it["size"],
-            "pointsCost": it["pointsCost"],
-            "stockCurrent": it["stockCurrent"],
-            "imageUrl": it["imageUrl"],
-        })
-        # fallbacks básicos
-        if not groups[pid]["imageUrl"] and it["imageUrl"]:
-            groups[pid]["imageUrl"] = it["imageUrl"]
+def estoque_da_variacao(variant_id: int) -> Optional[Dict[str, int]]:
+    # {"stockCurrent", "stockAvailable"} de uma única variante; None se não existir/inativa
+    item = get_variacao(variant_id)
+    if not item:
+        return None
+    deltas, pendentes = get_estoque()
+    iniciais = {variant_id: item["stockInitial"]}
+    return {"stockCurrent": stock_for([variant_id], iniciais, deltas)[variant_id],
+            "stockAvailable": disponivel_for([variant_id], iniciais, deltas, pendentes)[variant_id]}
 
-    # calcular campos derivados: sizes, pointsCost (mínimo), stock (soma)
-    result = []
-    for g in groups.values():
-        sizes = sorted(list({v["size"] for v in g["variants"] if v["size"]}))
-        min_cost = min([v["pointsCost"] for v in g["variants"] if isinstance(v["pointsCost"], int)], default=0)
-        total_stock = sum([v["stockCurrent"] for v in g["variants"]])
-        result.append({
-            "product_id": g["product_id"],
-            "name": g["name"],
-            "description": g["description"],
-            "details": g["details"],
-            "category": g["category"],
-            "imageUrl": g["imageUrl"],
-            "pointsCost": min_cost,
-            "stock": total_stock,
-            "sizes": sizes if sizes else None,
-            "variants": g["variants"],
-        })
-    return result
+def agrupar_por_produto() -> List[Dict[str, Any]]:
+    # produtos agrupados (cards), vindos da visão pré-calculada
+    return json.loads(produtos_json()[0])
@@ -0,0 +1,212 @@
+# Modules/Brindes/catalogo_busca.py
+"""
+Busca, filtros e paginação do catálogo (GET /api/brindes?q=...).
+
+Índices montados a partir do catálogo em cache (load_brindes_raw) e refeitos
+só quando ele é recarregado, ou seja, quando Data_Brindes.txt muda:
+- índice invertido token -> posições, sobre nome, descrição e tags
+  (minúsculas, sem acento); o último termo da busca também casa por prefixo;
+- baldes de categoria, tamanho e tag -> posições;
+- posições ordenadas por custo + custos ordenados, para faixas de custo
+  (busca binária) e ordenação por custo sem sort na consulta;
+- posições ordenadas por nome.
+
+Cada filtro vira uma máscara booleana NumPy do tamanho do catálogo; filtros
+diferentes combinam com E, valores do mesmo filtro com OU. Termos e baldes
+muito frequentes já guardam a máscara pronta. A página é cortada das posições
+que sobram, na ordem pedida, e só os itens dela são montados.
+"""
+import bisect
+import re
+import threading
+import unicodedata
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .brindes_cache import catalogo_versionado, get_estoque
+from .estoque_service import disponivel_for, stock_for
+
+MAX_LIMIT = 200
+ORDENACOES = ("catalogo", "cost", "-cost", "name")
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# listas de posições com pelo menos n / _FREQUENTE itens guardam também a máscara pronta
+_FREQUENTE = 16
+
+_lock = threading.Lock()
+
+_indice: Dict[str, Any] = {"versao": None}
+
+def normalizar(texto: str) -> str:
+    # minúsculas e sem acento ("Escritório" -> "escritorio")
+    sem_acento = unicodedata.normalize("NFKD", texto or "").encode("ascii", "ignore").decode("ascii")
+    return sem_acento.lower().strip()
+
+def tokens(texto: str) -> List[str]:
+    return _TOKEN.findall(normalizar(texto))
+
+def _tags(texto: str) -> List[str]:
+    # tags separadas por vírgula, | ou /
+    return [t for t in (normalizar(p) for p in re.split(r"[,|/]", texto or "")) if t]
+
+def _postings(buckets: Dict[str, List[int]]) -> Dict[str, np.ndarray]:
+    return {chave: np.asarray(pos, dtype=np.int32) for chave, pos in buckets.items()}
+
+def _mascaras_prontas(n: int, *indices: Dict[str, np.ndarray]) -> Dict[int, np.ndarray]:
+    # id(array de posições) -> máscara, para as listas grandes
+    prontas = {}
+    for indice in indices:
+        for pos in indice.values():
+            if len(pos) >= max(n // _FREQUENTE, 1):
+                m = np.zeros(n, dtype=bool)
+                m[pos] = True
+                prontas[id(pos)] = m
+    return prontas
+
+def _montar(catalogo: List[Dict[str, Any]], versao: int):
+    termos: Dict[str, set] = {}
+    categorias: Dict[str, List[int]] = {}
+    tamanhos: Dict[str, List[int]] = {}
+    tags: Dict[str, List[int]] = {}
+    for pos, it in enumerate(catalogo):
+        for token in tokens(f"{it['name']} {it['description']} {it['tags']}"):
+            termos.setdefault(token, set()).add(pos)
+        categorias.setdefault(normalizar(it["category"]), []).append(pos)
+        tamanhos.setdefault(normalizar(it["size"]), []).append(pos)
+        for tag in _tags(it["tags"]):
+            tags.setdefault(tag, []).append(pos)
+
+    n = len(catalogo)
+    custos = np.fromiter((it["pointsCost"] or 0 for it in catalogo), dtype=np.int64, count=n)
+    por_custo = np.argsort(custos, kind="stable").astype(np.int32)
+    nomes = [normalizar(it["name"]) for it in catalogo]
+    por_nome = np.asarray(sorted(range(n), key=nomes.__getitem__), dtype=np.int32)
+    indices = {
+        "termos": {t: np.fromiter(sorted(p), dtype=np.int32, count=len(p)) for t, p in termos.items()},
+        "categorias": _postings(categorias),
+        "tamanhos": _postings(tamanhos),
+        "tags": _postings(tags),
+    }
+    _indice.clear()
+    _indice.update({
+        "versao": versao,
+        "catalogo": catalogo,
+        "n": n,
+        **indices,
+        "vocabulario": sorted(termos),
+        "prontas": _mascaras_prontas(n, *indices.values()),
+        "custos": custos,
+        "por_custo": por_custo,
+        "custos_ordenados": custos[por_custo],
+        # ordem -> posições; posição -> colocação (para ordenar poucos resultados)
+        "ordens": {"cost": por_custo, "-cost": por_custo[::-1], "name": por_nome},
+        "rank": {"cost": _rank(por_custo), "-cost": _rank(por_custo[::-1]), "name": _rank(por_nome)},
+    })
+
+def _rank(ordem: np.ndarray) -> np.ndarray:
+    rank = np.empty(len(ordem), dtype=np.int32)
+    rank[ordem] = np.arange(len(ordem), dtype=np.int32)
+    return rank
+
+def _atual() -> Dict[str, Any]:
+    catalogo, versao = catalogo_versionado()
+    with _lock:
+        if _indice["versao"] != versao:
+            _montar(catalogo, versao)
+        return dict(_indice)
+
+def _mascara(idx: Dict[str, Any], posicoes: Sequence[np.ndarray]) -> np.ndarray:
+    # OU das listas de posições (não altere o retorno: pode ser uma máscara pronta)
+    prontas = idx["prontas"]
+    if len(posicoes) == 1 and id(posicoes[0]) in prontas:
+        return prontas[id(posicoes[0])]
+    m = np.zeros(idx["n"], dtype=bool)
+    for pos in posicoes:
+        if id(pos) in prontas:
+            m |= prontas[id(pos)]
+        else:
+            m[pos] = True
+    return m
+
+def _termo(idx: Dict[str, Any], termo: str, prefixo: bool) -> List[np.ndarray]:
+    if not prefixo:
+        pos = idx["termos"].get(termo)
+        return [pos] if pos is not None else []
+    vocab = idx["vocabulario"]
+    inicio = bisect.bisect_left(vocab, termo)
+    fim = bisect.bisect_left(vocab, termo + "\x7f")
+    return [idx["termos"][t] for t in vocab[inicio:fim]]
+
+def buscar(q: Optional[str] = None, categorias: Sequence[str] = (), tamanhos: Sequence[str] = (),
+           tags: Sequence[str] = (), custo_min: Optional[int] = None, custo_max: Optional[int] = None,
+           ordenar: str = "catalogo", page: int = 1, limit: int = 50) -> Dict[str, Any]:
+    """
+    Variações ativas que casam com todos os filtros, paginadas.
+    `q`: todos os termos precisam aparecer (o último também por prefixo).
+    Devolve {"items", "total", "page", "limit", "pages"}; itens com stockCurrent e stockAvailable.
+    """
+    idx = _atual()
+    n = idx["n"]
+    mascara: Optional[np.ndarray] = None
+
+    def restringir(m: np.ndarray):
+        nonlocal mascara
+        mascara = m if mascara is None else mascara & m
+
+    termos = tokens(q or "")
+    for i, termo in enumerate(termos):
+        restringir(_mascara(idx, _termo(idx, termo, prefixo=i == len(termos) - 1)))
+    for valores, baldes in ((categorias, idx["categorias"]), (tamanhos, idx["tamanhos"]), (tags, idx["tags"])):
+        if valores:
+            restringir(_mascara(idx, [baldes[v] for v in map(normalizar, valores) if v in baldes]))
+    ordem = idx["ordens"].get(ordenar)
+    if custo_min is not None or custo_max is not None:
+        ordenados = idx["custos_ordenados"]
+        inicio = 0 if custo_min is None else int(np.searchsorted(ordenados, custo_min, side="left"))
+        fim = n if custo_max is None else int(np.searchsorted(ordenados, custo_max, side="right"))
+        fim = max(fim, inicio)
+        if ordenar in ("cost", "-cost"):
+            # ordenando por custo, a faixa é só um trecho da ordem
+            ordem = idx["por_custo"][inicio:fim]
+            ordem = ordem[::-1] if ordenar == "-cost" else ordem
+        elif fim - inicio < n // _FREQUENTE:
+            restringir(_mascara(idx, [idx["por_custo"][inicio:fim]]))
+        else:
+            # faixa larga: comparar o array de custos sai mais barato que espalhar as posições
+            custos = idx["custos"]
+            restringir((custos >= ordenados[inicio]) & (custos <= ordenados[fim - 1]) if fim > inicio
+                       else np.zeros(n, dtype=bool))
+
+    if mascara is None:
+        posicoes = ordem if ordem is not None else np.arange(n, dtype=np.int32)
+    elif ordem is None:
+        posicoes = np.flatnonzero(mascara)
+    elif len(ordem) == n and np.count_nonzero(mascara) < n // 8:
+        # poucos resultados: ordena só eles pela colocação pré-calculada
+        posicoes = np.flatnonzero(mascara)
+        posicoes = posicoes[np.argsort(idx["rank"][ordenar][posicoes], kind="stable")]
+    else:
+        posicoes = ordem[mascara[ordem]]
+
+    total = len(posicoes)
+    inicio = (page - 1) * limit
+    items = [dict(idx["catalogo"][pos]) for pos in posicoes[inicio:inicio + limit].tolist()]
+    deltas, pendentes = get_estoque()
+    ids = [it["id"] for it in items]
+    iniciais = {it["id"]: it["stockInitial"] for it in items}
+    stock_map = stock_for(ids, iniciais, deltas)
+    disponivel = disponivel_for(ids, iniciais, deltas, pendentes)
+    for it in items:
+        it["stockCurrent"] = stock_map[it["id"]]
+        it["stockAvailable"] = disponivel[it["id"]]
+    return {"items": items, "total": total, "page": page, "limit": limit, "pages": -(-total // limit)}
+
+def busca_stats() -> Dict[str, Any]:
+    with _lock:
+        if _indice["versao"] is None:
+            return {"versao": None}
+        return {"versao": _indice["versao"], "variacoes": _indice["n"], "termos": len(_indice["termos"]),
+                "categorias": len(_indice["categorias"]), "tamanhos": len(_indice["tamanhos"]),
+                "tags": len(_indice["tags"])}
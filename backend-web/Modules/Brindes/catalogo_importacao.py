@@ -0,0 +1,288 @@
+# Modules/Brindes/catalogo_importacao.py
+"""
+Importação em lote do catálogo a partir do CSV de um fornecedor.
+
+O arquivo é lido em streaming (blocos de _BLOCO bytes, linha a linha) e cada
+linha é validada: ID inteiro positivo, nome, custo e estoque inicial inteiros
+>= 0, Ativo 0/1 (vazio = 1). Os cabeçalhos aceitos são os mesmos apelidos do
+BRINDE_SCHEMA usado por load_brindes_raw; o separador (; , ou tab) é
+detectado pelo cabeçalho.
+
+As linhas válidas vão, em lotes, para um arquivo novo ao lado de
+Data_Brindes.txt, no formato de sempre; só no fim, sem nenhum erro (inclusive
+ID ou SKU repetido), o arquivo novo é trocado pelo atual com os.replace:
+quem lê o catálogo vê o antigo ou o novo inteiro, nunca um pela metade. No
+backend SQLite a tabela brindes é substituída numa única transação.
+
+Memória limitada: além de um lote de linhas, só as chaves para achar
+duplicatas (ID e hash de 64 bits do SKU, ~24 bytes por linha em arrays
+compactos). O progresso vai para o callback `progresso` e para
+importacoes(), consultado pelo admin enquanto a importação roda.
+"""
+import csv
+import hashlib
+import io
+import os
+import threading
+import time
+import uuid
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from Modules.Shared.db_connection import usar_sqlite, transacao
+from Modules.Shared.record_loader import Schema, texto
+from . import brindes_repository
+from .brindes_repository import BRINDE_SCHEMA
+
+# ordem das colunas no Data_Brindes.txt gravado (cabeçalho = primeiro apelido de cada campo)
+_ORDEM = ("id", "product_id", "sku", "name", "description", "details", "category", "size",
+          "pointsCost", "stockInitial", "imageUrl", "createdAt", "updatedAt", "ativo", "tags")
+_APELIDOS = {nome: apelidos for nome, apelidos, _ in BRINDE_SCHEMA.campos}
+CABECALHO = [_APELIDOS[campo][0] for campo in _ORDEM]
+OBRIGATORIAS = ("id", "name", "pointsCost", "stockInitial")
+
+def _ativo(valor: str) -> str:
+    return valor.strip() or "1"
+
+# mesmos apelidos do catálogo, com os valores em texto (para validar antes de converter) e
+# os campos na ordem do arquivo gravado: o registro já é a linha de saída
+_BRUTO = Schema("BrindeImportado", [(campo, _APELIDOS[campo], _ativo if campo == "ativo" else texto)
+                                    for campo in _ORDEM])
+
+_BLOCO = 1 << 20  # bytes lidos por vez
+_LOTE = 5000  # linhas gravadas por vez
+_PASSO_PROGRESSO = 10000  # linhas entre avisos de progresso
+MAX_ERROS = 100  # erros detalhados no resultado (o total é sempre contado)
+_HISTORICO = 20  # importações guardadas para consulta
+
+_lock = threading.Lock()
+_importacoes: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+class _Rejeitada(Exception):
+    # importação com erros: desfaz a gravação
+    pass
+
+class _Contador(io.RawIOBase):
+    # leitura de `origem` contando os bytes, para o progresso
+    def __init__(self, origem):
+        self.origem = origem
+        self.lidos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        dados = self.origem.read(len(b))
+        n = len(dados)
+        b[:n] = dados
+        self.lidos += n
+        return n
+
+def _separador(linha: str) -> str:
+    return max((";", ",", "\t"), key=linha.count)
+
+def _inteiro(valor: str, minimo: int) -> Optional[int]:
+    # inteiro em [minimo, int64], senão None
+    try:
+        n = int(valor)
+    except ValueError:
+        return None
+    return n if minimo <= n < 2 ** 63 else None
+
+def _validar(r) -> List[str]:
+    # erros de um registro _BRUTO (vazio: a linha pode ser gravada como está)
+    erros = []
+    if _inteiro(r.id, 1) is None:
+        erros.append(f"ID inválido: '{r.id}'")
+    if r.product_id and _inteiro(r.product_id, 0) is None:
+        erros.append(f"PRODUCT_ID inválido: '{r.product_id}'")
+    if not r.name:
+        erros.append("Nome vazio")
+    if _inteiro(r.pointsCost, 0) is None:
+        erros.append(f"Custo inválido: '{r.pointsCost}'")
+    if _inteiro(r.stockInitial, 0) is None:
+        erros.append(f"Estoque inicial inválido: '{r.stockInitial}'")
+    if r.ativo not in ("0", "1"):
+        erros.append(f"Ativo deve ser 0 ou 1: '{r.ativo}'")
+    return erros
+
+def _hash_sku(sku: str) -> int:
+    return int.from_bytes(hashlib.blake2b(sku.encode("utf-8"), digest_size=8).digest(), "little", signed=True)
+
+def _duplicadas(chaves: array, linhas: array) -> List[Tuple[int, List[int]]]:
+    # [(chave, linhas)] das chaves que aparecem mais de uma vez
+    if not chaves:
+        return []
+    k = np.frombuffer(chaves, dtype=np.int64)
+    ordem = np.argsort(k, kind="stable")
+    ordenadas = k[ordem]
+    repetidas = np.flatnonzero(ordenadas[1:] == ordenadas[:-1])
+    if not len(repetidas):
+        return []
+    l = np.frombuffer(linhas, dtype=np.int32)
+    grupos: Dict[int, List[int]] = {}
+    for i in repetidas.tolist():
+        chave = int(ordenadas[i])
+        grupo = grupos.setdefault(chave, [int(l[ordem[i]])])
+        grupo.append(int(l[ordem[i + 1]]))
+    return list(grupos.items())
+
+@contextmanager
+def _destino_arquivo():
+    # grava num temporário na mesma pasta e troca pelo catálogo só se o bloco terminar sem erro
+    destino = brindes_repository.DATA_FILE
+    tmp = destino.with_name(f"{destino.stem}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, delimiter=";", lineterminator="\n")
+            writer.writerow(CABECALHO)
+            yield writer.writerows
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, destino)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+@contextmanager
+def _destino_sqlite():
+    # substitui a tabela brindes numa transação (leitores veem a anterior até o COMMIT)
+    campos = BRINDE_SCHEMA.Record._fields
+    sql = f"INSERT INTO brindes (linha, {', '.join(campos)}) VALUES ({', '.join('?' * (len(campos) + 1))})"
+    converter = BRINDE_SCHEMA.compilar(CABECALHO)
+    seq = [0]
+
+    def gravar(linhas: List[Tuple[str, ...]]):
+        inicio = seq[0]
+        seq[0] += len(linhas)
+        conn.executemany(sql, ((inicio + i, *converter(linha)) for i, linha in enumerate(linhas, 1)))
+
+    with transacao() as conn:
+        conn.execute("DELETE FROM brindes")
+        yield gravar
+
+def _registrar(estado: Dict[str, Any]):
+    with _lock:
+        _importacoes[estado["id"]] = estado
+        while len(_importacoes) > _HISTORICO:
+            _importacoes.popitem(last=False)
+
+def importacoes() -> List[Dict[str, Any]]:
+    """Importações recentes deste processo (a mais nova primeiro), com o progresso."""
+    with _lock:
+        return [dict(estado) for estado in reversed(_importacoes.values())]
+
+def importar(origem: BinaryIO, total_bytes: Optional[int] = None, validar_apenas: bool = False,
+             progresso: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Lê o CSV (binário, UTF-8) de `origem` em streaming, valida e, sem erros,
+    substitui o catálogo de forma atômica. `validar_apenas` só valida.
+    Devolve o estado final: ok, linhas, importadas, ativas, erros (até
+    MAX_ERROS), total_erros e a duração.
+    """
+    estado: Dict[str, Any] = {
+        "id": uuid.uuid4().hex[:12], "fase": "lendo", "ok": None, "validar_apenas": validar_apenas,
+        "linhas": 0, "importadas": 0, "ativas": 0, "total_erros": 0, "erros": [],
+        "bytes": 0, "total_bytes": total_bytes, "inicio": time.time(), "segundos": None,
+    }
+    _registrar(estado)
+    contador = _Contador(origem)
+    t0 = time.perf_counter()
+
+    def avisar(fase: Optional[str] = None):
+        with _lock:
+            if fase:
+                estado["fase"] = fase
+            estado["bytes"] = contador.lidos
+            estado["segundos"] = round(time.perf_counter() - t0, 3)
+            copia = dict(estado, erros=list(estado["erros"]))
+        if progresso:
+            progresso(copia)
+
+    def erro(linha: int, mensagem: str):
+        with _lock:
+            estado["total_erros"] += 1
+            if len(estado["erros"]) < MAX_ERROS:
+                estado["erros"].append({"linha": linha, "erro": mensagem})
+
+    if validar_apenas:
+        destino = nullcontext(lambda linhas: None)
+    else:
+        destino = _destino_sqlite() if usar_sqlite() else _destino_arquivo()
+    ids, linhas_ids, skus, linhas_skus = array("q"), array("i"), array("q"), array("i")
+    try:
+        with destino as gravar:
+            texto_origem = io.TextIOWrapper(io.BufferedReader(contador, _BLOCO), encoding="utf-8-sig", newline="")
+            cabecalho = texto_origem.readline()
+            separador = _separador(cabecalho)
+            header = next(csv.reader([cabecalho], delimiter=separador), [])
+            indices = dict(zip(_BRUTO.Record._fields, _BRUTO.indices(header)))
+            ausentes = [_APELIDOS[campo][0] for campo in OBRIGATORIAS if indices[campo] is None]
+            if ausentes:
+                erro(1, f"Colunas obrigatórias ausentes: {', '.join(ausentes)}")
+                raise _Rejeitada()
+            parse = _BRUTO.compilar(header)
+            reader = csv.reader(texto_origem, delimiter=separador)
+            lote: List[Tuple[str, ...]] = []
+            n = 0
+            try:
+                for row in reader:
+                    if not row or not any(row):
+                        continue
+                    numero = reader.line_num + 1  # + cabeçalho
+                    n += 1
+                    linha = parse(row)
+                    erros = _validar(linha)
+                    for mensagem in erros:
+                        erro(numero, mensagem)
+                    if not erros:
+                        ids.append(int(linha.id))
+                        linhas_ids.append(numero)
+                        if linha.sku:
+                            skus.append(_hash_sku(linha.sku))
+                            linhas_skus.append(numero)
+                        estado["importadas"] += 1
+                        estado["ativas"] += linha.ativo == "1"
+                        lote.append(linha)
+                        if len(lote) >= _LOTE:
+                            if not estado["total_erros"]:
+                                gravar(lote)
+                            lote = []
+                    if n % _PASSO_PROGRESSO == 0:
+                        estado["linhas"] = n
+                        avisar()
+            except UnicodeDecodeError:
+                erro(reader.line_num + 2, "Arquivo não está em UTF-8")
+            except csv.Error as exc:
+                erro(reader.line_num + 1, f"CSV malformado: {exc}")
+            estado["linhas"] = n
+
+            avisar("verificando")
+            for chave, repetidas in _duplicadas(ids, linhas_ids):
+                erro(repetidas[1], f"ID {chave} repetido (linhas {', '.join(map(str, repetidas))})")
+            for _, repetidas in _duplicadas(skus, linhas_skus):
+                erro(repetidas[1], f"SKU repetido (linhas {', '.join(map(str, repetidas))})")
+            if estado["total_erros"]:
+                raise _Rejeitada()
+            if not validar_apenas:
+                avisar("gravando")
+                gravar(lote)
+    except _Rejeitada:
+        pass
+    with _lock:
+        estado["ok"] = not estado["total_erros"]
+        if estado["ok"] and not validar_apenas:
+            estado["arquivo"] = "sqlite" if usar_sqlite() else str(brindes_repository.DATA_FILE)
+    avisar("concluida" if estado["ok"] else "rejeitada")
+    with _lock:
+        return dict(estado, erros=list(estado["erros"]))
+
+def importar_arquivo(caminho, validar_apenas: bool = False,
+                     progresso: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    caminho = Path(caminho)
+    with open(caminho, "rb") as f:
+        return importar(f, total_bytes=caminho.stat().st_size, validar_apenas=validar_apenas, progresso=progresso)
@@ -1,13 +1,83 @@
-from typing import Dict, Any, List
-from Modules.Movimentacoes.movimentacoes_repository import load_movs
+from typing import Dict, Any, List, Iterable, Optional, Tuple
+from Modules.Movimentacoes import estoque_compartilhado
+from Modules.Movimentacoes.movimentacoes_repository import iter_records, EVENT_TYPE
+
+def tabela_movimentos(movs: Optional[Iterable[Any]] = None,
+                      deltas: Optional[Dict[int, int]] = None,
+                      estado: Optional[Dict[int, Tuple[int, int, str]]] = None,
+                      pendentes: Optional[Dict[int, int]] = None) -> Dict[int, int]:
+    """
+    Lê o log de movimentações (registros MOV_SCHEMA) uma única vez e acumula, por variante,
+    o saldo líquido das movimentações confirmadas (IN soma, OUT subtrai).
+    Retorna {variant_id: delta}; variantes sem movimentação não aparecem.
+
+    Eventos de status (TYPE=STATUS) ajustam a movimentação original, por isso
+    guardamos em `estado` {mov_id: (variant_id, qtd_com_sinal, status)}.
+    Se `deltas`/`estado` forem informados, o fold continua a partir deles (modo incremental).
+    Se `pendentes` for informado, acumula nele {variant_id: qtd} das saídas (OUT)
+    ainda em 'processing', que já comprometem o estoque disponível.
+    """
+    if movs is None:
+        movs = iter_records()
+    if deltas is None:
+        deltas = {}
+    if estado is None:
+        estado = {}
+    for m in movs:
+        if m.TYPE == EVENT_TYPE:
+            anterior = estado.get(m.MOV_ID)
+            if not anterior:
+                continue
+            vid, qtd, status = anterior
+            estado[m.MOV_ID] = (vid, qtd, m.STATUS)
+        elif m.TYPE in ("IN", "OUT"):
+            vid = m.VARIANT_ID
+            qtd = m.QTD if m.TYPE == "IN" else -m.QTD
+            status = None
+            estado[m.MOV_ID] = (vid, qtd, m.STATUS)
+        else:
+            continue
+        # considerar apenas confirmed
+        if status == "confirmed":
+            deltas[vid] = deltas.get(vid, 0) - qtd
+        if m.STATUS == "confirmed":
+            deltas[vid] = deltas.get(vid, 0) + qtd
+        if pendentes is not None and qtd < 0:
+            if status == "processing":
+                pendentes[vid] = pendentes.get(vid, 0) + qtd
+            if m.STATUS == "processing":
+                pendentes[vid] = pendentes.get(vid, 0) - qtd
+    return deltas
+
+def stock_for(variant_ids: Iterable[int], stock_initial: Dict[int, int],
+              deltas: Optional[Dict[int, int]] = None) -> Dict[int, int]:
+    """
+    Consulta em lote: {variant_id: estoque_atual} para os ids pedidos.
+    `stock_initial` traz o estoque inicial de cada variante (do catálogo).
+    Sem `deltas`, lê só os slots pedidos dos contadores compartilhados (ou o log inteiro, se desligados).
+    """
+    variant_ids = list(variant_ids)
+    if deltas is None and estoque_compartilhado.ativo():
+        contadores = estoque_compartilhado.ler(variant_ids)
+        if contadores is not None:
+            deltas = {vid: conf for vid, (conf, _) in contadores.items()}
+    if deltas is None:
+        deltas = tabela_movimentos()
+    return {vid: max(stock_initial.get(vid, 0) + deltas.get(vid, 0), 0) for vid in variant_ids}
+
+def disponivel_for(variant_ids: Iterable[int], stock_initial: Dict[int, int],
+                   deltas: Dict[int, int], pendentes: Dict[int, int]) -> Dict[int, int]:
+    """
+    {variant_id: estoque disponível}: o estoque atual menos as saídas ainda em
+    'processing' (reservas), que já estão comprometidas. É o que criar_resgate confere.
+    """
+    return {vid: max(stock_initial.get(vid, 0) + deltas.get(vid, 0) - pendentes.get(vid, 0), 0)
+            for vid in variant_ids}
 
 def estoque_atual_por_variacao(variant_id: int, stock_initial: int) -> int:
-    movs = load_movs()
-    # considerar apenas confirmed
-    outs = sum(m["QTD"] for m in movs if m["VARIANT_ID"] == variant_id and m["TYPE"] == "OUT" and m["STATUS"] == "confirmed")
-    ins = sum(m["QTD"] for m in movs if m["VARIANT_ID"] == variant_id and m["TYPE"] == "IN" and m["STATUS"] == "confirmed")
-    return max(stock_initial - outs + ins, 0)
+    return stock_for([variant_id], {variant_id: stock_initial})[variant_id]
 
 def estoque_atual_map(brindes: List[Dict[str, Any]]) -> Dict[int, int]:
-    # retorna {variant_id: stock_current}
-    return {b["id"]: estoque_atual_por_variacao(b["id"], b["stockInitial"]) for b in brindes}
+    # retorna {variant_id: stock_current} com uma única leitura do log
+    iniciais = {b["id"]: b["stockInitial"] for b in brindes}
+    return stock_for(iniciais.keys(), iniciais)
@@ -0,0 +1,141 @@
+# Modules/Brindes/produtos_view.py
+"""
+Visão pré-calculada de /api/brindes/produtos (produtos agrupados por product_id).
+
+- Os grupos (nome base, tamanhos, custo mínimo, variantes) só são refeitos
+  quando o catálogo muda.
+- Mudanças de estoque atualizam apenas o `stock`/`stockAvailable` e as
+  variantes dos grupos afetados, e só o JSON desses grupos é serializado de novo.
+  `stockAvailable` desconta as reservas em 'processing' (o que criar_resgate confere).
+- O corpo da resposta fica pronto em bytes, com ETag (hash do conteúdo) para
+  responder 304 quando nada mudou.
+"""
+import hashlib
+import json
+import threading
+from typing import Any, Dict, List, Tuple
+
+from Modules.Shared.metricas import span
+from .brindes_cache import snapshot, alteracoes_desde
+
+_lock = threading.Lock()
+
+_view: Dict[str, Any] = {
+    "catalogo": None,      # versão do catálogo usada
+    "estoque": None,       # versão do estoque usada
+    "ordem": [],           # product_ids na ordem do catálogo
+    "grupos": {},          # product_id -> grupo (formato da API)
+    "por_variante": {},    # variant_id -> (product_id, variante, stockInitial)
+    "fragmentos": {},      # product_id -> JSON (bytes) do grupo
+    "body": b"[]",
+    "etag": "",
+}
+
+def _dumps(obj: Any) -> bytes:
+    # mesmo formato compacto/ordenado do jsonify
+    return json.dumps(obj, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+def _stock(stock_initial: int, variant_id: int, deltas: Dict[int, int], pendentes: Dict[int, int]) -> Tuple[int, int]:
+    # (estoque atual, estoque disponível)
+    atual = stock_initial + deltas.get(variant_id, 0)
+    return max(atual, 0), max(atual - pendentes.get(variant_id, 0), 0)
+
+def _reconstruir(catalogo: List[Dict[str, Any]], deltas: Dict[int, int], pendentes: Dict[int, int]):
+    # agrupa por product_id para uso do frontend (card + sizes)
+    grupos: Dict[int, Dict[str, Any]] = {}
+    por_variante: Dict[int, Tuple[int, Dict[str, Any], int]] = {}
+    for it in catalogo:
+        pid = it["product_id"]
+        if pid not in grupos:
+            grupos[pid] = {
+                "product_id": pid,
+                "name": it["name"].replace(" - P","").replace(" - M","").replace(" - G","").replace(" - GG","").strip(),
+                "description": it["description"],
+                "details": it["details"],
+                "category": it["category"],
+                "imageUrl": it["imageUrl"],
+                "variants": [],
+            }
+        atual, disponivel = _stock(it["stockInitial"], it["id"], deltas, pendentes)
+        variante = {
+            "id": it["id"],
+            "sku": it["sku"],
+            "size": it["size"],
+            "pointsCost": it["pointsCost"],
+            "stockCurrent": atual,
+            "stockAvailable": disponivel,
+            "imageUrl": it["imageUrl"],
+        }
+        grupos[pid]["variants"].append(variante)
+        por_variante[it["id"]] = (pid, variante, it["stockInitial"])
+        # fallbacks básicos
+        if not grupos[pid]["imageUrl"] and it["imageUrl"]:
+            grupos[pid]["imageUrl"] = it["imageUrl"]
+
+    # calcular campos derivados: sizes, pointsCost (mínimo), stock e stockAvailable (somas)
+    for pid, g in grupos.items():
+        sizes = sorted(list({v["size"] for v in g["variants"] if v["size"]}))
+        min_cost = min([v["pointsCost"] for v in g["variants"] if isinstance(v["pointsCost"], int)], default=0)
+        grupos[pid] = {
+            "product_id": g["product_id"],
+            "name": g["name"],
+            "description": g["description"],
+            "details": g["details"],
+            "category": g["category"],
+            "imageUrl": g["imageUrl"],
+            "pointsCost": min_cost,
+            "stock": sum(v["stockCurrent"] for v in g["variants"]),
+            "stockAvailable": sum(v["stockAvailable"] for v in g["variants"]),
+            "sizes": sizes if sizes else None,
+            "variants": g["variants"],
+        }
+
+    _view["ordem"] = list(grupos.keys())
+    _view["grupos"] = grupos
+    _view["por_variante"] = por_variante
+    _view["fragmentos"] = {pid: _dumps(g) for pid, g in grupos.items()}
+
+def _aplicar_estoque(alteradas, deltas: Dict[int, int], pendentes: Dict[int, int]) -> bool:
+    # atualiza só as variantes/grupos cujo estoque mudou; True se algo mudou
+    if alteradas is None:
+        alteradas = _view["por_variante"].keys()
+    afetados = set()
+    for vid in alteradas:
+        entrada = _view["por_variante"].get(vid)
+        if not entrada:
+            continue
+        pid, variante, stock_initial = entrada
+        atual, disponivel = _stock(stock_initial, vid, deltas, pendentes)
+        if (atual, disponivel) != (variante["stockCurrent"], variante["stockAvailable"]):
+            variante["stockCurrent"] = atual
+            variante["stockAvailable"] = disponivel
+            afetados.add(pid)
+    for pid in afetados:
+        g = _view["grupos"][pid]
+        g["stock"] = sum(v["stockCurrent"] for v in g["variants"])
+        g["stockAvailable"] = sum(v["stockAvailable"] for v in g["variants"])
+        _view["fragmentos"][pid] = _dumps(g)
+    return bool(afetados)
+
+def _montar_body():
+    fragmentos = _view["fragmentos"]
+    _view["body"] = b"[" + b",".join(fragmentos[pid] for pid in _view["ordem"]) + b"]\n"
+    _view["etag"] = hashlib.blake2b(_view["body"], digest_size=16).hexdigest()
+
+def produtos_json() -> Tuple[bytes, str]:
+    """
+    (corpo JSON pronto, etag) de /api/brindes/produtos.
+    """
+    with _lock:
+        catalogo, deltas, pendentes, versao_catalogo, versao_estoque = snapshot()
+        if versao_catalogo != _view["catalogo"]:
+            with span("produtos.serializar"):
+                _reconstruir(catalogo, deltas, pendentes)
+                _montar_body()
+        elif versao_estoque != _view["estoque"]:
+            with span("produtos.serializar"):
+                if _aplicar_estoque(alteracoes_desde(_view["estoque"]), deltas, pendentes):
+                    _montar_body()
+        _view["catalogo"] = versao_catalogo
+        _view["estoque"] = versao_estoque
+        return _view["body"], _view["etag"]
@@ -0,0 +1,351 @@
+# Modules/Movimentacoes/estoque_compartilhado.py
+"""
+Contadores de estoque compartilhados entre processos (workers do gunicorn).
+
+Arquivo ao lado do log (Data_Movimentation.estoque), mapeado com mmap:
+- cabeçalho de 16 int64: formato, seq (seqlock), versão, assinatura do log
+  (inode, tamanho, mtime_ns) que os contadores refletem, capacidade, geração
+  e posição do diário, e se algum variant_id passou de ESTOQUE_SLOTS_MAX;
+- diário: anel com os variant_id tocados pelas últimas gravações, para quem
+  mantém a tabela inteira (brindes_cache) ler só os slots que mudaram;
+- depois, um par de int64 por variant_id (slot fixo, indexado pelo id):
+  delta confirmado (IN soma, OUT subtrai) e saídas pendentes ('processing').
+
+Ids a partir de ESTOQUE_SLOTS_MAX (o importador aceita ids enormes) não
+ganham slot: o arquivo não cresce até eles. Enquanto o log tiver
+movimentações desses ids, a tabela inteira e a leitura deles vêm do log.
+
+Quem grava no log (movimentacoes_repository, já com lock_log) aplica o efeito
+da gravação nos slots e carimba a assinatura nova do log, entre os dois
+incrementos do seq. Leitores não tocam no log: comparam a assinatura do
+cabeçalho com um stat do arquivo e leem os slots, repetindo se o seq mudou
+no meio (ou está ímpar: gravação em andamento).
+
+Se o log mudou sem passar por aqui (arquivo trocado, editado à mão,
+gravação interrompida), a assinatura não confere e os contadores são
+refeitos do log inteiro, com a trava: pelo próximo que gravar ou por um
+leitor que a encontre livre. O leitor nunca espera a trava (quem a segura pode
+estar esperando um cache que o leitor já travou); se ela não vaga em
+_ESPERA_MAX, a leitura devolve None e quem chamou lê do log, como antes.
+
+Uma falha ao atualizar os contadores (disco cheio, por exemplo) não
+desfaz a gravação no log: os contadores ficam marcados como desatualizados,
+e quem ler depois os refaz ou, se não conseguir, lê do log.
+
+ESTOQUE_COMPARTILHADO=0 desliga; não se aplica ao backend SQLite (lá o
+estoque já vem de estoque_variante).
+"""
+import mmap
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from Modules.Shared.db_connection import usar_sqlite
+
+ESTOQUE_COMPARTILHADO = os.environ.get("ESTOQUE_COMPARTILHADO", "1") != "0"
+# maior número de slots (16 bytes cada): ids a partir daqui ficam de fora do arquivo
+ESTOQUE_SLOTS_MAX = int(os.environ.get("ESTOQUE_SLOTS_MAX", str(1 << 20)))
+
+FORMATO = 0x53494D50_45535432  # "SIMPEST2"
+_CABECALHO = 16  # int64
+(_H_FORMATO, _H_SEQ, _H_VERSAO, _H_INO, _H_TAMANHO, _H_MTIME, _H_CAPACIDADE,
+ _H_GERACAO, _H_DIARIO, _H_EXCEDIDO) = range(10)
+_DIARIO = 4096  # entradas (int64) do anel de variantes tocadas
+_BYTES_INICIO = (_CABECALHO + _DIARIO) * 8
+_CAPACIDADE_MINIMA = 1024
+
+# leituras com o seq instável antes de desconfiar de uma gravação interrompida
+_TENTATIVAS = 10000
+# espera (s) por quem está gravando (ou refazendo os contadores) antes de desistir deles
+_ESPERA_MAX = 5.0
+
+_lock = threading.Lock()
+_mapa: Dict[str, Any] = {"arquivo": None, "fd": None, "mm": None, "cab": None, "diario": None, "slots": None,
+                         "capacidade": 0}
+_stats: Dict[str, Any] = {"leituras": 0, "releituras": 0, "aplicacoes": 0, "reconstrucoes": 0, "desistencias": 0,
+                          "fora_dos_slots": 0, "falhas": 0, "ultimo_erro": None}
+
+def ativo() -> bool:
+    return ESTOQUE_COMPARTILHADO and not usar_sqlite()
+
+def _repo():
+    # importado aqui: o repositório também importa este módulo
+    from Modules.Movimentacoes import movimentacoes_repository
+    return movimentacoes_repository
+
+def efeito(tipo: str, qtd: int, status: str) -> Tuple[int, int]:
+    # (delta confirmado, pendente) de uma movimentação; mesmas regras de estoque_service.tabela_movimentos
+    if tipo not in ("IN", "OUT"):
+        return 0, 0
+    sinal = qtd if tipo == "IN" else -qtd
+    return (sinal if status == "confirmed" else 0), (qtd if tipo == "OUT" and status == "processing" else 0)
+
+def inclusao(mov: Dict[str, Any]) -> Tuple[int, int, int]:
+    # (variant_id, delta confirmado, delta pendente) de uma movimentação nova
+    return (mov["VARIANT_ID"], *efeito(mov["TYPE"], mov["QTD"], mov["STATUS"]))
+
+def transicao(mov: Dict[str, Any], status_novo: str) -> Tuple[int, int, int]:
+    # (variant_id, delta confirmado, delta pendente) da mudança de status de uma movimentação
+    conf_antes, pend_antes = efeito(mov["TYPE"], mov["QTD"], mov["STATUS"])
+    conf, pend = efeito(mov["TYPE"], mov["QTD"], status_novo)
+    return mov["VARIANT_ID"], conf - conf_antes, pend - pend_antes
+
+def assinatura_log() -> Tuple[int, int, int]:
+    try:
+        st = os.stat(_repo().MOV_FILE)
+    except FileNotFoundError:
+        return (0, 0, 0)
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+# ---------------------------------------------------------------------------
+# mapeamento
+# ---------------------------------------------------------------------------
+
+def _arquivo():
+    return _repo().MOV_FILE.with_suffix(".estoque")
+
+def _mapear(fd: int, tamanho: int):
+    mm = mmap.mmap(fd, tamanho)
+    cab = np.frombuffer(mm, dtype=np.int64, count=_CABECALHO)
+    if tamanho < _BYTES_INICIO:  # formato antigo: só o cabeçalho é conferido
+        _mapa.update({"mm": mm, "cab": cab, "diario": None, "slots": None, "capacidade": 0})
+        return
+    diario = np.frombuffer(mm, dtype=np.int64, count=_DIARIO, offset=_CABECALHO * 8)
+    slots = np.frombuffer(mm, dtype=np.int64, offset=_BYTES_INICIO).reshape(-1, 2)
+    _mapa.update({"mm": mm, "cab": cab, "diario": diario, "slots": slots, "capacidade": len(slots)})
+
+def _criar(path, substituir: bool = False):
+    # arquivo novo só com cabeçalho e diário; os.link não sobrescreve o de outro processo
+    cab = np.zeros(_CABECALHO, dtype=np.int64)
+    cab[_H_FORMATO] = FORMATO
+    cab[_H_VERSAO] = cab[_H_GERACAO] = time.time_ns()  # não se repetem se o arquivo for recriado
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(cab.tobytes() + bytes(_DIARIO * 8))
+        f.flush()
+        os.fsync(f.fileno())
+    if substituir:
+        os.replace(tmp, path)
+        return
+    try:
+        os.link(tmp, path)
+    except FileExistsError:
+        pass
+    finally:
+        os.unlink(tmp)
+
+def _fechar():
+    if _mapa["fd"] is not None:
+        os.close(_mapa["fd"])
+    _mapa.update({"arquivo": None, "fd": None, "mm": None, "cab": None, "diario": None, "slots": None,
+                  "capacidade": 0})
+
+def _abrir():
+    # (re)abre o arquivo se o log mudou de lugar, e remapeia se outro processo aumentou a capacidade
+    path = _arquivo()
+    if _mapa["arquivo"] != path:
+        _fechar()
+        if not path.exists():
+            _criar(path)
+        fd = os.open(path, os.O_RDWR)
+        _mapa.update({"arquivo": path, "fd": fd})
+        _mapear(fd, os.fstat(fd).st_size)
+        if int(_mapa["cab"][_H_FORMATO]) != FORMATO:
+            # arquivo de uma versão anterior (ex.: slots até o maior id, sem limite): começa outro
+            _fechar()
+            _criar(path, substituir=True)
+            return _abrir()
+    elif int(_mapa["cab"][_H_CAPACIDADE]) > _mapa["capacidade"]:
+        _mapear(_mapa["fd"], os.fstat(_mapa["fd"]).st_size)
+
+def _garantir_capacidade(variant_id: int):
+    # só quem grava (com lock_log): aumenta o arquivo antes de publicar a capacidade nova
+    if variant_id < _mapa["capacidade"]:
+        return
+    capacidade = min(max(variant_id + 1, _mapa["capacidade"] * 2, _CAPACIDADE_MINIMA), ESTOQUE_SLOTS_MAX)
+    os.ftruncate(_mapa["fd"], _BYTES_INICIO + capacidade * 16)
+    _mapear(_mapa["fd"], _BYTES_INICIO + capacidade * 16)
+    _mapa["cab"][_H_CAPACIDADE] = capacidade
+
+# ---------------------------------------------------------------------------
+# gravação (sempre com lock_log)
+# ---------------------------------------------------------------------------
+
+def _gravar(efeitos: Iterable[Tuple[int, int, int]], zerar: bool = False):
+    efeitos = [(vid, conf, pend) for vid, conf, pend in efeitos if vid >= 0 and (conf or pend or zerar)]
+    fora = [vid for vid, _, _ in efeitos if vid >= ESTOQUE_SLOTS_MAX]
+    if fora:
+        efeitos = [e for e in efeitos if e[0] < ESTOQUE_SLOTS_MAX]
+        _stats["fora_dos_slots"] += len(fora)
+    _garantir_capacidade(max((vid for vid, _, _ in efeitos), default=0))
+    cab, diario, slots = _mapa["cab"], _mapa["diario"], _mapa["slots"]
+    cab[_H_SEQ] |= 1  # ímpar: leitores esperam (já ímpar se uma gravação anterior foi interrompida)
+    try:
+        if zerar:
+            slots[:] = 0
+            cab[_H_EXCEDIDO] = 0
+            cab[_H_GERACAO] += 1  # quem acompanha o diário relê tudo
+        if fora:
+            cab[_H_EXCEDIDO] = 1
+        pos = int(cab[_H_DIARIO])
+        for vid, conf, pend in efeitos:
+            slots[vid, 0] += conf
+            slots[vid, 1] += pend
+            if not zerar:
+                diario[pos % _DIARIO] = vid
+                pos += 1
+        cab[_H_DIARIO] = pos
+        cab[_H_INO], cab[_H_TAMANHO], cab[_H_MTIME] = assinatura_log()
+        cab[_H_VERSAO] += 1
+    finally:
+        cab[_H_SEQ] += 1
+
+def _falhou(exc: Exception):
+    # contadores possivelmente pela metade: assinatura que não confere com log nenhum
+    _stats["falhas"] += 1
+    _stats["ultimo_erro"] = f"{type(exc).__name__}: {exc}"
+    try:
+        if _mapa["cab"] is not None:
+            _mapa["cab"][_H_INO] = -1
+    except Exception:
+        _fechar()
+
+def aplicar(efeitos: Iterable[Tuple[int, int, int]], antes: Tuple[int, int, int]):
+    """
+    Chamado por quem acabou de gravar no log, ainda com lock_log: soma os
+    efeitos [(variant_id, delta confirmado, delta pendente)] e carimba a
+    assinatura atual do log. `antes` é a assinatura do log antes da gravação;
+    se os contadores não estavam em dia com ela, são refeitos do log inteiro.
+    """
+    if not ativo():
+        return
+    with _lock:
+        try:
+            _abrir()
+            cab = _mapa["cab"]
+            if (int(cab[_H_INO]), int(cab[_H_TAMANHO]), int(cab[_H_MTIME])) != tuple(antes) or cab[_H_SEQ] % 2:
+                _reconstruir()
+                return
+            _gravar(efeitos)
+            _stats["aplicacoes"] += 1
+        except Exception as exc:  # o log já foi gravado: a falha não pode virar erro do resgate
+            _falhou(exc)
+
+def _reconstruir():
+    # soma os efeitos do log inteiro (status final de cada movimentação); com lock_log
+    totais: Dict[int, List[int]] = {}
+    for m in _repo().load_movs():
+        conf, pend = efeito(m["TYPE"], m["QTD"], m["STATUS"])
+        if conf or pend:
+            t = totais.setdefault(m["VARIANT_ID"], [0, 0])
+            t[0] += conf
+            t[1] += pend
+    _gravar(((vid, conf, pend) for vid, (conf, pend) in totais.items()), zerar=True)
+    _stats["reconstrucoes"] += 1
+
+def _em_dia() -> bool:
+    cab = _mapa["cab"]
+    return not cab[_H_SEQ] % 2 and (int(cab[_H_INO]), int(cab[_H_TAMANHO]), int(cab[_H_MTIME])) == assinatura_log()
+
+def sincronizar(forcar: bool = False) -> bool:
+    """
+    Garante que os contadores refletem o log atual. Se não refletem, espera
+    quem está gravando terminar ou, com a trava livre, refaz do log.
+    False se a trava não vagou a tempo: leia do log.
+    """
+    repo = _repo()
+    limite = time.monotonic() + _ESPERA_MAX
+    while True:
+        if not forcar:
+            with _lock:
+                _abrir()
+                if _em_dia():
+                    return True
+        repo.ensure_file()
+        with repo.lock_log(esperar=False) as travado:
+            if travado:
+                with _lock:
+                    _abrir()
+                    if forcar or not _em_dia():
+                        _reconstruir()
+                return True
+        if time.monotonic() > limite:
+            _stats["desistencias"] += 1
+            return False
+        time.sleep(0.001)
+
+# ---------------------------------------------------------------------------
+# leitura
+# ---------------------------------------------------------------------------
+
+def _sincronizar(forcar: bool = False) -> bool:
+    try:
+        return sincronizar(forcar)
+    except Exception as exc:  # sem contadores (ex.: não deu para refazê-los): quem chamou lê do log
+        with _lock:
+            _falhou(exc)
+        return False
+
+def _ler_consistente(ler):
+    # executa `ler()` sem gravação concorrente (seqlock); None se os contadores não estão em dia
+    if not _sincronizar():
+        return None
+    for _ in range(_TENTATIVAS):
+        with _lock:
+            _abrir()
+            cab = _mapa["cab"]
+            seq = int(cab[_H_SEQ])
+            if not seq % 2:
+                resultado = ler()
+                if int(cab[_H_SEQ]) == seq:
+                    _stats["leituras"] += 1
+                    return resultado
+        _stats["releituras"] += 1
+        time.sleep(0)
+    # seq preso: gravação interrompida no meio
+    return _ler_consistente(ler) if _sincronizar(forcar=True) else None
+
+def ler(variant_ids: Iterable[int]) -> Optional[Dict[int, Tuple[int, int]]]:
+    """
+    {variant_id: (delta confirmado, pendente)} lidos direto dos slots, em O(ids).
+    None se algum id pedido está fora dos slots e tem movimentação (leia do log).
+    """
+    ids = [vid for vid in variant_ids if vid >= 0]
+    grandes = any(vid >= ESTOQUE_SLOTS_MAX for vid in ids)
+
+    def _ler():
+        slots, cap = _mapa["slots"], _mapa["capacidade"]
+        if grandes and _mapa["cab"][_H_EXCEDIDO]:
+            return None
+        return {vid: ((int(slots[vid, 0]), int(slots[vid, 1])) if vid < cap else (0, 0)) for vid in ids}
+    return _ler_consistente(_ler)
+
+def ler_desde(cursor: Optional[Tuple[int, int]]):
+    """
+    Para quem mantém a tabela inteira: (cursor novo, {variant_id: (confirmado, pendente)},
+    completo). Com o cursor da leitura anterior, traz só as variantes tocadas
+    desde então (pelo diário); sem cursor, se o diário já deu a volta ou se os
+    contadores foram refeitos, traz todas as variantes com contador não nulo
+    (completo=True: descarte a tabela anterior). None se os contadores não servem
+    para a tabela inteira (fora do ar, ou com ids fora dos slots): leia do log.
+    """
+    def _ler():
+        cab, diario, slots = _mapa["cab"], _mapa["diario"], _mapa["slots"]
+        if cab[_H_EXCEDIDO]:
+            return None
+        geracao, pos = int(cab[_H_GERACAO]), int(cab[_H_DIARIO])
+        completo = cursor is None or cursor[0] != geracao or not 0 <= pos - cursor[1] <= _DIARIO
+        if completo:
+            ids = np.flatnonzero(slots.any(axis=1))
+        else:
+            ids = np.unique(diario[np.arange(cursor[1], pos) % _DIARIO])
+        return (geracao, pos), dict(zip(ids.tolist(), map(tuple, slots[ids].tolist()))), completo
+    return _ler_consistente(_ler)
+
+def contadores_stats() -> Dict[str, Any]:
+    with _lock:
+        return {**_stats, "ativo": ativo(), "capacidade": _mapa["capacidade"],
+                "arquivo": str(_mapa["arquivo"]) if _mapa["arquivo"] else None}
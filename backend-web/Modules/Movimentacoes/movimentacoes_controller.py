@@ -1,9 +1,21 @@
 from flask import Blueprint, request, jsonify
-from .movimentacoes_service import criar_resgate, confirmar_resgate, validar_estoque
-from typing import Any, Dict
+from Modules.Auth.auth_middleware import require_auth
+from .movimentacoes_service import criar_resgate, confirmar_resgate, atualizar_status_lote, MAX_LOTE
+from typing import Any, Dict, List, Optional, Tuple
 
 movs_bp = Blueprint("movimentacoes", __name__)
 
+def itens_status_lote(body: Dict[str, Any]) -> Tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+    # itens de /status-lote (na forma items ou movIds + status); (None, erro) se inválidos
+    items = body.get("items")
+    if items is None and isinstance(body.get("movIds"), list):
+        items = [{"movId": mov_id, "status": body.get("status")} for mov_id in body["movIds"]]
+    if not isinstance(items, list) or not items or not all(isinstance(it, dict) for it in items):
+        return None, "items (ou movIds e status) são obrigatórios"
+    if len(items) > MAX_LOTE:
+        return None, f"Máximo de {MAX_LOTE} movimentações por lote"
+    return items, None
+
 @movs_bp.route("/api/movimentacoes/resgate", methods=["POST"])
 def api_criar_resgate():
     """
@@ -22,10 +34,7 @@ def api_criar_resgate():
     if user_id <= 0 or not items:
         return jsonify({"ok": False, "error": "userId e items são obrigatórios"}), 400
 
-    # opcional: validação extra rápida
-    if not validar_estoque(items):
-        return jsonify({"ok": False, "error": "Estoque insuficiente ou custo inválido"}), 400
-
+    # a validação de estoque acontece dentro da transação de criar_resgate
     res = criar_resgate(user_id, items, total_points)
     if not res.get("ok"):
         return jsonify(res), 400
@@ -45,3 +54,22 @@ def api_confirmar_resgate():
     if not res.get("ok"):
         return jsonify(res), 400
     return jsonify(res), 200
+
+@movs_bp.route("/api/movimentacoes/status-lote", methods=["POST"])
+@require_auth
+def api_status_lote():
+    """
+    Body esperado:
+    {
+      "items": [{ "movId": 1, "status": "confirmed" }, { "movId": 2, "status": "canceled" }, ...]
+    }
+    ou, com o mesmo status para todos: { "movIds": [1, 2, 3], "status": "confirmed" }
+    Responde com um resultado por movId, na ordem recebida. Só para admin.
+    """
+    if request.user["role"] != "admin":
+        return jsonify({"message": "Forbidden"}), 403
+    body: Dict[str, Any] = request.get_json() or {}
+    items, erro = itens_status_lote(body)
+    if erro:
+        return jsonify({"ok": False, "error": erro}), 400
+    return jsonify(atualizar_status_lote(items)), 200
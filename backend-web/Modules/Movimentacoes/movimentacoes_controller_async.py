@@ -0,0 +1,43 @@
+# Modules/Movimentacoes/movimentacoes_controller_async.py
+# rotas de movimentações do modo async (asgi.py): as gravações rodam no pool, sem single-flight
+from typing import Any, Dict
+from Modules.Auth.auth_middleware import require_auth_async
+from Modules.Shared.assincrono import Requisicao, Resposta, Rotas, em_thread, json_resposta
+from .movimentacoes_controller import itens_status_lote
+from .movimentacoes_service import criar_resgate, confirmar_resgate, atualizar_status_lote
+
+movs_async = Rotas("movimentacoes")
+
+@movs_async.rota("/api/movimentacoes/resgate", methods=["POST"])
+async def api_criar_resgate(req: Requisicao) -> Resposta:
+    body: Dict[str, Any] = req.json() or {}
+    user_id = int(body.get("userId") or 0)
+    items = body.get("items") or []
+    total_points = int(body.get("totalPoints") or 0)
+
+    if user_id <= 0 or not items:
+        return json_resposta({"ok": False, "error": "userId e items são obrigatórios"}, 400)
+
+    res = await em_thread(criar_resgate, user_id, items, total_points)
+    return json_resposta(res, 201 if res.get("ok") else 400)
+
+@movs_async.rota("/api/movimentacoes/confirmar", methods=["POST"])
+async def api_confirmar_resgate(req: Requisicao) -> Resposta:
+    body: Dict[str, Any] = req.json() or {}
+    mov_id = int(body.get("movId") or 0)
+    if mov_id <= 0:
+        return json_resposta({"ok": False, "error": "movId inválido"}, 400)
+
+    res = await em_thread(confirmar_resgate, mov_id)
+    return json_resposta(res, 200 if res.get("ok") else 400)
+
+@movs_async.rota("/api/movimentacoes/status-lote", methods=["POST"])
+@require_auth_async
+async def api_status_lote(req: Requisicao) -> Resposta:
+    if req.user["role"] != "admin":
+        return json_resposta({"message": "Forbidden"}, 403)
+    body: Dict[str, Any] = req.json() or {}
+    items, erro = itens_status_lote(body)
+    if erro:
+        return json_resposta({"ok": False, "error": erro}, 400)
+    return json_resposta(await em_thread(atualizar_status_lote, items))
@@ -1,73 +1,633 @@
 import csv
+import io
+import os
+import threading
 import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+from Modules.Shared.record_loader import Schema, iter_arquivo, ler_desde, ler_linha, texto, inteiro
+from Modules.Shared.db_connection import usar_sqlite, get_connection, transacao, versao
+from Modules.Shared.metricas import span, contar_bytes
+from . import estoque_compartilhado
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 MOV_FILE = Path(__file__).resolve().parents[3] / "dados-teste" / "Data_Movimentation.txt"
 
+COLUMNS = ["MOV_ID","USER_ID","VARIANT_ID","PRODUCT_ID","SKU","QTD","POINTS_TOTAL","TYPE","STATUS","CREATED_AT"]
+
+# Modo de gravação do log:
+# - "append": mudanças de status viram linhas de evento (TYPE=STATUS) no fim do arquivo,
+#   com índice lateral MOV_ID -> offset (.idx) e maior id persistido (.hwm).
+# - "rewrite": comportamento antigo, reescreve o arquivo inteiro a cada update_status.
+MOV_LOG_MODE = os.environ.get("MOV_LOG_MODE", "append")
+
+MOV_SCHEMA = Schema("Movimentacao", [
+    ("MOV_ID", ("MOV_ID",), inteiro),
+    ("USER_ID", ("USER_ID",), inteiro),
+    ("VARIANT_ID", ("VARIANT_ID",), inteiro),
+    ("PRODUCT_ID", ("PRODUCT_ID",), inteiro),
+    ("SKU", ("SKU",), texto),
+    ("QTD", ("QTD",), inteiro),
+    ("POINTS_TOTAL", ("POINTS_TOTAL",), inteiro),
+    ("TYPE", ("TYPE",), texto),  # OUT/IN (ou STATUS para eventos)
+    ("STATUS", ("STATUS",), texto),  # processing/confirmed/canceled
+    ("CREATED_AT", ("CREATED_AT",), texto),
+])
+
+# TYPE das linhas de evento de status (não são movimentações de estoque)
+EVENT_TYPE = "STATUS"
+
+_lock = threading.RLock()
+_lock_depth = 0
+
+# backend SQLite: tabela movimentacoes (colunas = MOV_SCHEMA, sem linhas de evento;
+# o status é atualizado no lugar) e estoque_variante mantida por trigger
+_SQL_COLUNAS = ", ".join(MOV_SCHEMA.Record._fields)
+_SQL_TODAS = f"SELECT {_SQL_COLUNAS} FROM movimentacoes ORDER BY MOV_ID"
+_SQL_POR_ID = f"SELECT {_SQL_COLUNAS} FROM movimentacoes WHERE MOV_ID = ?"
+_SQL_POR_IDS = f"SELECT {_SQL_COLUNAS} FROM movimentacoes WHERE MOV_ID IN ({{}})"
+_SQL_INSERIR = (f"INSERT INTO movimentacoes ({_SQL_COLUNAS}) "
+                f"VALUES ({', '.join('?' * len(MOV_SCHEMA.Record._fields))})")
+_SQL_STATUS = "UPDATE movimentacoes SET STATUS = ? WHERE MOV_ID = ?"
+# limite de parâmetros por consulta (SQLITE_MAX_VARIABLE_NUMBER antigo)
+_SQL_LOTE = 900
+_SQL_ESTOQUE = "SELECT variant_id, confirmado, pendente FROM estoque_variante"
+
+# (arquivo, inode) do log cujo cabeçalho já foi conferido contra COLUMNS
+_cabecalho_ok: Dict[str, Any] = {"chave": None}
+
+class LogIncompativel(RuntimeError):
+    # o log tem um cabeçalho diferente de COLUMNS (ex.: o formato antigo de dados-teste)
+    pass
+
+# índice em memória: {mov_id: [offset_da_linha, status_atual]}
+_index: Dict[str, Any] = {"ids": {}, "hwm": 0, "idx_offset": 0, "idx_ino": None, "arquivo": None}
+
+def _lock_file() -> Path:
+    return MOV_FILE.with_suffix(".lock")
+
+def _idx_file() -> Path:
+    return MOV_FILE.with_suffix(".idx")
+
+def _hwm_file() -> Path:
+    return MOV_FILE.with_suffix(".hwm")
+
 def ensure_file():
-    if not MOV_FILE.exists():
-        MOV_FILE.write_text("MOV_ID;USER_ID;VARIANT_ID;PRODUCT_ID;SKU;QTD;POINTS_TOTAL;TYPE;STATUS;CREATED_AT\n", encoding="utf-8")
+    if usar_sqlite() or MOV_FILE.exists():
+        return
+    # cria sob a trava: outro processo pode estar criando/gravando ao mesmo tempo
+    with lock_log():
+        if not MOV_FILE.exists():
+            MOV_FILE.write_text(";".join(COLUMNS) + "\n", encoding="utf-8")
+
+def _cabecalho() -> List[str]:
+    with open(MOV_FILE, "rb") as f:
+        return ler_linha(f.readline().decode("utf-8"))
+
+def _conferir_cabecalho():
+    """
+    Recusa gravar num log cujo cabeçalho não é COLUMNS: as linhas novas seriam
+    lidas de volta pelo cabeçalho antigo, com todos os campos zerados.
+    `python manage.py migrar-log-movimentacoes` converte o arquivo.
+    """
+    st = os.stat(MOV_FILE)
+    chave = (MOV_FILE, st.st_ino)
+    if _cabecalho_ok["chave"] == chave:
+        return
+    cabecalho = _cabecalho()
+    if cabecalho != COLUMNS:
+        raise LogIncompativel(f"{MOV_FILE.name} tem o cabeçalho {';'.join(cabecalho)!r}, esperado "
+                              f"{';'.join(COLUMNS)!r}; rode `python manage.py migrar-log-movimentacoes`")
+    _cabecalho_ok["chave"] = chave
+
+def _row(mov: Dict[str, Any]) -> List[Any]:
+    return [
+        mov["MOV_ID"],
+        mov.get("USER_ID", 0),
+        mov.get("VARIANT_ID", 0),
+        mov.get("PRODUCT_ID", 0),
+        mov.get("SKU", ""),
+        mov.get("QTD", 0),
+        mov.get("POINTS_TOTAL", 0),
+        mov.get("TYPE", "OUT"),
+        mov.get("STATUS", "processing"),
+        mov["CREATED_AT"]
+    ]
+
+def _encode_rows(rows: List[List[Any]]) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf, delimiter=";", lineterminator="\n")
+    writer.writerows(rows)
+    return buf.getvalue().encode("utf-8")
+
+def iter_records() -> Iterator[Any]:
+    """
+    Percorre o arquivo linha a linha, sem montar a lista inteira, devolvendo
+    os registros (MOV_SCHEMA.Record) como gravados: movimentações e eventos
+    de status (TYPE=STATUS). Útil para agregações de passada única (ex.: estoque_service).
+    """
+    if usar_sqlite():
+        return (MOV_SCHEMA.Record(*r) for r in get_connection().execute(_SQL_TODAS))
+    ensure_file()
+    return iter_arquivo(MOV_FILE, MOV_SCHEMA)
+
+def iter_movs() -> Iterator[Dict[str, Any]]:
+    """
+    Movimentações com o status final, numa passada pelo log e sem montar a
+    lista. No modo append o status final vem do índice (.idx), que já tem os
+    eventos aplicados, e as linhas de evento são puladas; no rewrite e no
+    SQLite o status gravado na linha já é o final.
+    """
+    finais: Dict[int, List[Any]] = {}
+    if MOV_LOG_MODE == "append" and not usar_sqlite():
+        with _lock:
+            _refresh_index()
+            finais = _index["ids"]
+    for r in iter_records():
+        if r.TYPE == EVENT_TYPE:
+            continue
+        mov = r._asdict()
+        entry = finais.get(r.MOV_ID)
+        if entry:
+            mov["STATUS"] = entry[1]
+        yield mov
 
 def load_movs() -> List[Dict[str, Any]]:
+    movs: Dict[int, Dict[str, Any]] = {}
+    for r in iter_records():
+        if r.TYPE == EVENT_TYPE:
+            if r.MOV_ID in movs:
+                movs[r.MOV_ID]["STATUS"] = r.STATUS
+        else:
+            movs[r.MOV_ID] = r._asdict()
+    return list(movs.values())
+
+def read_movs_since(offset: int) -> Tuple[List[Any], int]:
+    """
+    Lê apenas as linhas completas gravadas a partir do byte `offset`
+    (0 = início do arquivo, pulando o cabeçalho). Devolve registros crus
+    (MOV_SCHEMA.Record), incluindo eventos de status.
+    Retorna (registros, novo_offset); uma linha ainda incompleta no fim
+    do arquivo fica para a próxima leitura.
+    """
     ensure_file()
-    movs = []
-    with open(MOV_FILE, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f, delimiter=";")
-        for r in reader:
-            movs.append({
-                "MOV_ID": int(r.get("MOV_ID") or "0"),
-                "USER_ID": int(r.get("USER_ID") or "0"),
-                "VARIANT_ID": int(r.get("VARIANT_ID") or "0"),
-                "PRODUCT_ID": int(r.get("PRODUCT_ID") or "0"),
-                "SKU": (r.get("SKU") or "").strip(),
-                "QTD": int(r.get("QTD") or "0"),
-                "POINTS_TOTAL": int(r.get("POINTS_TOTAL") or "0"),
-                "TYPE": (r.get("TYPE") or "").strip(),  # OUT/IN
-                "STATUS": (r.get("STATUS") or "").strip(),  # processing/confirmed/canceled
-                "CREATED_AT": (r.get("CREATED_AT") or "").strip(),
-            })
-    return movs
+    with span("movimentacoes.ler"):
+        return ler_desde(MOV_FILE, MOV_SCHEMA, offset)
 
 def next_id(movs: List[Dict[str, Any]]) -> int:
     return (max([m["MOV_ID"] for m in movs], default=0) + 1)
 
+@contextmanager
+def lock_log(esperar: bool = True):
+    """
+    Trava exclusiva do log de movimentações, entre threads e entre processos
+    (flock no arquivo .lock; msvcrt no Windows). Reentrante na mesma thread.
+    Com esperar=False não bloqueia: entrega False se a trava estiver com outro.
+    """
+    global _lock_depth
+    if usar_sqlite():
+        # no SQLite a trava é a própria transação de escrita (BEGIN IMMEDIATE)
+        with transacao():
+            yield True
+        return
+    if not _lock.acquire(blocking=esperar):
+        yield False
+        return
+    try:
+        if _lock_depth:
+            _lock_depth += 1
+            try:
+                yield True
+            finally:
+                _lock_depth -= 1
+            return
+        with open(_lock_file(), "a+b") as f:
+            if not _travar_arquivo(f, esperar):
+                yield False
+                return
+            _lock_depth = 1
+            try:
+                yield True
+            finally:
+                _lock_depth = 0
+                if fcntl:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    finally:
+        _lock.release()
+
+def _travar_arquivo(f, esperar: bool) -> bool:
+    if fcntl:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX if esperar else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            if not esperar:
+                return False
+            time.sleep(0.001)
+
+def versao_log() -> Tuple[int, int]:
+    # (inode, tamanho) do log: muda a cada gravação, usado para detectar conflitos
+    if usar_sqlite():
+        return (0, versao("movimentacoes"))
+    ensure_file()
+    st = os.stat(MOV_FILE)
+    return (st.st_ino, st.st_size)
+
+# ---------------------------------------------------------------------------
+# índice lateral (modo append)
+# ---------------------------------------------------------------------------
+
+def _scan_offsets() -> Iterator[Tuple[int, Any]]:
+    # (offset, registro) de cada linha do log, para reconstruir o índice
+    ensure_file()
+    with open(MOV_FILE, "rb") as f:
+        header = f.readline()
+        parse = MOV_SCHEMA.compilar(ler_linha(header.decode("utf-8")))
+        offset = f.tell()
+        for line in f:
+            if line.endswith(b"\n") and line.strip():
+                yield offset, parse(ler_linha(line.decode("utf-8")))
+            offset += len(line)
+    contar_bytes(MOV_FILE, offset)
+
+def _rebuild_index():
+    with span("movimentacoes.reindexar"):
+        ids: Dict[int, List[Any]] = {}
+        for offset, r in _scan_offsets():
+            if r.TYPE == EVENT_TYPE:
+                if r.MOV_ID in ids:
+                    ids[r.MOV_ID][1] = r.STATUS
+            else:
+                ids[r.MOV_ID] = [offset, r.STATUS]
+
+        tmp = _idx_file().with_suffix(".idx.tmp")
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            for mov_id, (offset, status) in ids.items():
+                f.write(f"{mov_id};{offset};{status}\n")
+        os.replace(tmp, _idx_file())
+        _write_hwm(max(max(ids, default=0), _read_hwm()))
+
+def _write_hwm(value: int):
+    _hwm_file().write_text(str(value), encoding="utf-8")
+
+def _read_hwm() -> int:
+    try:
+        return int(_hwm_file().read_text(encoding="utf-8").strip() or "0")
+    except (FileNotFoundError, ValueError):
+        return 0
+
+def _refresh_index():
+    """
+    Mantém o índice em memória em dia lendo só as linhas novas do .idx
+    (gravadas por este ou por outros processos). Se o .idx não existe ou foi
+    substituído (compactação), recarrega tudo.
+    """
+    ensure_file()
+    if _index["arquivo"] != MOV_FILE:
+        _index.update({"ids": {}, "hwm": 0, "idx_offset": 0, "idx_ino": None, "arquivo": MOV_FILE})
+    if not _idx_file().exists():
+        with lock_log():
+            if not _idx_file().exists():
+                _rebuild_index()
+    st = os.stat(_idx_file())
+    if st.st_ino != _index["idx_ino"] or st.st_size < _index["idx_offset"]:
+        _index.update({"ids": {}, "hwm": 0, "idx_offset": 0, "idx_ino": st.st_ino})
+    if st.st_size > _index["idx_offset"]:
+        with open(_idx_file(), "rb") as f:
+            f.seek(_index["idx_offset"])
+            data = f.read()
+        contar_bytes(_idx_file(), len(data))
+        end = data.rfind(b"\n") + 1
+        ids = _index["ids"]
+        for line in data[:end].decode("utf-8").splitlines():
+            mov_id, offset, status = line.split(";")
+            mov_id = int(mov_id)
+            entry = ids.get(mov_id)
+            if entry and int(offset) == entry[0]:
+                entry[1] = status
+            else:
+                ids[mov_id] = [int(offset), status]
+            if mov_id > _index["hwm"]:
+                _index["hwm"] = mov_id
+        _index["idx_offset"] += end
+    _index["hwm"] = max(_index["hwm"], _read_hwm())
+
+def _read_at(offset: int) -> Dict[str, Any]:
+    with open(MOV_FILE, "rb") as f:
+        parse = MOV_SCHEMA.compilar(ler_linha(f.readline().decode("utf-8")))
+        f.seek(offset)
+        line = f.readline()
+    contar_bytes(MOV_FILE, len(line))
+    return parse(ler_linha(line.decode("utf-8")))._asdict()
+
+def _append_index(entries: List[Tuple[int, int, str]]):
+    with open(_idx_file(), "a", encoding="utf-8", newline="") as f:
+        f.write("".join(f"{mov_id};{offset};{status}\n" for mov_id, offset, status in entries))
+
+# ---------------------------------------------------------------------------
+# operações
+# ---------------------------------------------------------------------------
+
+def get_mov(mov_id: int) -> Optional[Dict[str, Any]]:
+    # movimentação com status atual; no modo append é uma busca no índice + 1 seek,
+    # no SQLite uma busca pela chave primária
+    if usar_sqlite():
+        row = get_connection().execute(_SQL_POR_ID, (mov_id,)).fetchone()
+        return MOV_SCHEMA.Record(*row)._asdict() if row else None
+    if MOV_LOG_MODE != "append":
+        return next((m for m in load_movs() if m["MOV_ID"] == mov_id), None)
+    with _lock:
+        _refresh_index()
+        entry = _index["ids"].get(mov_id)
+        if not entry:
+            return None
+        mov = _read_at(entry[0])
+        mov["STATUS"] = entry[1]
+        return mov
+
+def get_movs(mov_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Várias movimentações (status atual) de uma vez, {mov_id: mov}; ids
+    inexistentes ficam de fora. No modo append é uma busca no índice por id e
+    uma única abertura do log; no SQLite, consultas por lote de chaves.
+    """
+    ids = set(mov_ids)
+    if usar_sqlite():
+        conn = get_connection()
+        lista = sorted(ids)
+        achadas = {}
+        for i in range(0, len(lista), _SQL_LOTE):
+            parte = lista[i:i + _SQL_LOTE]
+            for row in conn.execute(_SQL_POR_IDS.format(", ".join("?" * len(parte))), parte):
+                achadas[row[0]] = MOV_SCHEMA.Record(*row)._asdict()
+        return achadas
+    if MOV_LOG_MODE != "append":
+        return {m["MOV_ID"]: m for m in load_movs() if m["MOV_ID"] in ids}
+    with _lock:
+        _refresh_index()
+        entradas = sorted((_index["ids"][i][0], i, _index["ids"][i][1]) for i in ids if i in _index["ids"])
+        if not entradas:
+            return {}
+        achadas = {}
+        with open(MOV_FILE, "rb") as f:
+            parse = MOV_SCHEMA.compilar(ler_linha(f.readline().decode("utf-8")))
+            lidos = 0
+            for offset, mov_id, status in entradas:
+                f.seek(offset)
+                line = f.readline()
+                lidos += len(line)
+                mov = parse(ler_linha(line.decode("utf-8")))._asdict()
+                mov["STATUS"] = status
+                achadas[mov_id] = mov
+        contar_bytes(MOV_FILE, lidos)
+        return achadas
+
 def append_mov(mov: Dict[str, Any]) -> Dict[str, Any]:
+    return append_movs([mov])[0]
+
+def append_movs(movs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Grava várias movimentações de uma vez: ids sequenciais, uma única escrita
+    no fim do log seguida de fsync. Deve ser chamada com ou sem lock_log()
+    (a trava é reentrante).
+    """
     ensure_file()
-    movs = load_movs()
-    mov_id = next_id(movs)
-    mov["MOV_ID"] = mov_id
-    mov["CREATED_AT"] = time.strftime("%Y-%m-%d %H:%M:%S")
-
-    with open(MOV_FILE, "a", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f, delimiter=";")
-        writer.writerow([
-            mov["MOV_ID"],
-            mov.get("USER_ID", 0),
-            mov.get("VARIANT_ID", 0),
-            mov.get("PRODUCT_ID", 0),
-            mov.get("SKU", ""),
-            mov.get("QTD", 0),
-            mov.get("POINTS_TOTAL", 0),
-            mov.get("TYPE", "OUT"),
-            mov.get("STATUS", "processing"),
-            mov["CREATED_AT"]
-        ])
-    return mov
+    with lock_log():
+        ts = time.strftime("%Y-%m-%d %H:%M:%S")
+        if usar_sqlite():
+            conn = get_connection()
+            for mov in movs:
+                mov["MOV_ID"] = None
+                mov["CREATED_AT"] = ts
+                mov["MOV_ID"] = conn.execute(_SQL_INSERIR, _row(mov)).lastrowid
+            return movs
+        _conferir_cabecalho()
+        antes = estoque_compartilhado.assinatura_log()
+        if MOV_LOG_MODE != "append":
+            mov_id = next_id(load_movs())
+            for mov in movs:
+                mov["MOV_ID"] = mov_id
+                mov["CREATED_AT"] = ts
+                mov_id += 1
+            with open(MOV_FILE, "a", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f, delimiter=";")
+                writer.writerows([_row(m) for m in movs])
+                f.flush()
+                estoque_compartilhado.aplicar(map(estoque_compartilhado.inclusao, movs), antes)
+                os.fsync(f.fileno())
+            return movs
+
+        _refresh_index()
+        rows = []
+        for mov in movs:
+            _index["hwm"] += 1
+            mov["MOV_ID"] = _index["hwm"]
+            mov["CREATED_AT"] = ts
+            rows.append(_row(mov))
+        linhas = [_encode_rows([row]) for row in rows]
+        with open(MOV_FILE, "ab") as f:
+            offset = f.tell()
+            f.write(b"".join(linhas))
+            f.flush()
+            # contadores compartilhados antes do fsync: leitores não esperam o disco
+            estoque_compartilhado.aplicar(map(estoque_compartilhado.inclusao, movs), antes)
+            os.fsync(f.fileno())
+        entries = []
+        for row, linha in zip(rows, linhas):
+            entries.append((row[0], offset, row[8]))
+            offset += len(linha)
+        _append_index(entries)
+        _write_hwm(_index["hwm"])
+    return movs
 
 def update_status(mov_id: int, new_status: str) -> Optional[Dict[str, Any]]:
-    movs = load_movs()
-    changed = None
-    # reescreve arquivo com status atualizado
-    with open(MOV_FILE, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f, delimiter=";")
-        writer.writerow(["MOV_ID","USER_ID","VARIANT_ID","PRODUCT_ID","SKU","QTD","POINTS_TOTAL","TYPE","STATUS","CREATED_AT"])
-        for m in movs:
-            if m["MOV_ID"] == mov_id:
-                m["STATUS"] = new_status
-                changed = m
-            writer.writerow([
-                m["MOV_ID"], m["USER_ID"], m["VARIANT_ID"], m["PRODUCT_ID"], m["SKU"],
-                m["QTD"], m["POINTS_TOTAL"], m["TYPE"], m["STATUS"], m["CREATED_AT"]
-            ])
+    if usar_sqlite():
+        with lock_log():
+            if not get_connection().execute(_SQL_STATUS, (new_status, mov_id)).rowcount:
+                return None
+            return get_mov(mov_id)
+
+    if MOV_LOG_MODE == "append":
+        with lock_log():
+            _conferir_cabecalho()
+            mov = get_mov(mov_id)
+            if not mov:
+                return None
+            antes = estoque_compartilhado.assinatura_log()
+            ts = time.strftime("%Y-%m-%d %H:%M:%S")
+            event = {"MOV_ID": mov_id, "USER_ID": "", "VARIANT_ID": "", "PRODUCT_ID": "", "SKU": "",
+                     "QTD": "", "POINTS_TOTAL": "", "TYPE": EVENT_TYPE, "STATUS": new_status, "CREATED_AT": ts}
+            with open(MOV_FILE, "ab") as f:
+                f.write(_encode_rows([_row(event)]))
+                f.flush()
+                # índice e contadores só depois de o evento estar no disco
+                os.fsync(f.fileno())
+            offset = _index["ids"][mov_id][0]
+            _append_index([(mov_id, offset, new_status)])
+            estoque_compartilhado.aplicar([estoque_compartilhado.transicao(mov, new_status)], antes)
+            mov["STATUS"] = new_status
+            return mov
+
+    with lock_log():
+        _conferir_cabecalho()
+        antes = estoque_compartilhado.assinatura_log()
+        movs = load_movs()
+        changed = None
+        efeitos = []
+        # reescreve arquivo com status atualizado
+        with open(MOV_FILE, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, delimiter=";")
+            writer.writerow(COLUMNS)
+            for m in movs:
+                if m["MOV_ID"] == mov_id:
+                    efeitos.append(estoque_compartilhado.transicao(m, new_status))
+                    m["STATUS"] = new_status
+                    changed = m
+                writer.writerow([
+                    m["MOV_ID"], m["USER_ID"], m["VARIANT_ID"], m["PRODUCT_ID"], m["SKU"],
+                    m["QTD"], m["POINTS_TOTAL"], m["TYPE"], m["STATUS"], m["CREATED_AT"]
+                ])
+        estoque_compartilhado.aplicar(efeitos, antes)
     return changed
+
+def update_status_lote(mudancas: Dict[int, str]) -> Dict[int, Dict[str, Any]]:
+    """
+    Aplica várias mudanças de status {mov_id: novo_status} numa única gravação
+    (ids inexistentes são ignorados) e devolve as movimentações alteradas.
+    - append: todas as linhas de evento numa só escrita no fim do log, com fsync;
+    - rewrite: uma leitura do log e uma reescrita atômica (arquivo temporário + rename);
+    - SQLite: uma transação.
+    """
+    if not mudancas:
+        return {}
+    with lock_log():
+        if not usar_sqlite():
+            _conferir_cabecalho()
+        antes = estoque_compartilhado.assinatura_log()
+        reescrever = MOV_LOG_MODE != "append" and not usar_sqlite()
+        todas = load_movs() if reescrever else []
+        if reescrever:
+            movs = {m["MOV_ID"]: dict(m) for m in todas if m["MOV_ID"] in mudancas}
+        else:
+            movs = get_movs(list(mudancas))
+        efeitos = [estoque_compartilhado.transicao(m, mudancas[mov_id]) for mov_id, m in movs.items()]
+        for mov_id, mov in movs.items():
+            mov["STATUS"] = mudancas[mov_id]
+        if not movs:
+            return movs
+
+        if usar_sqlite():
+            get_connection().executemany(_SQL_STATUS, [(m["STATUS"], mov_id) for mov_id, m in movs.items()])
+            return movs
+
+        if MOV_LOG_MODE == "append":
+            ts = time.strftime("%Y-%m-%d %H:%M:%S")
+            rows = [[mov_id, "", "", "", "", "", "", EVENT_TYPE, m["STATUS"], ts] for mov_id, m in movs.items()]
+            with open(MOV_FILE, "ab") as f:
+                f.write(_encode_rows(rows))
+                f.flush()
+                estoque_compartilhado.aplicar(efeitos, antes)
+                os.fsync(f.fileno())
+            _append_index([(mov_id, _index["ids"][mov_id][0], m["STATUS"]) for mov_id, m in movs.items()])
+            return movs
+
+        tmp = MOV_FILE.with_suffix(".tmp")
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, delimiter=";", lineterminator="\n")
+            writer.writerow(COLUMNS)
+            for m in todas:
+                writer.writerow(_row(movs.get(m["MOV_ID"], m)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, MOV_FILE)
+        estoque_compartilhado.aplicar(efeitos, antes)
+        return movs
+
+def compactar() -> Dict[str, Any]:
+    """
+    Aplica os eventos de status nas movimentações e grava um snapshot limpo
+    (uma linha por movimentação), trocando o arquivo de forma atômica.
+    O índice e o maior id são refeitos a partir do snapshot.
+    No SQLite não há eventos a aplicar: só faz o checkpoint do WAL.
+    """
+    if usar_sqlite():
+        conn = get_connection()
+        total = conn.execute("SELECT COUNT(*) FROM movimentacoes").fetchone()[0]
+        ocupado, paginas_wal, _ = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        return {"movimentacoes": total, "wal_paginas": paginas_wal, "wal_ocupado": bool(ocupado)}
+    with lock_log():
+        _conferir_cabecalho()
+        antes = os.path.getsize(MOV_FILE) if MOV_FILE.exists() else 0
+        assinatura = estoque_compartilhado.assinatura_log()
+        movs = load_movs()
+        tmp = MOV_FILE.with_suffix(".tmp")
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, delimiter=";", lineterminator="\n")
+            writer.writerow(COLUMNS)
+            for m in movs:
+                writer.writerow(_row(m))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, MOV_FILE)
+        # mesmo estoque, arquivo novo: só recarimba os contadores compartilhados
+        estoque_compartilhado.aplicar([], assinatura)
+        _rebuild_index()
+        _index["arquivo"] = None
+        return {"movimentacoes": len(movs), "bytes_antes": antes, "bytes_depois": os.path.getsize(MOV_FILE)}
+
+def migrar_cabecalho() -> Dict[str, Any]:
+    """
+    Converte um log com cabeçalho antigo (ID;BrindeID;TipoMovimento;...): as
+    linhas antigas não têm TYPE/STATUS e nunca contaram no estoque (que parte
+    do stockInitial do catálogo), então o arquivo é guardado como .legado e o
+    log recomeça vazio, com o cabeçalho COLUMNS. Não faz nada se já está no
+    formato atual.
+    """
+    ensure_file()
+    with lock_log():
+        cabecalho = _cabecalho()
+        if cabecalho == COLUMNS:
+            return {"migrado": False}
+        assinatura = estoque_compartilhado.assinatura_log()
+        legado = MOV_FILE.with_suffix(".legado")
+        with open(MOV_FILE, "rb") as f:
+            linhas = sum(1 for _ in f) - 1
+        os.replace(MOV_FILE, legado)
+        MOV_FILE.write_text(";".join(COLUMNS) + "\n", encoding="utf-8")
+        for sidecar in (_idx_file(), _hwm_file()):
+            sidecar.unlink(missing_ok=True)
+        _index["arquivo"] = None
+        # nenhuma linha antiga contava no estoque: só recarimba os contadores compartilhados
+        estoque_compartilhado.aplicar([], assinatura)
+        return {"migrado": True, "cabecalho_antigo": ";".join(cabecalho), "linhas_antigas": linhas,
+                "legado": str(legado)}
+
+def tabela_estoque() -> Tuple[Dict[int, int], Dict[int, int]]:
+    """
+    Backend SQLite: (deltas confirmados, saídas pendentes) por variante, lidos da
+    tabela estoque_variante (mantida por trigger) em vez de agregar o log.
+    """
+    deltas: Dict[int, int] = {}
+    pendentes: Dict[int, int] = {}
+    for vid, confirmado, pendente in get_connection().execute(_SQL_ESTOQUE):
+        if confirmado:
+            deltas[vid] = confirmado
+        if pendente:
+            pendentes[vid] = pendente
+    return deltas, pendentes
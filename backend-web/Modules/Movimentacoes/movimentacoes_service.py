@@ -1,70 +1,189 @@
-from typing import Dict, Any, List
-from Modules.Brindes.brindes_service import listar_variacoes
-from .movimentacoes_repository import append_mov, update_status, load_movs
+from contextlib import nullcontext
+from typing import Dict, Any, List, Optional, Tuple
+from Modules.Brindes.brindes_cache import get_variacao, get_estoque
+from . import reservas
+from .movimentacoes_repository import (append_movs, update_status, update_status_lote, get_mov, get_movs,
+                                       lock_log, versao_log)
 
-def validar_estoque(items_req: List[Dict[str, Any]]) -> bool:
-    variacoes = {v["id"]: v for v in listar_variacoes()}
-    for it in items_req:
-        v = variacoes.get(it["variantId"])
-        if not v:
-            return False
-        if it["quantity"] <= 0:
-            return False
-        if v["stockCurrent"] < it["quantity"]:
-            return False
-        if (v.get("pointsCost") or 0) <= 0:
-            return False
-    return True
+# tentativas otimistas antes de validar segurando a trava do log
+MAX_TENTATIVAS = 3
 
-def criar_resgate(user_id: int, items_req: List[Dict[str, Any]], total_points: int) -> Dict[str, Any]:
+# confirmação/cancelamento em lote
+MAX_LOTE = 5000
+STATUS_LOTE = {"confirmed": "Movimentação já confirmada", "canceled": "Movimentação já cancelada"}
+# só reservas em 'processing' mudam de status: reabrir uma cancelada (ou desfazer uma
+# confirmada) mexeria no estoque sem passar pela validação de criar_resgate
+ERRO_TRANSICAO = "Só movimentações em processing podem ser confirmadas ou canceladas"
+
+# confirmação de reserva vencida (reservas.RESERVA_TTL): recusada e cancelada na hora
+ERRO_VENCIDA = "Reserva expirada"
+
+_stats: Dict[str, int] = {"resgates": 0, "conflitos": 0, "lotes": 0, "vencidas_recusadas": 0}
+
+def _snapshot() -> Tuple[Tuple[int, int], Dict[int, int], Dict[int, int]]:
+    # versão do log + tabelas de estoque lidas no mesmo instante
+    versao = versao_log()
+    deltas, pendentes = get_estoque()
+    return versao, deltas, pendentes
+
+def _validar_carrinho(items_req: List[Dict[str, Any]], deltas: Dict[int, int],
+                      pendentes: Dict[int, int]) -> Optional[str]:
     """
-    Cria movimentações OUT em status 'processing' para cada variante solicitada.
-    Retorna dict com ok True e movimentacoes criadas ou ok False e mensagem de erro.
+    Valida o carrinho inteiro contra um único snapshot de estoque.
+    Saídas ainda em 'processing' já comprometem o estoque disponível.
+    Retorna None se ok, senão a mensagem de erro (também para itens malformados).
     """
-    if not validar_estoque(items_req):
-        return {"ok": False, "error": "Estoque insuficiente ou custo inválido"}
+    pedidos: Dict[int, int] = {}
+    for it in items_req:
+        try:
+            variant_id = int(it["variantId"])
+            quantity = int(it["quantity"])
+        except (KeyError, TypeError, ValueError):
+            return "Estoque insuficiente ou custo inválido"
+        v = get_variacao(variant_id)
+        if not v:
+            return f"Variante {variant_id} não encontrada"
+        if quantity <= 0 or (v.get("pointsCost") or 0) <= 0:
+            return "Estoque insuficiente ou custo inválido"
+        pedidos[variant_id] = pedidos.get(variant_id, 0) + quantity
 
-    created_movs = []
+    for variant_id, quantity in pedidos.items():
+        v = get_variacao(variant_id)
+        disponivel = v["stockInitial"] + deltas.get(variant_id, 0) - pendentes.get(variant_id, 0)
+        if disponivel < quantity:
+            return "Estoque insuficiente ou custo inválido"
+    return None
+
+def validar_estoque(items_req: List[Dict[str, Any]]) -> bool:
+    _, deltas, pendentes = _snapshot()
+    return _validar_carrinho(items_req, deltas, pendentes) is None
+
+def _montar_movs(user_id: int, items_req: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # itens já conferidos por _validar_carrinho
+    movs = []
     for it in items_req:
         variant_id = int(it["variantId"])
         quantity = int(it["quantity"])
         # recuperar dados da variante para SKU e product_id e pontos unitários
-        variacoes = {v["id"]: v for v in listar_variacoes()}
-        v = variacoes.get(variant_id)
-        if not v:
-            return {"ok": False, "error": f"Variante {variant_id} não encontrada"}
-
+        v = get_variacao(variant_id)
         points_unit = v.get("pointsCost", 0)
-        points_total = points_unit * quantity
-
-        mov = {
+        movs.append({
             "USER_ID": user_id,
             "VARIANT_ID": variant_id,
             "PRODUCT_ID": v.get("product_id") or 0,
             "SKU": v.get("sku") or "",
             "QTD": quantity,
-            "POINTS_TOTAL": points_total,
+            "POINTS_TOTAL": points_unit * quantity,
             "TYPE": "OUT",
             "STATUS": "processing"
-        }
-        appended = append_mov(mov)
-        created_movs.append(appended)
+        })
+    return movs
+
+def criar_resgate(user_id: int, items_req: List[Dict[str, Any]], total_points: int) -> Dict[str, Any]:
+    """
+    Cria movimentações OUT em status 'processing' para cada variante solicitada.
+    Retorna dict com ok True e movimentacoes criadas ou ok False e mensagem de erro.
+
+    Transação: valida o carrinho contra um snapshot do estoque sem travar e, já
+    com a trava do log, confere se ninguém gravou desde o snapshot; havendo
+    conflito, tenta de novo. A última tentativa valida segurando a trava.
+    Todas as movimentações são gravadas numa única escrita com fsync.
+    A reserva vale até `expiraEm` (None sem prazo): depois disso a confirmação
+    é recusada e a varredura de reservas cancela as movimentações.
+    """
+    for tentativa in range(MAX_TENTATIVAS):
+        pessimista = tentativa == MAX_TENTATIVAS - 1
+        with lock_log() if pessimista else nullcontext():
+            versao, deltas, pendentes = _snapshot()
+            erro = _validar_carrinho(items_req, deltas, pendentes)
+            if erro:
+                return {"ok": False, "error": erro}
+            movs = _montar_movs(user_id, items_req)
 
-    return {"ok": True, "movimentacoes": created_movs}
+            with lock_log():
+                if versao_log() != versao:
+                    _stats["conflitos"] += 1
+                    continue
+                created_movs = append_movs(movs)
+                _stats["resgates"] += 1
+                return {"ok": True, "movimentacoes": created_movs,
+                        "expiraEm": reservas.expira_em(created_movs[0]["CREATED_AT"])}
+    return {"ok": False, "error": "Falha ao gravar resgate"}
 
 def confirmar_resgate(mov_id: int) -> Dict[str, Any]:
     """
     Marca movimentação como 'confirmed' e retorna a movimentação alterada.
-    Se já estiver confirmado ou não existir, retorna erro.
+    Só reservas em 'processing' são confirmadas: não existente, já confirmada
+    ou cancelada (inclusive pela varredura de reservas) retorna erro; se for
+    uma reserva vencida, retorna erro e a cancela.
     """
-    movs = load_movs()
-    target = next((m for m in movs if m["MOV_ID"] == mov_id), None)
-    if not target:
-        return {"ok": False, "error": "Movimentação não encontrada"}
-    if target["STATUS"] == "confirmed":
-        return {"ok": False, "error": "Movimentação já confirmada"}
-
-    changed = update_status(mov_id, "confirmed")
+    with lock_log():
+        target = get_mov(mov_id)
+        if not target:
+            return {"ok": False, "error": "Movimentação não encontrada"}
+        if target["STATUS"] != "processing":
+            return {"ok": False, "error": STATUS_LOTE.get(target["STATUS"], ERRO_TRANSICAO)}
+        if reservas.vencida(target):
+            update_status(mov_id, "canceled")
+            _stats["vencidas_recusadas"] += 1
+            return {"ok": False, "error": ERRO_VENCIDA}
+
+        changed = update_status(mov_id, "confirmed")
     if not changed:
         return {"ok": False, "error": "Falha ao atualizar status"}
     return {"ok": True, "movimentacao": changed}
+
+def _id_valido(valor: Any) -> int:
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return 0
+
+def atualizar_status_lote(itens: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Confirma/cancela várias movimentações: itens [{"movId": 1, "status": "confirmed"}, ...].
+    Tudo é validado contra um único snapshot, tirado com a trava do log, e as
+    mudanças válidas são gravadas numa única escrita (update_status_lote).
+    Só movimentações em 'processing' mudam de status; as demais falham com a
+    mensagem do status atual. Devolve um resultado por item, na ordem
+    recebida; itens inválidos não impedem a gravação dos demais. Confirmar
+    uma reserva vencida falha e a cancela, na mesma gravação.
+    """
+    pedidos = [(_id_valido(it.get("movId")), it.get("status")) for it in itens]
+    resultados: List[Dict[str, Any]] = []
+    mudancas: Dict[int, str] = {}
+    vencidas: Dict[int, str] = {}
+    with lock_log():
+        atuais = get_movs([mov_id for mov_id, _ in pedidos if mov_id > 0])
+        for mov_id, status in pedidos:
+            erro = None
+            if mov_id <= 0:
+                erro = "movId inválido"
+            elif status not in STATUS_LOTE:
+                erro = "status deve ser confirmed ou canceled"
+            elif mov_id in mudancas or mov_id in vencidas:
+                erro = "Movimentação repetida no lote"
+            elif mov_id not in atuais:
+                erro = "Movimentação não encontrada"
+            elif atuais[mov_id]["STATUS"] != "processing":
+                erro = STATUS_LOTE.get(atuais[mov_id]["STATUS"], ERRO_TRANSICAO)
+            elif status == "confirmed" and reservas.vencida(atuais[mov_id]):
+                erro = ERRO_VENCIDA
+                vencidas[mov_id] = "canceled"
+            if erro:
+                resultados.append({"movId": mov_id, "ok": False, "error": erro})
+            else:
+                mudancas[mov_id] = status
+                resultados.append({"movId": mov_id, "ok": True})
+        alteradas = update_status_lote({**vencidas, **mudancas})
+    _stats["lotes"] += 1
+    _stats["vencidas_recusadas"] += len(vencidas)
+
+    for r in resultados:
+        if r["ok"]:
+            r["movimentacao"] = alteradas[r["movId"]]
+    return {"ok": True, "aplicadas": len(mudancas), "falhas": len(resultados) - len(mudancas),
+            "resultados": resultados}
+
+def resgate_stats() -> Dict[str, int]:
+    return dict(_stats)
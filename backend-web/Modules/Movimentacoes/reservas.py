@@ -0,0 +1,201 @@
+# Modules/Movimentacoes/reservas.py
+"""
+Prazo (TTL) das reservas de estoque dos resgates em 'processing'.
+
+criar_resgate grava saídas OUT em 'processing', que já comprometem o estoque
+disponível (pendentes de get_estoque, dos contadores compartilhados ou de
+estoque_variante, lidos em O(1) por variante). Sem prazo, um carrinho
+abandonado prendia o estoque para sempre. Cada reserva vale RESERVA_TTL
+segundos a partir do CREATED_AT:
+- confirmar uma reserva vencida é recusado, e ela é cancelada na hora;
+- uma thread de varredura, a cada RESERVA_VARREDURA segundos, cancela as
+  vencidas com update_status_lote, até RESERVA_LOTE por gravação.
+
+Reservas abertas em memória: {mov_id: vence_em} e um heap (vence_em, mov_id)
+para achar as vencidas sem percorrer todas (entradas de reservas já fechadas
+são descartadas ao sair do heap). São alimentadas pela cauda do log
+(read_movs_since), então cada processo vê também as reservas gravadas pelos
+outros; arquivo trocado ou modo "rewrite" relê o log inteiro. No SQLite as
+vencidas vêm de uma consulta pelo índice parcial idx_movs_processing.
+
+A varredura lê o log sem trava e confere o status de cada candidata já com
+lock_log; a trava é pedida sem esperar, e quem a encontra ocupada pula a
+rodada. CREATED_AT fora do formato atual (linhas antigas) conta como vencido.
+RESERVA_TTL=0 desliga o prazo; RESERVA_VARREDURA=0 desliga só a thread
+(`python manage.py expirar-reservas` faz uma varredura avulsa).
+"""
+import heapq
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from Modules.Shared.db_connection import usar_sqlite, get_connection
+from . import movimentacoes_repository as repo
+
+RESERVA_TTL = float(os.environ.get("RESERVA_TTL", "900"))
+RESERVA_VARREDURA = float(os.environ.get("RESERVA_VARREDURA", "30"))
+RESERVA_LOTE = int(os.environ.get("RESERVA_LOTE", "1000"))
+
+# formato do CREATED_AT gravado por append_movs
+_FORMATO_DATA = "%Y-%m-%d %H:%M:%S"
+
+_SQL_VENCIDAS = ("SELECT MOV_ID FROM movimentacoes WHERE STATUS = 'processing' AND TYPE = 'OUT' "
+                 "AND CREATED_AT <= ? ORDER BY CREATED_AT LIMIT ?")
+
+_lock = threading.Lock()
+_abertas: Dict[int, float] = {}
+_fila: List[Tuple[float, int]] = []
+# ponto do log até onde as reservas abertas estão em dia
+_log: Dict[str, Any] = {"arquivo": None, "assinatura": None, "offset": 0}
+_varredura: Dict[str, Any] = {"thread": None, "pid": None}
+_stats: Dict[str, Any] = {"varreduras": 0, "puladas": 0, "lotes": 0, "canceladas": 0, "falhas": 0,
+                          "ultimo_erro": None}
+
+@lru_cache(maxsize=4096)
+def _criada_em(created_at: str) -> float:
+    # CREATED_AT -> epoch (hora local, como gravado); outro formato conta como muito antigo
+    try:
+        return time.mktime(time.strptime(created_at, _FORMATO_DATA))
+    except ValueError:
+        return 0.0
+
+def vence_em(mov: Dict[str, Any]) -> Optional[float]:
+    """Instante (epoch) em que a reserva vence; None se não é reserva aberta ou se não há prazo."""
+    if RESERVA_TTL <= 0 or mov.get("TYPE") != "OUT" or mov.get("STATUS") != "processing":
+        return None
+    return _criada_em(mov.get("CREATED_AT") or "") + RESERVA_TTL
+
+def vencida(mov: Dict[str, Any], agora: Optional[float] = None) -> bool:
+    vence = vence_em(mov)
+    return vence is not None and vence <= (time.time() if agora is None else agora)
+
+def expira_em(created_at: str) -> Optional[str]:
+    # prazo de uma reserva gravada em `created_at`, no mesmo formato (None sem prazo)
+    if RESERVA_TTL <= 0:
+        return None
+    return time.strftime(_FORMATO_DATA, time.localtime(_criada_em(created_at) + RESERVA_TTL))
+
+def _acompanhar():
+    # põe as reservas abertas em dia com as linhas novas do log (todas, se ele foi trocado ou reescrito)
+    repo.ensure_file()
+    st = os.stat(repo.MOV_FILE)
+    assinatura = (st.st_ino, st.st_size, st.st_mtime_ns)
+    anterior = _log["assinatura"]
+    if _log["arquivo"] == repo.MOV_FILE and assinatura == anterior:
+        return
+    refazer = (_log["arquivo"] != repo.MOV_FILE or anterior is None or repo.MOV_LOG_MODE != "append"
+               or st.st_ino != anterior[0] or st.st_size < _log["offset"])
+    if refazer:
+        _abertas.clear()
+        _fila.clear()
+        _log["offset"] = 0
+    registros, _log["offset"] = repo.read_movs_since(_log["offset"])
+    novas = []
+    for r in registros:
+        if r.TYPE == "OUT" and r.STATUS == "processing":
+            vence = _criada_em(r.CREATED_AT) + RESERVA_TTL
+            _abertas[r.MOV_ID] = vence
+            novas.append((vence, r.MOV_ID))
+        elif r.TYPE in ("OUT", repo.EVENT_TYPE):
+            _abertas.pop(r.MOV_ID, None)
+    if refazer:
+        _fila.extend(novas)
+        heapq.heapify(_fila)
+    else:
+        for item in novas:
+            heapq.heappush(_fila, item)
+    _log.update({"arquivo": repo.MOV_FILE, "assinatura": assinatura})
+
+def _candidatas(agora: float) -> List[int]:
+    # até RESERVA_LOTE reservas vencidas, as mais antigas primeiro
+    if usar_sqlite():
+        limite = time.strftime(_FORMATO_DATA, time.localtime(agora - RESERVA_TTL))
+        return [row[0] for row in get_connection().execute(_SQL_VENCIDAS, (limite, RESERVA_LOTE))]
+    ids = []
+    while _fila and _fila[0][0] <= agora and len(ids) < RESERVA_LOTE:
+        vence, mov_id = heapq.heappop(_fila)
+        if _abertas.get(mov_id) == vence:
+            del _abertas[mov_id]
+            ids.append(mov_id)
+    return ids
+
+def varrer(agora: Optional[float] = None) -> Dict[str, int]:
+    """
+    Cancela as reservas vencidas em lotes de RESERVA_LOTE (uma gravação por
+    lote), conferindo com a trava do log que cada uma ainda está em
+    'processing' e vencida. Desiste se outro processo estiver com a trava.
+    Devolve {"canceladas", "lotes"}.
+    """
+    resultado = {"canceladas": 0, "lotes": 0}
+    if RESERVA_TTL <= 0:
+        return resultado
+    agora = time.time() if agora is None else agora
+    with _lock:
+        _stats["varreduras"] += 1
+        if not usar_sqlite():
+            _acompanhar()  # sem a trava: só linhas completas são lidas
+        while True:
+            with repo.lock_log(esperar=False) as travado:
+                if not travado:
+                    _stats["puladas"] += 1
+                    break
+                candidatas = _candidatas(agora)
+                if not candidatas:
+                    break
+                try:
+                    atuais = repo.get_movs(candidatas)
+                    alteradas = repo.update_status_lote(
+                        {mov_id: "canceled" for mov_id, m in atuais.items() if vencida(m, agora)})
+                except Exception:
+                    _log["assinatura"] = None  # relê o log: as candidatas voltam na próxima rodada
+                    raise
+            resultado["canceladas"] += len(alteradas)
+            resultado["lotes"] += 1
+            if len(candidatas) < RESERVA_LOTE:
+                break
+        _stats["lotes"] += resultado["lotes"]
+        _stats["canceladas"] += resultado["canceladas"]
+    return resultado
+
+def _laco():
+    while True:
+        time.sleep(RESERVA_VARREDURA)
+        try:
+            varrer()
+        except Exception as exc:  # a thread não pode morrer por uma rodada ruim
+            with _lock:
+                _stats["falhas"] += 1
+                _stats["ultimo_erro"] = f"{type(exc).__name__}: {exc}"
+
+def iniciar_varredura() -> bool:
+    """
+    Inicia a thread de varredura deste processo (chamado por app.iniciar()).
+    Idempotente; se o processo fizer fork depois de iniciá-la, o filho inicia a sua.
+    """
+    if RESERVA_TTL <= 0 or RESERVA_VARREDURA <= 0:
+        return False
+    with _lock:
+        thread = _varredura["thread"]
+        if thread is not None and _varredura["pid"] == os.getpid() and thread.is_alive():
+            return True
+        thread = threading.Thread(target=_laco, name="reservas-varredura", daemon=True)
+        _varredura.update({"thread": thread, "pid": os.getpid()})
+        thread.start()
+        return True
+
+def _apos_fork():
+    # a trava pode ter ficado com a thread do pai, que não existe no filho
+    global _lock
+    _lock = threading.Lock()
+    if _varredura["thread"] is not None:
+        iniciar_varredura()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_apos_fork)
+
+def reservas_stats() -> Dict[str, Any]:
+    with _lock:
+        return {**_stats, "ttl_s": RESERVA_TTL, "intervalo_s": RESERVA_VARREDURA, "abertas": len(_abertas),
+                "fila": len(_fila), "varredura_ativa": _varredura["pid"] == os.getpid()}
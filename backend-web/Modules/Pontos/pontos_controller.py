@@ -1,10 +1,28 @@
 # Modules/Pontos/pontos_controller.py
-from flask import Blueprint, jsonify, request
+from typing import Any, Dict, Optional, Tuple
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from Modules.Auth.auth_middleware import require_auth
-from Modules.Pontos.pontos_service import calcular_saldos
+from Modules.Pontos.pontos_service import calcular_saldos, exportar_saldos_json
 
 pontos_bp = Blueprint("pontos", __name__)
 
+# maior página aceita em /api/pontos?limit=
+MAX_LIMIT = 500
+
+def parametros_extrato(args) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    # argumentos de calcular_saldos a partir da query; (None, erro) se limit for inválido
+    limit = args.get("limit")
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            return None, "limit inválido"
+        if limit <= 0:
+            return None, "limit inválido"
+        limit = min(limit, MAX_LIMIT)
+    return {"limit": limit, "after_id": args.get("after_id"), "data_de": args.get("de"),
+            "data_ate": args.get("ate")}, None
+
 @pontos_bp.route("/api/me", methods=["GET"])
 @require_auth
 def me():
@@ -14,5 +32,25 @@ def me():
 @pontos_bp.route("/api/pontos", methods=["GET"])
 @require_auth
 def pontos_do_usuario_autenticado():
+    """
+    Query opcional (paginação por cursor, mais recentes primeiro):
+      ?limit=50&after_id=123&de=2025-01-01&ate=2025-12-31
+    Sem nenhum desses parâmetros, o histórico vem completo na ordem do arquivo
+    (mais antigos primeiro), como antes da paginação.
+    """
+    extrato, erro = parametros_extrato(request.args)
+    if erro:
+        return jsonify({"message": erro}), 400
+    return jsonify(calcular_saldos(request.user["id"], **extrato))
+
+@pontos_bp.route("/api/pontos/export", methods=["GET"])
+@require_auth
+def exportar_pontos_do_usuario_autenticado():
+    """
+    Histórico completo em JSON enviado em pedaços (chunked), com ?de=&ate= opcionais.
+    Ordem: mais recentes primeiro, como as páginas de /api/pontos (e não a
+    ordem do arquivo de /api/pontos sem parâmetros).
+    """
     usuario_id = request.user["id"]
-    return jsonify(calcular_saldos(usuario_id))
+    chunks = exportar_saldos_json(usuario_id, data_de=request.args.get("de"), data_ate=request.args.get("ate"))
+    return Response(stream_with_context(chunks), mimetype="application/json")
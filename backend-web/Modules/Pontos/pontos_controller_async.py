@@ -0,0 +1,24 @@
+# Modules/Pontos/pontos_controller_async.py
+# rotas de pontos do modo async (asgi.py); /api/pontos/export continua no Flask (streaming)
+from Modules.Auth.auth_middleware import require_auth_async
+from Modules.Pontos import pontos_repository
+from Modules.Pontos.pontos_controller import parametros_extrato
+from Modules.Pontos.pontos_service import calcular_saldos
+from Modules.Shared.assincrono import Requisicao, Resposta, Rotas, assinatura, json_resposta, unico
+
+pontos_async = Rotas("pontos")
+
+@pontos_async.rota("/api/me")
+@require_auth_async
+async def me(req: Requisicao) -> Resposta:
+    return json_resposta({"id": req.user["id"], "nome": req.user["nome"], "role": req.user["role"]})
+
+@pontos_async.rota("/api/pontos")
+@require_auth_async
+async def pontos_do_usuario_autenticado(req: Requisicao) -> Resposta:
+    extrato, erro = parametros_extrato(req.args)
+    if erro:
+        return json_resposta({"message": erro}, 400)
+    usuario_id = req.user["id"]
+    chave = ("pontos", usuario_id, req.query_string, assinatura(pontos_repository.PONTOS_FILE))
+    return json_resposta(await unico(chave, lambda: calcular_saldos(usuario_id, **extrato)))
@@ -0,0 +1,216 @@
+# Modules/Pontos/pontos_ledger.py
+"""
+Índice do extrato de pontos (pontos.txt) mantido em memória por processo.
+
+- usuario_id -> (offset em bytes, id) das linhas do usuário, em ordem do arquivo;
+- saldos materializados por usuário (saldo_atual, em_processamento, total, retirado).
+
+O arquivo é lido uma vez; linhas novas no fim são aplicadas de forma incremental
+a partir do último offset lido. Se o arquivo for reescrito (substituído, encolheu,
+mudou sem crescer ou o trecho já lido mudou), o índice é refeito.
+Saldo custa O(1); histórico custa O(linhas do usuário). O histórico paginado
+percorre o arquivo do fim para o começo (mais recentes primeiro) e para assim
+que a página enche, sem materializar o resto.
+
+O estado pode ser exportado/carregado pelo snapshot de partida (Shared/aquecimento.py):
+um processo novo parte do índice salvo e lê só as linhas gravadas depois dele.
+
+Com o backend SQLite o índice em memória não é usado: saldos vêm da tabela
+saldos_pontos (mantida por trigger) e o histórico do índice (usuario_id, seq).
+"""
+import os
+import threading
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from Modules.Pontos import pontos_repository
+from Modules.Shared.record_loader import ler_linha
+from Modules.Shared.db_connection import usar_sqlite
+from Modules.Shared.metricas import span, contar_bytes
+
+_TAIL_BYTES = 64
+
+_lock = threading.RLock()
+
+_state: Dict[str, Any] = {
+    "arquivo": None,
+    "assinatura": None,
+    "offset": 0,
+    "tail": b"",
+    "parse": None,  # parser compilado para o cabeçalho do arquivo
+    "offsets": {},  # usuario_id -> [(offset, id), ...]
+    "saldos": {},   # usuario_id -> {"saldo_atual", "em_processamento", "total", "retirado"}
+}
+
+def _saldo_vazio() -> Dict[str, int]:
+    return {"saldo_atual": 0, "em_processamento": 0, "total": 0, "retirado": 0}
+
+def _aplicar(saldo: Dict[str, int], p):
+    # mesmas regras de pontos_service.calcular_saldos
+    if p.status == "processando":
+        saldo["em_processamento"] += p.quantidade
+    elif p.status == "confirmado":
+        if p.tipo == "credito":
+            saldo["saldo_atual"] += p.quantidade
+            saldo["total"] += p.quantidade
+        elif p.tipo == "debito":
+            saldo["saldo_atual"] -= p.quantidade
+            saldo["retirado"] += p.quantidade
+
+def _assinatura(path) -> Tuple[int, int, int]:
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+def _ler_tail(path, offset: int) -> bytes:
+    inicio = max(offset - _TAIL_BYTES, 0)
+    with open(path, "rb") as f:
+        f.seek(inicio)
+        return f.read(offset - inicio)
+
+def _parse_linha(linha: bytes):
+    # Record (PONTO_SCHEMA) da linha, ou None se vazia
+    texto = linha.decode("utf-8").rstrip("\r\n")
+    if not texto:
+        return None
+    return _state["parse"](ler_linha(texto))
+
+def _indexar_desde(path, offset: int):
+    # lê linhas completas a partir de offset (0 = pula o cabeçalho) e atualiza índice/saldos
+    offsets = _state["offsets"]
+    saldos = _state["saldos"]
+    with span("pontos.indexar"), open(path, "rb") as f:
+        if offset == 0:
+            header = ler_linha(f.readline().decode("utf-8").rstrip("\r\n"))
+            _state["parse"] = pontos_repository.PONTO_SCHEMA.compilar(header)
+        else:
+            f.seek(offset)
+        pos = f.tell()
+        for linha in f:
+            if not linha.endswith(b"\n"):
+                break  # linha ainda sendo escrita
+            p = _parse_linha(linha)
+            if p:
+                offsets.setdefault(p.usuario_id, []).append((pos, p.id))
+                _aplicar(saldos.setdefault(p.usuario_id, _saldo_vazio()), p)
+            pos += len(linha)
+    contar_bytes(path, pos - offset)
+    _state["offset"] = pos
+
+def _atualizar():
+    path = pontos_repository.PONTOS_FILE
+    assinatura = _assinatura(path)
+    anterior = _state["assinatura"]
+    if _state["arquivo"] == path and assinatura == anterior:
+        return
+    incremental = (
+        _state["arquivo"] == path
+        and anterior is not None
+        and assinatura[2] == anterior[2]
+        and assinatura[1] > anterior[1]
+        and _ler_tail(path, _state["offset"]) == _state["tail"]
+    )
+    if not incremental:
+        _state.update({"arquivo": path, "offset": 0, "offsets": {}, "saldos": {}})
+    _indexar_desde(path, _state["offset"])
+    _state["tail"] = _ler_tail(path, _state["offset"])
+    _state["assinatura"] = assinatura
+
+def exportar_estado() -> Dict[str, Any]:
+    # índice e saldos atuais, para o snapshot de partida (sem o parser compilado)
+    with _lock:
+        _atualizar()
+        estado = {chave: valor for chave, valor in _state.items() if chave != "parse"}
+        estado["arquivo"] = str(_state["arquivo"])
+        return estado
+
+def carregar_estado(estado: Dict[str, Any]) -> bool:
+    """
+    Usa o índice do snapshot se pontos.txt ainda começa pelo trecho já indexado
+    (mesmo inode, não encolheu, mesmo tail); as linhas novas são lidas na
+    próxima consulta.
+    """
+    path = pontos_repository.PONTOS_FILE
+    with _lock:
+        if estado["arquivo"] != str(path):
+            return False
+        assinatura = _assinatura(path)
+        if (assinatura[2] != estado["assinatura"][2] or assinatura[1] < estado["offset"]
+                or _ler_tail(path, estado["offset"]) != estado["tail"]):
+            return False
+        with open(path, "rb") as f:
+            header = ler_linha(f.readline().decode("utf-8").rstrip("\r\n"))
+        _state.update({**estado, "arquivo": path, "parse": pontos_repository.PONTO_SCHEMA.compilar(header)})
+        return True
+
+def saldos(usuario_id) -> Dict[str, int]:
+    if usar_sqlite():
+        return pontos_repository.get_saldos(usuario_id) or _saldo_vazio()
+    with _lock:
+        _atualizar()
+        return dict(_state["saldos"].get(str(usuario_id)) or _saldo_vazio())
+
+def historico(usuario_id) -> List[Dict[str, Any]]:
+    # lançamentos do usuário em ordem do arquivo, lidos direto pelos offsets
+    if usar_sqlite():
+        return pontos_repository.get_pontos_by_user(usuario_id)
+    with _lock:
+        _atualizar()
+        offsets = _state["offsets"].get(str(usuario_id), [])
+        pontos = []
+        if not offsets:
+            return pontos
+        lidos = 0
+        with open(_state["arquivo"], "rb") as f:
+            for offset, _ in offsets:
+                f.seek(offset)
+                linha = f.readline()
+                lidos += len(linha)
+                p = _parse_linha(linha)
+                if p:
+                    pontos.append(p._asdict())
+        contar_bytes(_state["arquivo"], lidos)
+        return pontos
+
+def iter_historico(usuario_id, after_id=None, data_de: Optional[str] = None,
+                   data_ate: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Lançamentos do usuário do mais recente para o mais antigo (ordem inversa do arquivo),
+    lidos sob demanda. `after_id` continua a listagem depois do lançamento com esse id;
+    `data_de`/`data_ate` filtram por DataMovimento ("YYYY-MM-DD" ou "YYYY-MM-DD HH:MM:SS").
+    Como o extrato é só de acréscimo, ao passar de `data_de` a leitura para.
+    """
+    if data_ate and len(data_ate) == 10:
+        data_ate += " 23:59:59"
+    if usar_sqlite():
+        yield from pontos_repository.iter_pontos_recentes(usuario_id, after_id, data_de, data_ate)
+        return
+    with _lock:
+        _atualizar()
+        entradas = list(_state["offsets"].get(str(usuario_id), []))
+        f = open(_state["arquivo"], "rb")
+    with f:
+        entradas.reverse()
+        if after_id is not None:
+            pos = next((i for i, (_, pid) in enumerate(entradas) if pid == str(after_id)), None)
+            entradas = entradas[pos + 1:] if pos is not None else []
+        for offset, _ in entradas:
+            f.seek(offset)
+            linha = f.readline()
+            contar_bytes(f.name, len(linha))
+            p = _parse_linha(linha)
+            if not p:
+                continue
+            if data_ate and p.data_movimento > data_ate:
+                continue
+            if data_de and p.data_movimento < data_de:
+                break
+            yield p._asdict()
+
+def pagina(usuario_id, limit: int, after_id=None, data_de: Optional[str] = None,
+           data_ate: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    # uma página do histórico + cursor (id do último item) se houver mais
+    itens = list(islice(iter_historico(usuario_id, after_id, data_de, data_ate), limit + 1))
+    if len(itens) > limit:
+        itens = itens[:limit]
+        return itens, itens[-1]["id"]
+    return itens, None
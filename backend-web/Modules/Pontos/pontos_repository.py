@@ -1,23 +1,71 @@
-def get_all_pontos(filepath="../dados-teste/pontos.txt"):
-    pontos = []
-    with open(filepath, "r", encoding="utf-8") as f:
-        linhas = f.read().strip().split("\n")
-        header = linhas.pop(0)
-        for linha in linhas:
-            cols = linha.split(";")
-            pontos.append({
-                "id": cols[0],
-                "usuario_id": cols[1],
-                "tipo": cols[2],
-                "quantidade": int(cols[3]),
-                "status": cols[4],
-                "origem": cols[5],
-                "referencia_id": cols[6],
-                "observacao": cols[7],
-                "data_movimento": cols[8],
-                "registrado_por": cols[9]
-            })
-    return pontos
-
-def get_pontos_by_user(usuario_id, filepath="../dados-teste/pontos.txt"):
-    return [p for p in get_all_pontos(filepath) if p["usuario_id"] == str(usuario_id)]
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+from Modules.Shared.record_loader import Schema, iter_arquivo, cru, inteiro
+from Modules.Shared.db_connection import usar_sqlite, get_connection
+
+PONTOS_FILE = Path(__file__).resolve().parents[3] / "dados-teste" / "pontos.txt"
+
+# colunas de pontos.txt (lidas por posição se o cabeçalho tiver outros nomes)
+PONTO_SCHEMA = Schema("Ponto", [
+    ("id", ("ID",), cru),
+    ("usuario_id", ("UsuarioID",), cru),
+    ("tipo", ("Tipo",), cru),
+    ("quantidade", ("Quantidade",), inteiro),
+    ("status", ("Status",), cru),
+    ("origem", ("Origem",), cru),
+    ("referencia_id", ("ReferenciaID",), cru),
+    ("observacao", ("Observacao",), cru),
+    ("data_movimento", ("DataMovimento",), cru),
+    ("registrado_por", ("RegistradoPor",), cru),
+], posicional=True)
+
+# backend SQLite: colunas na ordem do PONTO_SCHEMA; `seq` guarda a ordem do extrato
+_SQL_COLUNAS = ", ".join(PONTO_SCHEMA.Record._fields)
+_SQL_TODOS = f"SELECT {_SQL_COLUNAS} FROM pontos ORDER BY seq"
+_SQL_POR_USUARIO = f"SELECT {_SQL_COLUNAS} FROM pontos WHERE usuario_id = ? ORDER BY seq"
+_SQL_RECENTES = f"""
+    SELECT {_SQL_COLUNAS} FROM pontos
+    WHERE usuario_id = :uid
+      AND (:after_id IS NULL OR seq < (SELECT seq FROM pontos WHERE usuario_id = :uid AND id = :after_id))
+      AND (:de IS NULL OR data_movimento >= :de)
+      AND (:ate IS NULL OR data_movimento <= :ate)
+    ORDER BY seq DESC"""
+_SQL_SALDOS = "SELECT saldo_atual, em_processamento, total, retirado FROM saldos_pontos WHERE usuario_id = ?"
+
+def iter_records() -> Iterator[Any]:
+    # registros (PONTO_SCHEMA.Record) do extrato inteiro, em ordem, sem montar dicts
+    if usar_sqlite():
+        return (PONTO_SCHEMA.Record(*r) for r in get_connection().execute(_SQL_TODOS))
+    return iter_arquivo(PONTOS_FILE, PONTO_SCHEMA)
+
+def get_all_pontos(filepath=PONTOS_FILE):
+    if usar_sqlite():
+        return [PONTO_SCHEMA.Record(*r)._asdict() for r in get_connection().execute(_SQL_TODOS)]
+    return [p._asdict() for p in iter_arquivo(filepath, PONTO_SCHEMA)]
+
+def get_pontos_by_user(usuario_id, filepath=PONTOS_FILE):
+    if usar_sqlite():
+        cur = get_connection().execute(_SQL_POR_USUARIO, (str(usuario_id),))
+        return [PONTO_SCHEMA.Record(*r)._asdict() for r in cur]
+    return [p._asdict() for p in iter_arquivo(filepath, PONTO_SCHEMA) if p.usuario_id == str(usuario_id)]
+
+# --- consultas só do backend SQLite (no backend de arquivo quem responde é o pontos_ledger) ---
+
+def get_saldos(usuario_id) -> Optional[Dict[str, int]]:
+    # saldos mantidos por trigger em saldos_pontos: busca pela chave primária
+    row = get_connection().execute(_SQL_SALDOS, (str(usuario_id),)).fetchone()
+    if row is None:
+        return None
+    return dict(zip(("saldo_atual", "em_processamento", "total", "retirado"), row))
+
+def iter_pontos_recentes(usuario_id, after_id=None, data_de: Optional[str] = None,
+                         data_ate: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    # lançamentos do mais recente para o mais antigo, lidos do cursor sob demanda
+    cur = get_connection().execute(_SQL_RECENTES, {
+        "uid": str(usuario_id),
+        "after_id": None if after_id is None else str(after_id),
+        "de": data_de,
+        "ate": data_ate,
+    })
+    for r in cur:
+        yield PONTO_SCHEMA.Record(*r)._asdict()
@@ -1,21 +1,40 @@
-from Modules.Pontos.pontos_repository import get_pontos_by_user
+import json
+from Modules.Pontos import pontos_ledger
 
-def calcular_saldos(usuario_id):
-    pontos = get_pontos_by_user(usuario_id)
-    saldo_atual = sum(
-        p["quantidade"] if p["tipo"]=="credito" and p["status"]=="confirmado"
-        else -p["quantidade"] if p["tipo"]=="debito" and p["status"]=="confirmado"
-        else 0
-        for p in pontos
-    )
-    em_processamento = sum(p["quantidade"] for p in pontos if p["status"]=="processando")
-    total = sum(p["quantidade"] for p in pontos if p["tipo"]=="credito" and p["status"]=="confirmado")
-    retirado = sum(p["quantidade"] for p in pontos if p["tipo"]=="debito" and p["status"]=="confirmado")
-
-    return {
-        "saldo_atual": saldo_atual,
-        "em_processamento": em_processamento,
-        "total": total,
-        "retirado": retirado,
-        "historico": pontos
+def calcular_saldos(usuario_id, limit=None, after_id=None, data_de=None, data_ate=None):
+    """
+    Saldos materializados (O(1)) + histórico.
+    Sem parâmetros de paginação, o histórico vem completo em ordem do arquivo (como antes).
+    Com limit/after_id/data_de/data_ate, vem uma página do mais recente para o mais
+    antigo e `next_cursor` com o id a passar em after_id para a próxima página.
+    """
+    saldos = pontos_ledger.saldos(usuario_id)
+    resultado = {
+        "saldo_atual": saldos["saldo_atual"],
+        "em_processamento": saldos["em_processamento"],
+        "total": saldos["total"],
+        "retirado": saldos["retirado"],
     }
+    if limit is None and after_id is None and not data_de and not data_ate:
+        resultado["historico"] = pontos_ledger.historico(usuario_id)
+        return resultado
+
+    if limit is None:
+        resultado["historico"] = list(pontos_ledger.iter_historico(usuario_id, after_id, data_de, data_ate))
+        resultado["next_cursor"] = None
+    else:
+        resultado["historico"], resultado["next_cursor"] = pontos_ledger.pagina(usuario_id, limit, after_id, data_de, data_ate)
+    return resultado
+
+def exportar_saldos_json(usuario_id, data_de=None, data_ate=None):
+    """
+    Mesmo conteúdo de calcular_saldos, gerado em pedaços para resposta em streaming:
+    o histórico completo nunca fica inteiro na memória.
+    """
+    saldos = pontos_ledger.saldos(usuario_id)
+    yield json.dumps(saldos)[:-1] + ', "historico": ['
+    primeiro = True
+    for p in pontos_ledger.iter_historico(usuario_id, data_de=data_de, data_ate=data_ate):
+        yield ("" if primeiro else ",") + json.dumps(p, ensure_ascii=False)
+        primeiro = False
+    yield "]}"
@@ -0,0 +1,3 @@
+
+# Modules/Shared/__init__.py
+from .record_loader import Schema, iter_arquivo
@@ -0,0 +1,155 @@
+# Modules/Shared/aquecimento.py
+"""
+Snapshot de partida (warm start) dos caches em memória.
+
+Um processo novo teria de ler os quatro arquivos de dados antes de a primeira
+requisição ficar rápida. O snapshot guarda, num arquivo binário versionado
+(cabeçalho + pickle), o estado já processado de:
+- diretório de usuários (user_directory);
+- catálogo e tabela de estoque (brindes_cache);
+- índice e saldos do extrato de pontos (pontos_ledger).
+
+Cada parte vai carimbada com a assinatura do arquivo de origem (mtime, tamanho,
+inode) e, nos arquivos só de acréscimo, com o offset e o tail já lidos. Na
+partida (`aquecer()`, chamado por app.iniciar()) as partes ainda válidas são
+carregadas e os caches completam só a cauda gravada depois do snapshot; as
+inválidas são lidas do zero, como sem snapshot. Se algo foi lido do zero ou a
+cauda passou de REGRAVAR_BYTES, o snapshot é regravado para os próximos processos.
+
+WARM_START=0 desliga; SNAPSHOT_PATH troca o arquivo (padrão: simplifique.snapshot
+na pasta dos dados). Não se aplica ao backend SQLite. O pickle só é confiável
+porque o arquivo fica junto dos dados, com as mesmas permissões.
+"""
+import os
+import pickle
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from Modules.Shared.db_connection import usar_sqlite
+
+WARM_START = os.environ.get("WARM_START", "1") != "0"
+SNAPSHOT_PATH = os.environ.get("SNAPSHOT_PATH")
+
+# cabeçalho do arquivo; mude SNAPSHOT_VERSAO quando o formato de algum estado mudar
+_MAGICA = b"SIMPLIFIQUE-SNAPSHOT\n"
+SNAPSHOT_VERSAO = 1
+
+# cauda reaplicada (em bytes) a partir da qual vale regravar o snapshot
+REGRAVAR_BYTES = 4 * 1024 * 1024
+
+_ultimo: Dict[str, Any] = {}
+
+def _partes() -> Dict[str, Tuple[Callable[[], Dict[str, Any]], Callable[[Dict[str, Any]], bool]]]:
+    # nome -> (exportar, carregar); importado aqui para não criar ciclo com os módulos de cache
+    from Modules.Brindes import brindes_cache
+    from Modules.Pontos import pontos_ledger
+    from Modules.Users import user_directory
+    return {
+        "usuarios": (user_directory.exportar_estado, user_directory.carregar_estado),
+        "catalogo": (brindes_cache.exportar_catalogo, brindes_cache.carregar_catalogo),
+        "estoque": (brindes_cache.exportar_estoque, brindes_cache.carregar_estoque),
+        "pontos": (pontos_ledger.exportar_estado, pontos_ledger.carregar_estado),
+    }
+
+def caminho() -> Path:
+    if SNAPSHOT_PATH:
+        return Path(SNAPSHOT_PATH)
+    from Modules.Movimentacoes import movimentacoes_repository as movs_repo
+    return movs_repo.MOV_FILE.parent / "simplifique.snapshot"
+
+def salvar(destino: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    Atualiza os caches e grava o snapshot de forma atômica (temporário + rename).
+    Chamar sem requisições em andamento (partida do processo ou manage.py):
+    os estados são serializados sem cópia.
+    """
+    destino = Path(destino or caminho())
+    estados = {nome: exportar() for nome, (exportar, _) in _partes().items()}
+    tmp = destino.with_name(f"{destino.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(_MAGICA)
+        f.write(SNAPSHOT_VERSAO.to_bytes(4, "little"))
+        pickle.dump({"criado": time.time(), "partes": estados}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, destino)
+    return {"arquivo": str(destino), "bytes": destino.stat().st_size, "partes": sorted(estados)}
+
+def _ler(origem: Path) -> Dict[str, Any]:
+    # estados gravados no snapshot ({} se ausente, corrompido ou de outra versão)
+    try:
+        with open(origem, "rb") as f:
+            if f.read(len(_MAGICA)) != _MAGICA or int.from_bytes(f.read(4), "little") != SNAPSHOT_VERSAO:
+                return {}
+            return pickle.load(f)["partes"]
+    except (OSError, EOFError, pickle.UnpicklingError, KeyError, ValueError):
+        return {}
+
+def _carregar_estados(estados: Dict[str, Any]) -> Dict[str, bool]:
+    carregadas = {}
+    for nome, (_, carregar_parte) in _partes().items():
+        try:
+            carregadas[nome] = nome in estados and carregar_parte(estados[nome])
+        except (OSError, KeyError, TypeError, IndexError):
+            carregadas[nome] = False
+    return carregadas
+
+def carregar(origem: Optional[Path] = None) -> Dict[str, bool]:
+    """Carrega as partes ainda válidas do snapshot nos caches: {parte: carregada?}."""
+    return _carregar_estados(_ler(Path(origem or caminho())))
+
+def _cauda(estados: Dict[str, Any], carregadas: Dict[str, bool]) -> int:
+    # bytes gravados nos logs (estoque e pontos) depois do snapshot
+    total = 0
+    for nome, estado in estados.items():
+        if carregadas.get(nome) and "offset" in estado:
+            try:
+                total += max(os.path.getsize(estado["arquivo"]) - estado["offset"], 0)
+            except OSError:
+                pass
+    return total
+
+def aquecer() -> Dict[str, Any]:
+    """
+    Partida do processo: carrega o snapshot, completa os caches (cauda dos logs
+    ou leitura do zero) e regrava o snapshot se ele estava ausente, velho ou
+    com cauda grande. Devolve o que foi feito (também em `ultimo()`).
+    """
+    if not WARM_START or usar_sqlite():
+        return {}
+    from Modules.Brindes import brindes_cache, produtos_view
+    from Modules.Pontos import pontos_ledger
+    from Modules.Users import user_directory
+
+    t0 = time.perf_counter()
+    estados = _ler(caminho())
+    carregadas = _carregar_estados(estados)
+    cauda = _cauda(estados, carregadas)
+    t_carga = time.perf_counter()
+
+    user_directory.get_by_id("")
+    brindes_cache.get_catalogo()
+    brindes_cache.get_estoque()
+    pontos_ledger.saldos("")
+    produtos_view.produtos_json()
+    t_caches = time.perf_counter()
+
+    regravado = None
+    if not all(carregadas.values()) or cauda >= REGRAVAR_BYTES:
+        try:
+            regravado = salvar()
+        except OSError:
+            pass  # pasta só leitura: segue sem snapshot
+    _ultimo.clear()
+    _ultimo.update({
+        "carregadas": carregadas,
+        "cauda_bytes": cauda,
+        "carga_ms": round((t_carga - t0) * 1e3, 1),
+        "caches_ms": round((t_caches - t_carga) * 1e3, 1),
+        "regravado": regravado,
+    })
+    return dict(_ultimo)
+
+def ultimo() -> Dict[str, Any]:
+    return dict(_ultimo)
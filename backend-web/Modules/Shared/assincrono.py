@@ -0,0 +1,371 @@
+# Modules/Shared/assincrono.py
+"""
+Base do modo assíncrono (asgi.py): um app ASGI que só depende do Werkzeug
+(que já vem com o Flask); o servidor ASGI (uvicorn) é opcional.
+
+- em_thread(fn, ...): código bloqueante (leitura dos arquivos de dados,
+  SQLite, gravações com fsync) roda no pool de ASYNC_WORKERS threads, e o
+  event loop segue atendendo as outras conexões;
+- unico(chave, fn, ...): single-flight. Chamadas simultâneas com a mesma chave
+  esperam a mesma execução em vez de ocupar uma thread cada (ex.: cem clientes
+  pedindo o catálogo quando ele acabou de mudar: uma releitura só). Quem usa
+  põe na chave a assinatura() dos arquivos lidos: uma requisição que chega
+  depois de uma gravação não pega carona numa leitura começada antes dela;
+- Rotas: as rotas async de um módulo, como um Blueprint (regras do Werkzeug,
+  mesma sintaxe do Flask);
+- AppASGI: casa a requisição com as rotas async; o que não casar (ou o que a
+  rota devolver com Delegar) vai para o app Flask, rodando no pool, com o
+  corpo recebido e a resposta enviada em streaming. Aplica a mesma política
+  de CORS do app.py e registra a duração das rotas async no histograma de
+  metricas.py.
+"""
+import asyncio
+import functools
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl
+
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import HTTPException, InternalServerError
+from werkzeug.http import parse_cookie
+from werkzeug.routing import Map, Rule
+
+from Modules.Shared import metricas
+from Modules.Shared.db_connection import db_stats, usar_sqlite
+
+ASYNC_WORKERS = int(os.environ.get("ASYNC_WORKERS", str(min(32, (os.cpu_count() or 1) + 4))))
+
+# corpo da requisição em memória até este tamanho; acima, em arquivo temporário
+_CORPO_MEMORIA = 1 << 20
+
+_lock = threading.Lock()
+_pool: Optional[ThreadPoolExecutor] = None
+# (id do loop, chave) -> futuro da execução em andamento
+_voos: Dict[Tuple[int, Hashable], "asyncio.Future"] = {}
+_stats: Dict[str, int] = {"em_thread": 0, "voos": 0, "caronas": 0, "rotas_async": 0, "delegadas": 0}
+
+class Delegar(Exception):
+    # a rota async não trata este caso: a requisição vai para o app Flask
+    pass
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=ASYNC_WORKERS, thread_name_prefix="async-io")
+        return _pool
+
+def fechar_pool():
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False)
+
+async def em_thread(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Executa fn(*args, **kwargs) no pool, sem bloquear o event loop."""
+    _stats["em_thread"] += 1
+    return await asyncio.get_running_loop().run_in_executor(_get_pool(), functools.partial(fn, *args, **kwargs))
+
+async def unico(chave: Hashable, fn: Callable[..., Any], *args) -> Any:
+    """
+    em_thread com single-flight: enquanto fn(*args) roda para `chave`, quem
+    pedir a mesma chave espera o mesmo resultado (ou a mesma exceção).
+    """
+    loop = asyncio.get_running_loop()
+    k = (id(loop), chave)
+    voo = _voos.get(k)
+    if voo is None:
+        _stats["voos"] += 1
+        voo = loop.run_in_executor(_get_pool(), functools.partial(fn, *args))
+        _voos[k] = voo
+        voo.add_done_callback(lambda _: _voos.pop(k, None))
+    else:
+        _stats["caronas"] += 1
+    # shield: um cliente que desiste não cancela a leitura dos outros
+    return await asyncio.shield(voo)
+
+def assinatura(*arquivos) -> Tuple[Any, ...]:
+    """
+    (mtime, tamanho, inode) de cada arquivo de dados lido por uma rota, para a
+    chave do single-flight; no SQLite, do banco e do WAL. Um stat por arquivo
+    (microssegundos), feito no próprio event loop.
+    """
+    if usar_sqlite():
+        banco = db_stats()["caminho"]
+        arquivos = (banco, banco + "-wal")
+    partes = []
+    for arquivo in arquivos:
+        try:
+            st = os.stat(arquivo)
+        except FileNotFoundError:
+            partes.append(None)
+            continue
+        partes.append((st.st_mtime_ns, st.st_size, st.st_ino))
+    return tuple(partes)
+
+def dumps(obj: Any) -> bytes:
+    # mesmo formato do jsonify (compacto, chaves ordenadas, ASCII, \n no fim)
+    return json.dumps(obj, sort_keys=True, separators=(",", ":")).encode("utf-8") + b"\n"
+
+class Resposta:
+    __slots__ = ("corpo", "status", "headers")
+
+    def __init__(self, corpo: bytes = b"", status: int = 200, headers: Sequence[Tuple[str, str]] = (),
+                 tipo: Optional[str] = "application/json"):
+        self.corpo = corpo
+        self.status = status
+        self.headers = ([("Content-Type", tipo)] if tipo else []) + list(headers)
+
+def json_resposta(obj: Any, status: int = 200, headers: Sequence[Tuple[str, str]] = ()) -> Resposta:
+    return Resposta(dumps(obj), status, headers)
+
+class Requisicao:
+    """O que as rotas async leem da requisição (equivalente ao `request` do Flask)."""
+
+    def __init__(self, app, scope: Dict[str, Any], corpo: bytes):
+        self.app = app  # app Flask (config, SECRET_KEY)
+        self.metodo = scope["method"]
+        self.caminho = scope["path"]
+        self.query_string: bytes = scope.get("query_string", b"")
+        self.headers: Dict[str, str] = {}
+        for nome, valor in scope.get("headers", ()):
+            nome, valor = nome.decode("latin-1").lower(), valor.decode("latin-1")
+            if nome in self.headers:
+                valor = self.headers[nome] + ("; " if nome == "cookie" else ", ") + valor
+            self.headers[nome] = valor
+        self.corpo = corpo
+        self.user: Optional[Dict[str, Any]] = None
+
+    @functools.cached_property
+    def args(self) -> MultiDict:
+        return MultiDict(parse_qsl(self.query_string.decode("latin-1"), keep_blank_values=True))
+
+    @functools.cached_property
+    def cookies(self) -> MultiDict:
+        return parse_cookie(self.headers.get("cookie", ""))
+
+    def json(self) -> Any:
+        """
+        Corpo JSON, como request.get_json(); se o tipo não for JSON ou o corpo
+        for inválido, delega ao Flask (que responde o mesmo 415/400 de sempre).
+        """
+        tipo = self.headers.get("content-type", "").split(";", 1)[0].strip().lower()
+        if tipo != "application/json" and not (tipo.startswith("application/") and tipo.endswith("+json")):
+            raise Delegar()
+        try:
+            return json.loads(self.corpo)
+        except ValueError:
+            raise Delegar()
+
+Rota = Callable[..., Awaitable[Resposta]]
+
+class Rotas:
+    """Rotas async de um módulo, no papel de um Blueprint."""
+
+    def __init__(self, nome: str):
+        self.nome = nome
+        self.regras: List[Tuple[str, List[str], Rota]] = []
+
+    def rota(self, regra: str, methods: Iterable[str] = ("GET",)):
+        def registrar(fn: Rota) -> Rota:
+            self.regras.append((regra, list(methods), fn))
+            return fn
+        return registrar
+
+def assincrono_stats() -> Dict[str, Any]:
+    return {**_stats, "workers": ASYNC_WORKERS, "em_voo": len(_voos)}
+
+class AppASGI:
+    """
+    App ASGI: rotas async + o app Flask para o resto.
+    `cors_origens`: origens do flask-cors do app.py (com credenciais).
+    `ao_iniciar`: chamado numa thread do pool no lifespan startup de cada worker.
+    """
+
+    def __init__(self, wsgi_app, rotas: Iterable[Rotas], cors_origens: Sequence[str] = (),
+                 ao_iniciar: Optional[Callable[[], Any]] = None):
+        self.wsgi_app = wsgi_app
+        self.cors_origens = list(cors_origens)
+        self.ao_iniciar = ao_iniciar
+        regras = []
+        self.handlers: List[Tuple[str, Rota]] = []
+        for grupo in rotas:
+            for regra, metodos, fn in grupo.regras:
+                regras.append(Rule(regra, endpoint=len(self.handlers), methods=metodos))
+                self.handlers.append((regra, fn))
+        self.mapa = Map(regras).bind("localhost")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            raise RuntimeError(f"Tipo de conexão não suportado: {scope['type']}")
+        corpo, tamanho = await self._receber(receive)
+        rota = None
+        # HEAD e OPTIONS (preflight do CORS) ficam com o Flask
+        if scope["method"] not in ("HEAD", "OPTIONS"):
+            try:
+                endpoint, params = self.mapa.match(scope["path"], scope["method"])
+                rota = self.handlers[endpoint]
+            except HTTPException:
+                rota = None
+        if rota is not None:
+            dados = await em_thread(corpo.read) if tamanho > _CORPO_MEMORIA else corpo.read()
+            req = Requisicao(self.wsgi_app, scope, dados)
+            resp = await self._rota_async(req, rota, params)
+            if resp is not None:
+                corpo.close()
+                await self._enviar(send, resp)
+                return
+            corpo.seek(0)
+        await self._wsgi(scope, corpo, tamanho, send)
+
+    async def _rota_async(self, req: Requisicao, rota: Tuple[str, Rota], params: Dict[str, Any]) -> Optional[Resposta]:
+        regra, fn = rota
+        inicio = time.perf_counter()
+        try:
+            resp = await fn(req, **params)
+        except Delegar:
+            return None
+        except Exception:
+            # como o Flask: registra o traceback e responde 500
+            self.wsgi_app.logger.exception("Exception on %s [%s]", req.caminho, req.metodo)
+            erro = InternalServerError()
+            resp = Resposta(erro.get_body().encode("utf-8"), erro.code, tipo="text/html; charset=utf-8")
+        _stats["rotas_async"] += 1
+        # CORS só para requisições com Origin permitido, como o flask-cors do app.py
+        origem = req.headers.get("origin")
+        if origem is not None and origem in self.cors_origens:
+            resp.headers += [("Access-Control-Allow-Origin", origem),
+                             ("Access-Control-Allow-Credentials", "true")]
+        if metricas.METRICAS:
+            metricas.observar("simplifique_http_request_duration_seconds",
+                              (("method", req.metodo), ("route", regra), ("status", str(resp.status))),
+                              time.perf_counter() - inicio)
+        return resp
+
+    async def _receber(self, receive):
+        # corpo inteiro, em memória ou (acima de _CORPO_MEMORIA) em arquivo temporário
+        corpo = tempfile.SpooledTemporaryFile(max_size=_CORPO_MEMORIA)
+        tamanho = 0
+        while True:
+            msg = await receive()
+            if msg["type"] == "http.disconnect":
+                break
+            parte = msg.get("body", b"")
+            if parte:
+                tamanho += len(parte)
+                if tamanho > _CORPO_MEMORIA:
+                    await em_thread(corpo.write, parte)
+                else:
+                    corpo.write(parte)
+            if not msg.get("more_body"):
+                break
+        corpo.seek(0)
+        return corpo, tamanho
+
+    async def _enviar(self, send, resp: Resposta):
+        headers = [(nome.lower().encode("latin-1"), valor.encode("latin-1")) for nome, valor in resp.headers]
+        if resp.status != 304:
+            headers.append((b"content-length", str(len(resp.corpo)).encode("latin-1")))
+        await send({"type": "http.response.start", "status": resp.status, "headers": headers})
+        await send({"type": "http.response.body", "body": resp.corpo if resp.status != 304 else b""})
+
+    def _environ(self, scope, corpo, tamanho: int) -> Dict[str, Any]:
+        servidor = scope.get("server") or ("localhost", 80)
+        cliente = scope.get("client") or ("", 0)
+        environ = {
+            "REQUEST_METHOD": scope["method"],
+            "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+            "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+            "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+            "SERVER_NAME": servidor[0],
+            "SERVER_PORT": str(servidor[1]),
+            "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+            "REMOTE_ADDR": cliente[0],
+            "REMOTE_PORT": str(cliente[1]),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+            "wsgi.input": corpo,
+            "wsgi.input_terminated": True,
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": True,
+            "wsgi.run_once": False,
+        }
+        for nome, valor in scope.get("headers", ()):
+            chave = nome.decode("latin-1").upper().replace("-", "_")
+            valor = valor.decode("latin-1")
+            if chave not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+                chave = "HTTP_" + chave
+            if chave in environ:
+                valor = environ[chave] + ("; " if chave == "HTTP_COOKIE" else ",") + valor
+            environ[chave] = valor
+        # o corpo já foi recebido inteiro (inclusive se veio em chunked)
+        environ["CONTENT_LENGTH"] = str(tamanho)
+        environ.pop("HTTP_TRANSFER_ENCODING", None)
+        return environ
+
+    async def _wsgi(self, scope, corpo, tamanho: int, send):
+        # roda o app Flask no pool; cada pedaço da resposta é enviado pelo event loop
+        _stats["delegadas"] += 1
+        loop = asyncio.get_running_loop()
+        environ = self._environ(scope, corpo, tamanho)
+
+        def enviar(msg: Dict[str, Any]):
+            asyncio.run_coroutine_threadsafe(send(msg), loop).result()
+
+        def rodar():
+            estado: Dict[str, Any] = {"inicio": None, "enviado": False}
+
+            def escrever(dados: bytes):
+                if not estado["enviado"]:
+                    enviar(estado["inicio"])
+                    estado["enviado"] = True
+                if dados:
+                    enviar({"type": "http.response.body", "body": dados, "more_body": True})
+
+            def start_response(status: str, headers, exc_info=None):
+                if exc_info and estado["enviado"]:
+                    raise exc_info[1].with_traceback(exc_info[2])
+                estado["inicio"] = {"type": "http.response.start", "status": int(status.split(" ", 1)[0]),
+                                    "headers": [(n.lower().encode("latin-1"), v.encode("latin-1")) for n, v in headers]}
+                return escrever
+
+            resultado = self.wsgi_app(environ, start_response)
+            try:
+                for parte in resultado:
+                    if parte:
+                        escrever(parte)
+                escrever(b"")
+                enviar({"type": "http.response.body", "body": b"", "more_body": False})
+            finally:
+                if hasattr(resultado, "close"):
+                    resultado.close()
+                corpo.close()
+
+        await em_thread(rodar)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            msg = await receive()
+            if msg["type"] == "lifespan.startup":
+                try:
+                    if self.ao_iniciar is not None:
+                        await em_thread(self.ao_iniciar)
+                except Exception as exc:
+                    await send({"type": "lifespan.startup.failed", "message": f"{type(exc).__name__}: {exc}"})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif msg["type"] == "lifespan.shutdown":
+                fechar_pool()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
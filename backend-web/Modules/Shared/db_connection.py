@@ -0,0 +1,241 @@
+# Modules/Shared/db_connection.py
+"""
+Seleção do backend de armazenamento e conexões SQLite.
+
+Backends (STORAGE_BACKEND):
+  - "file": arquivos .txt de dados-teste (padrão, comportamento atual);
+  - "sqlite": banco SQLite em SQLITE_PATH (importe os .txt com
+    `python manage.py migrar-sqlite`).
+
+No SQLite cada thread tem a sua conexão (sqlite3 não compartilha conexões entre
+threads), aberta em modo WAL: leitores não bloqueiam o escritor e vice-versa.
+As consultas usam SQL fixo com parâmetros, então ficam no cache de statements
+preparados de cada conexão. Estoque por variante e saldo por usuário são
+mantidos por triggers em tabelas próprias, e cada domínio tem um contador de
+versão (tabela meta) que os caches em memória usam no lugar da assinatura do arquivo.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "file")
+SQLITE_PATH = Path(os.environ.get(
+    "SQLITE_PATH", Path(__file__).resolve().parents[3] / "dados-teste" / "simplifique.db"))
+
+_config: Dict[str, Any] = {"backend": STORAGE_BACKEND, "caminho": SQLITE_PATH}
+
+_local = threading.local()
+_lock = threading.Lock()
+_iniciados = set()  # bancos cujo schema já foi conferido neste processo
+_stats: Dict[str, int] = {"conexoes": 0, "transacoes": 0}
+
+def _estoque_upsert(alias: str, sinal: str) -> str:
+    # soma (sinal "+") ou desfaz (sinal "-") a contribuição da movimentação no estoque
+    return f"""
+        INSERT INTO estoque_variante (variant_id, confirmado, pendente)
+        VALUES ({alias}.VARIANT_ID,
+                {sinal}(CASE WHEN {alias}.STATUS = 'confirmed'
+                             THEN (CASE {alias}.TYPE WHEN 'IN' THEN {alias}.QTD ELSE -{alias}.QTD END)
+                             ELSE 0 END),
+                {sinal}(CASE WHEN {alias}.TYPE = 'OUT' AND {alias}.STATUS = 'processing'
+                             THEN {alias}.QTD ELSE 0 END))
+        ON CONFLICT (variant_id) DO UPDATE SET
+            confirmado = confirmado + excluded.confirmado,
+            pendente = pendente + excluded.pendente;"""
+
+def _saldo_upsert(alias: str, sinal: str) -> str:
+    # mesmas regras de pontos_ledger._aplicar
+    confirmado = f"{alias}.status = 'confirmado'"
+    return f"""
+        INSERT INTO saldos_pontos (usuario_id, saldo_atual, em_processamento, total, retirado)
+        VALUES ({alias}.usuario_id,
+                {sinal}(CASE WHEN {confirmado} AND {alias}.tipo = 'credito' THEN {alias}.quantidade
+                             WHEN {confirmado} AND {alias}.tipo = 'debito' THEN -{alias}.quantidade
+                             ELSE 0 END),
+                {sinal}(CASE WHEN {alias}.status = 'processando' THEN {alias}.quantidade ELSE 0 END),
+                {sinal}(CASE WHEN {confirmado} AND {alias}.tipo = 'credito' THEN {alias}.quantidade ELSE 0 END),
+                {sinal}(CASE WHEN {confirmado} AND {alias}.tipo = 'debito' THEN {alias}.quantidade ELSE 0 END))
+        ON CONFLICT (usuario_id) DO UPDATE SET
+            saldo_atual = saldo_atual + excluded.saldo_atual,
+            em_processamento = em_processamento + excluded.em_processamento,
+            total = total + excluded.total,
+            retirado = retirado + excluded.retirado;"""
+
+def _versao_bump(chave: str) -> str:
+    return f"UPDATE meta SET valor = valor + 1 WHERE chave = '{chave}';"
+
+# colunas com os mesmos nomes dos campos dos Schemas de cada repositório
+SCHEMA_SQL = f"""
+CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta (chave, valor) VALUES
+    ('usuarios', 0), ('catalogo', 0), ('movimentacoes', 0), ('pontos', 0);
+
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY, np TEXT NOT NULL, senha_hash TEXT, perfil TEXT, nome TEXT,
+    departamento TEXT, ativo INTEGER NOT NULL DEFAULT 1, ultimo_login TEXT, data_cadastro TEXT);
+CREATE INDEX IF NOT EXISTS idx_users_np ON users (np);
+
+CREATE TABLE IF NOT EXISTS brindes (
+    linha INTEGER PRIMARY KEY,
+    ativo TEXT, id INTEGER NOT NULL, product_id INTEGER, sku TEXT, name TEXT, description TEXT,
+    details TEXT, category TEXT, size TEXT, pointsCost INTEGER, stockInitial INTEGER,
+    imageUrl TEXT, createdAt TEXT, updatedAt TEXT, tags TEXT);
+CREATE INDEX IF NOT EXISTS idx_brindes_id ON brindes (id);
+CREATE INDEX IF NOT EXISTS idx_brindes_ativo ON brindes (ativo);
+
+CREATE TABLE IF NOT EXISTS movimentacoes (
+    MOV_ID INTEGER PRIMARY KEY AUTOINCREMENT, USER_ID INTEGER, VARIANT_ID INTEGER, PRODUCT_ID INTEGER,
+    SKU TEXT, QTD INTEGER, POINTS_TOTAL INTEGER, TYPE TEXT, STATUS TEXT, CREATED_AT TEXT);
+CREATE INDEX IF NOT EXISTS idx_movs_variant ON movimentacoes (VARIANT_ID, STATUS);
+CREATE INDEX IF NOT EXISTS idx_movs_user ON movimentacoes (USER_ID);
+-- reservas em aberto por data, para a varredura das vencidas (Movimentacoes/reservas.py)
+CREATE INDEX IF NOT EXISTS idx_movs_processing ON movimentacoes (CREATED_AT) WHERE STATUS = 'processing';
+
+CREATE TABLE IF NOT EXISTS estoque_variante (
+    variant_id INTEGER PRIMARY KEY,
+    confirmado INTEGER NOT NULL DEFAULT 0,  -- delta líquido das movimentações confirmadas
+    pendente INTEGER NOT NULL DEFAULT 0);   -- saídas ainda em 'processing'
+
+CREATE TABLE IF NOT EXISTS pontos (
+    seq INTEGER PRIMARY KEY,
+    id TEXT, usuario_id TEXT NOT NULL, tipo TEXT, quantidade INTEGER, status TEXT, origem TEXT,
+    referencia_id TEXT, observacao TEXT, data_movimento TEXT, registrado_por TEXT);
+CREATE INDEX IF NOT EXISTS idx_pontos_usuario ON pontos (usuario_id, seq);
+
+CREATE TABLE IF NOT EXISTS saldos_pontos (
+    usuario_id TEXT PRIMARY KEY,
+    saldo_atual INTEGER NOT NULL DEFAULT 0, em_processamento INTEGER NOT NULL DEFAULT 0,
+    total INTEGER NOT NULL DEFAULT 0, retirado INTEGER NOT NULL DEFAULT 0);
+
+CREATE TRIGGER IF NOT EXISTS tr_users_ai AFTER INSERT ON users BEGIN {_versao_bump('usuarios')} END;
+CREATE TRIGGER IF NOT EXISTS tr_users_au AFTER UPDATE ON users BEGIN {_versao_bump('usuarios')} END;
+CREATE TRIGGER IF NOT EXISTS tr_users_ad AFTER DELETE ON users BEGIN {_versao_bump('usuarios')} END;
+
+CREATE TRIGGER IF NOT EXISTS tr_brindes_ai AFTER INSERT ON brindes BEGIN {_versao_bump('catalogo')} END;
+CREATE TRIGGER IF NOT EXISTS tr_brindes_au AFTER UPDATE ON brindes BEGIN {_versao_bump('catalogo')} END;
+CREATE TRIGGER IF NOT EXISTS tr_brindes_ad AFTER DELETE ON brindes BEGIN {_versao_bump('catalogo')} END;
+
+CREATE TRIGGER IF NOT EXISTS tr_movs_ai AFTER INSERT ON movimentacoes BEGIN
+    {_versao_bump('movimentacoes')}
+END;
+CREATE TRIGGER IF NOT EXISTS tr_movs_ai_estoque AFTER INSERT ON movimentacoes
+WHEN NEW.TYPE IN ('IN', 'OUT') BEGIN
+    {_estoque_upsert('NEW', '+')}
+END;
+CREATE TRIGGER IF NOT EXISTS tr_movs_au AFTER UPDATE ON movimentacoes BEGIN
+    {_versao_bump('movimentacoes')}
+END;
+CREATE TRIGGER IF NOT EXISTS tr_movs_au_estoque AFTER UPDATE ON movimentacoes
+WHEN NEW.TYPE IN ('IN', 'OUT') OR OLD.TYPE IN ('IN', 'OUT') BEGIN
+    {_estoque_upsert('OLD', '-')}
+    {_estoque_upsert('NEW', '+')}
+END;
+CREATE TRIGGER IF NOT EXISTS tr_movs_ad AFTER DELETE ON movimentacoes BEGIN
+    {_versao_bump('movimentacoes')}
+END;
+CREATE TRIGGER IF NOT EXISTS tr_movs_ad_estoque AFTER DELETE ON movimentacoes
+WHEN OLD.TYPE IN ('IN', 'OUT') BEGIN
+    {_estoque_upsert('OLD', '-')}
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_pontos_ai AFTER INSERT ON pontos BEGIN
+    {_versao_bump('pontos')}
+    {_saldo_upsert('NEW', '+')}
+END;
+CREATE TRIGGER IF NOT EXISTS tr_pontos_au AFTER UPDATE ON pontos BEGIN
+    {_versao_bump('pontos')}
+    {_saldo_upsert('OLD', '-')}
+    {_saldo_upsert('NEW', '+')}
+END;
+CREATE TRIGGER IF NOT EXISTS tr_pontos_ad AFTER DELETE ON pontos BEGIN
+    {_versao_bump('pontos')}
+    {_saldo_upsert('OLD', '-')}
+END;
+"""
+
+def configurar(backend: str = None, caminho=None):
+    """
+    Define o backend ("file" ou "sqlite") e o arquivo do banco.
+    Chamado pelo app.py com os valores de app.config.
+    """
+    if backend not in (None, "file", "sqlite"):
+        raise ValueError(f"STORAGE_BACKEND inválido: {backend}")
+    with _lock:
+        if backend:
+            _config["backend"] = backend
+        if caminho:
+            _config["caminho"] = Path(caminho)
+
+def usar_sqlite() -> bool:
+    return _config["backend"] == "sqlite"
+
+def _abrir(caminho: Path) -> sqlite3.Connection:
+    # isolation_level=None: transações só onde transacao() abrir BEGIN explicitamente
+    conn = sqlite3.connect(str(caminho), isolation_level=None, cached_statements=256, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    with _lock:
+        _stats["conexoes"] += 1
+        if caminho not in _iniciados:
+            conn.executescript(SCHEMA_SQL)
+            _iniciados.add(caminho)
+    return conn
+
+def get_connection() -> sqlite3.Connection:
+    # conexão da thread atual (aberta na primeira chamada)
+    caminho = _config["caminho"]
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.caminho != caminho:
+        if conn is not None:
+            conn.close()
+        _local.conn = conn = _abrir(caminho)
+        _local.caminho = caminho
+        _local.profundidade = 0
+    return conn
+
+def fechar_conexao():
+    # fecha a conexão da thread atual (ex.: ao final de um worker)
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+@contextmanager
+def transacao() -> Iterator[sqlite3.Connection]:
+    """
+    Transação de escrita (BEGIN IMMEDIATE): trava o banco para outros escritores,
+    entre threads e processos, até o COMMIT. Reentrante na mesma thread: só a
+    transação mais externa faz COMMIT/ROLLBACK.
+    """
+    conn = get_connection()
+    if _local.profundidade:
+        _local.profundidade += 1
+        try:
+            yield conn
+        finally:
+            _local.profundidade -= 1
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    _local.profundidade = 1
+    try:
+        yield conn
+    except BaseException:
+        _local.profundidade = 0
+        conn.execute("ROLLBACK")
+        raise
+    _local.profundidade = 0
+    conn.execute("COMMIT")
+    with _lock:
+        _stats["transacoes"] += 1
+
+def versao(chave: str) -> int:
+    # contador de alterações do domínio ('usuarios', 'catalogo', 'movimentacoes', 'pontos')
+    row = get_connection().execute("SELECT valor FROM meta WHERE chave = ?", (chave,)).fetchone()
+    return row[0] if row else 0
+
+def db_stats() -> Dict[str, Any]:
+    with _lock:
+        return {**_stats, "backend": _config["backend"], "caminho": str(_config["caminho"])}
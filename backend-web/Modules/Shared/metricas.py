@@ -0,0 +1,180 @@
+# Modules/Shared/metricas.py
+"""
+Instrumentação leve em processo.
+
+- histograma de duração por rota (hooks before/after_request registrados no app);
+- histograma por span (`with span("nome"):`) em pontos caros: leitura dos
+  arquivos, bcrypt, jwt.decode, serialização da visão de produtos;
+- contador de bytes lidos por arquivo de dados;
+- exportação no formato texto do Prometheus (GET /api/admin/metrics).
+
+Perfil opt-in com cProfile: com PROFILE_SAMPLE_RATE > 0 essa fração das
+requisições roda sob o profiler, e as que passam de PROFILE_SLOW_MS guardam
+o relatório (top por tempo acumulado) em /api/admin/metrics/perfis.
+METRICAS=0 desliga os hooks e os spans.
+"""
+import bisect
+import cProfile
+import io
+import os
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Tuple
+
+METRICAS = os.environ.get("METRICAS", "1") != "0"
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_SLOW_MS = float(os.environ.get("PROFILE_SLOW_MS", "200"))
+PROFILE_MAX = 20
+
+# limites superiores dos buckets, em segundos
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_lock = threading.Lock()
+# (métrica, labels) -> [contagens por bucket (+Inf no fim), soma, total]
+_histogramas: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], List[Any]] = {}
+_bytes_lidos: Dict[str, int] = {}
+_perfis: "deque[Dict[str, Any]]" = deque(maxlen=PROFILE_MAX)
+
+_HELP = {
+    "simplifique_http_request_duration_seconds": "Duração das requisições por rota",
+    "simplifique_span_duration_seconds": "Duração dos trechos instrumentados",
+}
+
+def observar(metrica: str, labels: Tuple[Tuple[str, str], ...], segundos: float):
+    i = bisect.bisect_left(BUCKETS, segundos)
+    with _lock:
+        h = _histogramas.get((metrica, labels))
+        if h is None:
+            h = _histogramas[(metrica, labels)] = [[0] * (len(BUCKETS) + 1), 0.0, 0]
+        h[0][i] += 1
+        h[1] += segundos
+        h[2] += 1
+
+class span:
+    """
+    Mede o bloco e registra no histograma de spans:
+        with span("bcrypt.checkpw"):
+            ...
+    """
+    __slots__ = ("labels", "inicio")
+
+    def __init__(self, nome: str):
+        self.labels = (("span", nome),)
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if METRICAS:
+            observar("simplifique_span_duration_seconds", self.labels, time.perf_counter() - self.inicio)
+        return False
+
+def contar_bytes(path, n: int):
+    # bytes lidos de um arquivo de dados (label = nome do arquivo)
+    if not METRICAS or n <= 0:
+        return
+    nome = os.path.basename(str(path))
+    with _lock:
+        _bytes_lidos[nome] = _bytes_lidos.get(nome, 0) + n
+
+# ---------------------------------------------------------------------------
+# hooks do Flask
+# ---------------------------------------------------------------------------
+
+def registrar(app):
+    """Registra os hooks before/after_request no app."""
+    if not METRICAS:
+        return
+    from flask import g, request
+
+    @app.before_request
+    def _inicio_requisicao():
+        g.metricas_inicio = time.perf_counter()
+        g.metricas_perfil = None
+        if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+            perfil = cProfile.Profile()
+            try:
+                perfil.enable()
+            except ValueError:  # outro profiler já ativo (ex.: outra requisição)
+                return
+            g.metricas_perfil = perfil
+
+    @app.after_request
+    def _fim_requisicao(resp):
+        inicio = g.pop("metricas_inicio", None)
+        if inicio is None:
+            return resp
+        duracao = time.perf_counter() - inicio
+        rota = request.url_rule.rule if request.url_rule else "<sem_rota>"
+        observar("simplifique_http_request_duration_seconds",
+                 (("method", request.method), ("route", rota), ("status", str(resp.status_code))), duracao)
+        perfil = g.pop("metricas_perfil", None)
+        if perfil is not None:
+            perfil.disable()
+            if duracao * 1e3 >= PROFILE_SLOW_MS:
+                _guardar_perfil(perfil, request.method, request.full_path, duracao)
+        return resp
+
+def _guardar_perfil(perfil: cProfile.Profile, metodo: str, caminho: str, duracao: float):
+    saida = io.StringIO()
+    pstats.Stats(perfil, stream=saida).sort_stats("cumulative").print_stats(30)
+    with _lock:
+        _perfis.append({
+            "metodo": metodo,
+            "caminho": caminho,
+            "duracao_ms": round(duracao * 1e3, 2),
+            "quando": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "relatorio": saida.getvalue(),
+        })
+
+def perfis() -> List[Dict[str, Any]]:
+    # perfis das requisições lentas amostradas, mais recentes primeiro
+    with _lock:
+        return list(reversed(_perfis))
+
+# ---------------------------------------------------------------------------
+# exportação
+# ---------------------------------------------------------------------------
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _labels(pares) -> str:
+    return ",".join(f'{k}="{_escapar(v)}"' for k, v in pares)
+
+def prometheus() -> str:
+    """Todas as métricas no formato texto do Prometheus (versão 0.0.4)."""
+    with _lock:
+        histogramas = sorted((k, [list(v[0]), v[1], v[2]]) for k, v in _histogramas.items())
+        bytes_lidos = sorted(_bytes_lidos.items())
+
+    linhas: List[str] = []
+    atual = None
+    for (metrica, labels), (contagens, soma, total) in histogramas:
+        if metrica != atual:
+            atual = metrica
+            linhas.append(f"# HELP {metrica} {_HELP.get(metrica, metrica)}")
+            linhas.append(f"# TYPE {metrica} histogram")
+        acumulado = 0
+        for limite, n in zip(BUCKETS, contagens):
+            acumulado += n
+            linhas.append(f"{metrica}_bucket{{{_labels(labels + (('le', repr(limite)),))}}} {acumulado}")
+        linhas.append(f"{metrica}_bucket{{{_labels(labels + (('le', '+Inf'),))}}} {total}")
+        linhas.append(f"{metrica}_sum{{{_labels(labels)}}} {soma!r}")
+        linhas.append(f"{metrica}_count{{{_labels(labels)}}} {total}")
+
+    linhas.append("# HELP simplifique_arquivo_bytes_lidos_total Bytes lidos dos arquivos de dados")
+    linhas.append("# TYPE simplifique_arquivo_bytes_lidos_total counter")
+    for nome, n in bytes_lidos:
+        linhas.append(f"simplifique_arquivo_bytes_lidos_total{{{_labels((('arquivo', nome),))}}} {n}")
+    return "\n".join(linhas) + "\n"
+
+def resetar():
+    with _lock:
+        _histogramas.clear()
+        _bytes_lidos.clear()
+        _perfis.clear()
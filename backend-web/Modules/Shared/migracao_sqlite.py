@@ -0,0 +1,65 @@
+# Modules/Shared/migracao_sqlite.py
+"""
+Importa os arquivos .txt de dados-teste para o banco SQLite (backend "sqlite").
+
+As tabelas são esvaziadas e preenchidas numa única transação; os triggers
+recalculam estoque_variante e saldos_pontos durante a carga. Os arquivos são
+lidos direto (iter_arquivo + Schemas dos repositórios), independente do backend
+configurado. Movimentações: os eventos de status do log são aplicados antes da carga.
+"""
+from typing import Any, Dict
+
+from Modules.Shared.db_connection import transacao
+from Modules.Shared.record_loader import iter_arquivo
+
+def _placeholders(n: int) -> str:
+    return ", ".join("?" * n)
+
+def migrar_arquivos() -> Dict[str, Any]:
+    from Modules.Users.user_repository import USERS_FILE, USER_SCHEMA
+    from Modules.Brindes.brindes_repository import DATA_FILE, BRINDE_SCHEMA
+    from Modules.Movimentacoes import movimentacoes_repository as movs_repo
+    from Modules.Pontos.pontos_repository import PONTOS_FILE, PONTO_SCHEMA
+
+    resultado: Dict[str, Any] = {}
+    with transacao() as conn:
+        for tabela in ("users", "brindes", "movimentacoes", "estoque_variante", "pontos", "saldos_pontos"):
+            conn.execute(f"DELETE FROM {tabela}")
+
+        campos = USER_SCHEMA.Record._fields
+        usuarios = [u._replace(ativo=int(u.ativo)) for u in iter_arquivo(USERS_FILE, USER_SCHEMA)]
+        conn.executemany(f"INSERT OR REPLACE INTO users ({', '.join(campos)}) "
+                         f"VALUES ({_placeholders(len(campos))})", usuarios)
+        resultado["usuarios"] = len(usuarios)
+
+        campos = BRINDE_SCHEMA.Record._fields
+        brindes = list(iter_arquivo(DATA_FILE, BRINDE_SCHEMA)) if DATA_FILE.exists() else []
+        conn.executemany(f"INSERT INTO brindes ({', '.join(campos)}) "
+                         f"VALUES ({_placeholders(len(campos))})", brindes)
+        resultado["brindes"] = len(brindes)
+
+        # mesmo fold de load_movs, mas sempre sobre o arquivo; linhas sem MOV_ID
+        # válido (ex.: cabeçalho legado) não têm como ser importadas
+        movs: Dict[int, Any] = {}
+        ignoradas = 0
+        if movs_repo.MOV_FILE.exists():
+            for r in iter_arquivo(movs_repo.MOV_FILE, movs_repo.MOV_SCHEMA):
+                if r.TYPE == movs_repo.EVENT_TYPE:
+                    if r.MOV_ID in movs:
+                        movs[r.MOV_ID] = movs[r.MOV_ID]._replace(STATUS=r.STATUS)
+                elif r.MOV_ID > 0:
+                    movs[r.MOV_ID] = r
+                else:
+                    ignoradas += 1
+        campos = movs_repo.MOV_SCHEMA.Record._fields
+        conn.executemany(f"INSERT INTO movimentacoes ({', '.join(campos)}) "
+                         f"VALUES ({_placeholders(len(campos))})", movs.values())
+        resultado["movimentacoes"] = len(movs)
+        resultado["movimentacoes_ignoradas"] = ignoradas
+
+        campos = PONTO_SCHEMA.Record._fields
+        pontos = list(iter_arquivo(PONTOS_FILE, PONTO_SCHEMA))
+        conn.executemany(f"INSERT INTO pontos ({', '.join(campos)}) "
+                         f"VALUES ({_placeholders(len(campos))})", pontos)
+        resultado["pontos"] = len(pontos)
+    return resultado
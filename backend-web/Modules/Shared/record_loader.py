@@ -0,0 +1,145 @@
+# Modules/Shared/record_loader.py
+"""
+Leitor de registros compartilhado pelos repositórios de arquivo (.txt com ';').
+
+Cada arquivo é descrito por um Schema: campos, apelidos de cabeçalho aceitos e
+conversor de cada campo. Para um cabeçalho, o Schema é "compilado" uma vez:
+os apelidos viram índices de coluna e é gerada uma função de parse dedicada,
+que transforma a lista do csv.reader num registro compacto (namedtuple, sem
+__dict__ por linha). A leitura é em streaming, linha a linha, sem f.read().
+"""
+import csv
+from collections import namedtuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .metricas import contar_bytes
+
+# ---------------------------------------------------------------------------
+# conversores de campo
+# ---------------------------------------------------------------------------
+
+def texto(val: str) -> str:
+    return val.strip()
+
+def texto_ou_none(val: str) -> Optional[str]:
+    return val.strip() or None
+
+def cru(val: str) -> str:
+    # valor como está no arquivo (o parse gerado nem chama a função)
+    return val
+
+def inteiro(val: str) -> int:
+    # vazio ou inválido vira 0
+    try:
+        return int(val.strip())
+    except ValueError:
+        return 0
+
+def flag(val: str) -> bool:
+    return val.strip() == "1"
+
+# ---------------------------------------------------------------------------
+# schema
+# ---------------------------------------------------------------------------
+
+class Schema:
+    """
+    campos: sequência de (nome, apelidos_de_cabecalho, conversor).
+    posicional=True: campo sem apelido no cabeçalho usa a coluna da sua posição
+    no schema (arquivos lidos por posição, como users.txt e pontos.txt).
+    """
+
+    def __init__(self, nome: str, campos: Sequence[Tuple[str, Sequence[str], Callable[[str], Any]]],
+                 posicional: bool = False):
+        self.nome = nome
+        self.campos = list(campos)
+        self.posicional = posicional
+        self.Record = namedtuple(nome, [c[0] for c in self.campos])
+        self._compilados: Dict[Tuple[str, ...], Callable[[List[str]], Any]] = {}
+
+    def indices(self, header: Sequence[str]) -> List[Optional[int]]:
+        # resolve apelidos -> índice de coluna (primeiro apelido presente vence)
+        posicoes = {}
+        for i, col in enumerate(header):
+            posicoes.setdefault(col.strip(), i)
+        indices = []
+        for pos, (nome, apelidos, _) in enumerate(self.campos):
+            idx = next((posicoes[a] for a in apelidos if a in posicoes), None)
+            if idx is None and self.posicional and pos < len(header):
+                idx = pos
+            indices.append(idx)
+        return indices
+
+    def compilar(self, header: Sequence[str]) -> Callable[[List[str]], Any]:
+        """
+        Função row -> Record para este cabeçalho (gerada e guardada na 1ª vez).
+        Linhas curtas são completadas com "" antes da conversão.
+        """
+        chave = tuple(header)
+        parse = self._compilados.get(chave)
+        if parse is not None:
+            return parse
+
+        indices = self.indices(header)
+        largura = max([i for i in indices if i is not None], default=-1) + 1
+        ns: Dict[str, Any] = {"_new": tuple.__new__, "_cls": self.Record}
+        exprs = []
+        for n, (idx, (_, _, conv)) in enumerate(zip(indices, self.campos)):
+            ns[f"_c{n}"] = conv
+            if conv is cru:
+                exprs.append(f"row[{idx}]" if idx is not None else "''")
+            else:
+                exprs.append(f"_c{n}(row[{idx}])" if idx is not None else f"_c{n}('')")
+        src = (
+            "def _parse(row):\n"
+            f"    if len(row) < {largura}:\n"
+            f"        row = row + [''] * ({largura} - len(row))\n"
+            f"    return _new(_cls, ({', '.join(exprs)},))\n"
+        )
+        exec(compile(src, f"<schema {self.nome}>", "exec"), ns)
+        parse = ns["_parse"]
+        self._compilados[chave] = parse
+        return parse
+
+def ler_linha(linha: str) -> List[str]:
+    # colunas de uma única linha (cabeçalho ou dados)
+    return next(csv.reader([linha], delimiter=";"), [])
+
+def iter_arquivo(path, schema: Schema) -> Iterator[Any]:
+    """
+    Percorre o arquivo em streaming devolvendo um Record por linha não vazia.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        try:
+            reader = csv.reader(f, delimiter=";")
+            header = next(reader, None)
+            if header is None:
+                return
+            parse = schema.compilar(header)
+            for row in reader:
+                if row:
+                    yield parse(row)
+        finally:
+            contar_bytes(path, f.buffer.tell())
+
+def parse_linhas(linhas: Sequence[str], parse: Callable[[List[str]], Any]) -> List[Any]:
+    # converte linhas de texto já lidas (ex.: trecho novo de um log) em Records
+    return [parse(row) for row in csv.reader(linhas, delimiter=";") if row]
+
+def ler_desde(path, schema: Schema, offset: int) -> Tuple[List[Any], int]:
+    """
+    Registros das linhas completas gravadas a partir do byte `offset`
+    (0 = início do arquivo, pulando o cabeçalho) e o offset seguinte.
+    Uma linha ainda incompleta no fim do arquivo fica para a próxima leitura.
+    """
+    with open(path, "rb") as f:
+        header = f.readline()
+        f.seek(max(offset, len(header)))
+        data = f.read()
+        start = f.tell() - len(data)
+    contar_bytes(path, len(header) + len(data))
+    end = data.rfind(b"\n") + 1
+    if end <= 0:
+        return [], start
+    parse = schema.compilar(ler_linha(header.decode("utf-8")))
+    return parse_linhas(data[:end].decode("utf-8").splitlines(), parse), start + end
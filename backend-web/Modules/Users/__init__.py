@@ -1,4 +1,5 @@
 
 # Modules/Users/__init__.py
 from .user_repository import get_user_by_np
+from .user_directory import get_by_np, get_by_id
 
@@ -0,0 +1,76 @@
+# Modules/Users/user_directory.py
+"""
+Diretório de usuários em memória (por processo).
+
+Carrega users.txt uma vez em dois índices (NP -> usuário e ID -> usuário) e só
+recarrega quando mtime/tamanho do arquivo mudam. Busca por NP ou ID é O(1).
+Os dicts retornados são compartilhados: não altere, copie antes.
+O estado pode ser exportado/carregado pelo snapshot de partida (Shared/aquecimento.py).
+Com o backend SQLite não há cópia em memória: a busca vai direto ao índice do banco.
+"""
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from Modules.Shared.db_connection import usar_sqlite
+from Modules.Shared.metricas import span
+from Modules.Users import user_repository
+
+_lock = threading.Lock()
+
+_state: Dict[str, Any] = {"arquivo": None, "assinatura": None, "por_np": {}, "por_id": {}}
+
+_stats: Dict[str, int] = {"hits": 0, "reloads": 0}
+
+def _assinatura(path) -> Tuple[int, int, int]:
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+def _atualizar():
+    path = user_repository.USERS_FILE
+    assinatura = _assinatura(path)
+    if _state["arquivo"] == path and _state["assinatura"] == assinatura:
+        _stats["hits"] += 1
+        return
+    with span("usuarios.load"):
+        usuarios = user_repository.get_all_users(path)
+    _state.update({
+        "arquivo": path,
+        "assinatura": assinatura,
+        "por_np": {u["np"]: u for u in usuarios},
+        "por_id": {u["id"]: u for u in usuarios},
+    })
+    _stats["reloads"] += 1
+
+def get_by_np(np) -> Optional[Dict[str, Any]]:
+    if usar_sqlite():
+        return user_repository.get_user_by_np(str(np))
+    with _lock:
+        _atualizar()
+        return _state["por_np"].get(str(np))
+
+def get_by_id(user_id) -> Optional[Dict[str, Any]]:
+    if usar_sqlite():
+        return user_repository.get_user_by_id(user_id)
+    with _lock:
+        _atualizar()
+        return _state["por_id"].get(str(user_id))
+
+def exportar_estado() -> Dict[str, Any]:
+    # índices atuais, para o snapshot de partida
+    with _lock:
+        _atualizar()
+        return {**_state, "arquivo": str(_state["arquivo"])}
+
+def carregar_estado(estado: Dict[str, Any]) -> bool:
+    # usa os índices do snapshot se users.txt não mudou desde então
+    path = user_repository.USERS_FILE
+    with _lock:
+        if estado["arquivo"] != str(path) or estado["assinatura"] != _assinatura(path):
+            return False
+        _state.update({**estado, "arquivo": path})
+        return True
+
+def directory_stats() -> Dict[str, int]:
+    with _lock:
+        return {**_stats, "usuarios": len(_state["por_id"])}
@@ -1,24 +1,48 @@
-def get_all_users(filepath="../dados-teste/users.txt"):
-    usuarios = []
-    # Abre o arquivo de usuários para leitura
-    with open(filepath, "r", encoding="utf-8") as f:
-        linhas = f.read().strip().split("\n")  # Lê todas as linhas e separa por quebra de linha
-        header = linhas.pop(0)  # Remove o cabeçalho
-        for linha in linhas:
-            cols = linha.split(";")  # Separa os campos por ponto e vírgula
-            usuarios.append({
-                "id": cols[0],
-                "np": cols[1],
-                "senha_hash": cols[2],
-                "perfil": cols[3],
-                "nome": cols[4],
-                "departamento": cols[5],
-                "ativo": cols[6] == "1",  # Converte para booleano
-                "ultimo_login": cols[7],
-                "data_cadastro": cols[8]
-            })
-    return usuarios  # Retorna a lista de usuários
+from pathlib import Path
+from Modules.Shared.record_loader import Schema, iter_arquivo, cru, flag
+from Modules.Shared.db_connection import usar_sqlite, get_connection
 
-def get_user_by_np(np, filepath="../dados-teste/users.txt"):
-    # Busca o usuário pelo campo 'np'
-    return next((u for u in get_all_users(filepath) if u["np"] == np), None)
+USERS_FILE = Path(__file__).resolve().parents[3] / "dados-teste" / "users.txt"
+
+# colunas de users.txt (lidas por posição se o cabeçalho tiver outros nomes)
+USER_SCHEMA = Schema("Usuario", [
+    ("id", ("ID",), cru),
+    ("np", ("NP",), cru),
+    ("senha_hash", ("SenhaHash",), cru),
+    ("perfil", ("Perfil",), cru),
+    ("nome", ("NomeCompleto",), cru),
+    ("departamento", ("Departamento",), cru),
+    ("ativo", ("Ativo",), flag),  # Converte para booleano
+    ("ultimo_login", ("UltimoLogin",), cru),
+    ("data_cadastro", ("DataCadastro",), cru),
+], posicional=True)
+
+# backend SQLite: mesmas colunas, na ordem do USER_SCHEMA
+_SQL_COLUNAS = ", ".join(USER_SCHEMA.Record._fields)
+_SQL_TODOS = f"SELECT {_SQL_COLUNAS} FROM users ORDER BY rowid"
+_SQL_POR_NP = f"SELECT {_SQL_COLUNAS} FROM users WHERE np = ? LIMIT 1"
+_SQL_POR_ID = f"SELECT {_SQL_COLUNAS} FROM users WHERE id = ?"
+
+def _user_sql(row):
+    if row is None:
+        return None
+    user = USER_SCHEMA.Record(*row)._asdict()
+    user["ativo"] = bool(user["ativo"])
+    return user
+
+def get_all_users(filepath=USERS_FILE):
+    # Lê o arquivo de usuários linha a linha e devolve a lista de usuários (dicts)
+    if usar_sqlite():
+        return [_user_sql(r) for r in get_connection().execute(_SQL_TODOS)]
+    return [u._asdict() for u in iter_arquivo(filepath, USER_SCHEMA)]
+
+def get_user_by_np(np, filepath=USERS_FILE):
+    # Busca o usuário pelo campo 'np' (no SQLite, pelo índice idx_users_np)
+    if usar_sqlite():
+        return _user_sql(get_connection().execute(_SQL_POR_NP, (str(np),)).fetchone())
+    return next((u._asdict() for u in iter_arquivo(filepath, USER_SCHEMA) if u.np == np), None)
+
+def get_user_by_id(user_id, filepath=USERS_FILE):
+    if usar_sqlite():
+        return _user_sql(get_connection().execute(_SQL_POR_ID, (str(user_id),)).fetchone())
+    return next((u._asdict() for u in iter_arquivo(filepath, USER_SCHEMA) if u.id == str(user_id)), None)
@@ -1,23 +1,53 @@
 # app.py
+import os
 from flask import Flask
 from flask_cors import CORS
 from Modules.Auth.auth_controller import auth_bp
 from Modules.Pontos.pontos_controller import pontos_bp  
 from Modules.Brindes.brindes_controller import brindes_bp
 from Modules.Movimentacoes.movimentacoes_controller import movs_bp
+from Modules.Admin.admin_controller import admin_bp
+from Modules.Movimentacoes import reservas
+from Modules.Shared import aquecimento, db_connection, metricas
 
 
 app = Flask(__name__)
 app.config["SECRET_KEY"] = "troque-por-uma-chave-forte"
 
-# Permitir credenciais entre 3000 ↔ 5000
-CORS(app, resources={r"/api/*": {"origins": "http://localhost:3000"}}, supports_credentials=True)
+# Armazenamento: "file" (arquivos .txt de dados-teste) ou "sqlite"
+# (rode `python manage.py migrar-sqlite` antes de usar o banco)
+app.config["STORAGE_BACKEND"] = os.environ.get("STORAGE_BACKEND", "file")
+app.config["SQLITE_PATH"] = os.environ.get("SQLITE_PATH", str(db_connection.SQLITE_PATH))
+db_connection.configurar(app.config["STORAGE_BACKEND"], app.config["SQLITE_PATH"])
+
+# hooks de duração por rota (GET /api/admin/metrics)
+metricas.registrar(app)
+
+# Permitir credenciais entre 3000 ↔ 5000 (asgi.py aplica as mesmas origens às rotas async);
+# cabeçalhos CORS só quando a requisição traz um Origin permitido
+CORS_ORIGENS = ["http://localhost:3000"]
+CORS(app, resources={r"/api/*": {"origins": CORS_ORIGENS}}, supports_credentials=True, always_send=False)
 
 app.register_blueprint(auth_bp)
 app.register_blueprint(pontos_bp)
 app.register_blueprint(brindes_bp)
 app.register_blueprint(movs_bp)
+app.register_blueprint(admin_bp)
+
+def iniciar():
+    """
+    Partida do processo que vai servir requisições. Importar este módulo não
+    grava o snapshot nem inicia threads; quem sobe o servidor chama isto uma
+    vez por processo: `python app.py` aqui embaixo, o gunicorn no post_fork de
+    cada worker (gunicorn.conf.py) e o asgi.py no lifespan startup.
+    """
+    # warm start: carrega o snapshot dos caches e lê só a cauda dos logs (WARM_START=0 desliga)
+    aquecimento.aquecer()
+
+    # varredura das reservas de resgate vencidas (RESERVA_TTL / RESERVA_VARREDURA)
+    reservas.iniciar_varredura()
 
 if __name__ == "__main__":
+    iniciar()
     app.run(debug=True, port=5000)
 # --- IGNORE ---
\ No newline at end of file
@@ -0,0 +1,26 @@
+# asgi.py
+"""
+Modo async (opcional): o mesmo app servido por um servidor ASGI.
+
+    pip install uvicorn
+    uvicorn asgi:app --port 5000 --workers 4
+
+Login, /api/me, /api/pontos, catálogo/estoque e as rotas de resgate rodam como
+corrotinas (Modules/*/*_controller_async.py), com leituras e bcrypt no pool de
+ASYNC_WORKERS threads; as demais rotas (admin, export, logout...) vão para o
+app Flask. O modo padrão continua sendo o WSGI (`python app.py`, gunicorn).
+A partida de cada worker (app.iniciar) roda no lifespan startup.
+"""
+import os
+from app import app as flask_app, CORS_ORIGENS, iniciar
+from Modules.Auth.auth_controller_async import auth_async
+from Modules.Brindes.brindes_controller_async import brindes_async
+from Modules.Movimentacoes.movimentacoes_controller_async import movs_async
+from Modules.Pontos.pontos_controller_async import pontos_async
+from Modules.Shared.assincrono import AppASGI
+
+app = AppASGI(flask_app, [auth_async, pontos_async, brindes_async, movs_async], CORS_ORIGENS, ao_iniciar=iniciar)
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, port=int(os.environ.get("PORT", "5000")))
@@ -0,0 +1,290 @@
+# benchmarks/bench_api.py
+"""
+Benchmark ponta a ponta da API (auth_bp, pontos_bp, brindes_bp, movs_bp).
+
+Aponta os repositórios para uma massa sintética (benchmarks.dados_sinteticos,
+gerada na hora ou já existente em --dados) e dispara clientes concorrentes,
+cada um com a sua sessão: login e depois uma mistura ponderada de consultas
+ao catálogo, estoque, extrato de pontos e resgates (variantes e usuários com
+popularidade enviesada). As requisições passam pelo test client do Flask
+(--modo test) ou por um servidor WSGI local em thread (--modo wsgi, HTTP de verdade).
+
+Mostra, por endpoint, p50/p95/p99 de latência e vazão, e grava o resultado em
+JSON (--saida) com o commit atual, para comparar com outra execução (--comparar).
+A carga roda sobre uma cópia de --dados: os resgates não alteram a massa original,
+então duas execuções sobre a mesma pasta partem do mesmo estado.
+
+Uso (a partir de backend-web/):
+    python -m benchmarks.bench_api --escala 100000 --clientes 16 --duracao 20 --saida base.json
+    python -m benchmarks.bench_api --dados /tmp/dados --modo wsgi --comparar base.json
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks import dados_sinteticos
+
+# (peso, endpoint) da mistura de operações de cada cliente depois do login
+MIX = [
+    (30, "GET /api/brindes/produtos"),
+    (10, "GET /api/brindes"),
+    (20, "GET /api/brindes/<id>/estoque"),
+    (20, "GET /api/pontos?limit=50"),
+    (10, "GET /api/me"),
+    (8, "POST /api/movimentacoes/resgate"),
+    (2, "POST /api/movimentacoes/confirmar"),
+]
+
+def _configurar(pasta: Path):
+    from Modules.Users import user_repository
+    from Modules.Brindes import brindes_repository
+    from Modules.Movimentacoes import movimentacoes_repository
+    from Modules.Pontos import pontos_repository
+    user_repository.USERS_FILE = pasta / "users.txt"
+    brindes_repository.DATA_FILE = pasta / "Data_Brindes.txt"
+    movimentacoes_repository.MOV_FILE = pasta / "Data_Movimentation.txt"
+    pontos_repository.PONTOS_FILE = pasta / "pontos.txt"
+
+def _contar_linhas(path: Path) -> int:
+    with open(path, "rb") as f:
+        return max(sum(1 for _ in f) - 1, 0)
+
+class ClienteTeste:
+    # sessão no test client do Flask (cookies guardados pelo próprio client)
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, metodo: str, rota: str, corpo: Optional[dict] = None) -> Tuple[int, Any]:
+        resp = self.client.open(rota, method=metodo, json=corpo)
+        return resp.status_code, resp.get_json(silent=True)
+
+class ClienteHTTP:
+    # sessão HTTP keep-alive contra o servidor WSGI local, com o cookie de auth
+    def __init__(self, porta: int):
+        self.conn = http.client.HTTPConnection("127.0.0.1", porta, timeout=30)
+        self.cookie = None
+
+    def request(self, metodo: str, rota: str, corpo: Optional[dict] = None) -> Tuple[int, Any]:
+        headers = {}
+        dados = None
+        if corpo is not None:
+            dados = json.dumps(corpo).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        if self.cookie:
+            headers["Cookie"] = self.cookie
+        self.conn.request(metodo, rota, body=dados, headers=headers)
+        resp = self.conn.getresponse()
+        body = resp.read()
+        cookie = resp.getheader("Set-Cookie")
+        if cookie:
+            self.cookie = cookie.split(";", 1)[0]
+        try:
+            return resp.status, json.loads(body) if body else None
+        except ValueError:
+            return resp.status, None
+
+def _percentil(ordenados: List[float], p: float) -> float:
+    # nearest-rank
+    if not ordenados:
+        return 0.0
+    k = max(int(round(p / 100.0 * len(ordenados) + 0.5)) - 1, 0)
+    return ordenados[min(k, len(ordenados) - 1)]
+
+class Coletor:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.amostras: Dict[str, List[float]] = {}
+        self.status: Dict[str, Dict[str, int]] = {}
+
+    def registrar(self, endpoint: str, segundos: float, status: int):
+        with self.lock:
+            self.amostras.setdefault(endpoint, []).append(segundos)
+            contagem = self.status.setdefault(endpoint, {})
+            contagem[str(status)] = contagem.get(str(status), 0) + 1
+
+    def resumo(self, duracao: float) -> Dict[str, Dict[str, Any]]:
+        resultado = {}
+        for endpoint, amostras in sorted(self.amostras.items()):
+            ordenados = sorted(amostras)
+            status = self.status[endpoint]
+            resultado[endpoint] = {
+                "requisicoes": len(ordenados),
+                "erros": sum(n for s, n in status.items() if s == "0" or s.startswith("5")),
+                "status": status,
+                "p50_ms": _percentil(ordenados, 50) * 1e3,
+                "p95_ms": _percentil(ordenados, 95) * 1e3,
+                "p99_ms": _percentil(ordenados, 99) * 1e3,
+                "max_ms": ordenados[-1] * 1e3,
+                "req_s": len(ordenados) / duracao,
+            }
+        return resultado
+
+def _cliente(novo_cliente, coletor: Coletor, tamanhos: Dict[str, int], fim: float, seed: int):
+    rnd = random.Random(seed)
+    pesos_u = dados_sinteticos.pesos_zipf(tamanhos["usuarios"], 1.1)
+    pesos_v = dados_sinteticos.pesos_zipf(tamanhos["variantes"], 1.1)
+    endpoints = [e for _, e in MIX]
+    pesos_mix = [p for p, _ in MIX]
+    pendentes: List[int] = []
+    cliente = novo_cliente()
+
+    def medir(endpoint: str, metodo: str, rota: str, corpo: Optional[dict] = None):
+        inicio = time.perf_counter()
+        try:
+            status, body = cliente.request(metodo, rota, corpo)
+        except Exception:
+            status, body = 0, None
+        coletor.registrar(endpoint, time.perf_counter() - inicio, status)
+        return status, body
+
+    uid = rnd.choices(range(1, tamanhos["usuarios"] + 1), cum_weights=pesos_u)[0]
+    medir("POST /api/login", "POST", "/api/login",
+          {"username": str(dados_sinteticos.NP_BASE + uid), "password": dados_sinteticos.SENHA})
+
+    while time.perf_counter() < fim:
+        endpoint = rnd.choices(endpoints, weights=pesos_mix)[0]
+        vid = rnd.choices(range(1, tamanhos["variantes"] + 1), cum_weights=pesos_v)[0]
+        if endpoint == "GET /api/brindes/<id>/estoque":
+            medir(endpoint, "GET", f"/api/brindes/{vid}/estoque")
+        elif endpoint == "POST /api/movimentacoes/resgate":
+            status, body = medir(endpoint, "POST", "/api/movimentacoes/resgate",
+                                 {"userId": uid, "items": [{"variantId": vid, "quantity": 1}], "totalPoints": 0})
+            if status == 201 and body:
+                pendentes.extend(m["MOV_ID"] for m in body["movimentacoes"])
+        elif endpoint == "POST /api/movimentacoes/confirmar":
+            if pendentes:
+                medir(endpoint, "POST", "/api/movimentacoes/confirmar", {"movId": pendentes.pop()})
+        else:
+            metodo, rota = endpoint.split(" ", 1)
+            medir(endpoint, metodo, rota)
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def executar(pasta: Path, clientes: int, duracao: float, modo: str, seed: int) -> Dict[str, Any]:
+    _configurar(pasta)
+    from app import app, iniciar
+    iniciar()
+    from Modules.Shared.db_connection import db_stats
+
+    tamanhos = {
+        "usuarios": _contar_linhas(pasta / "users.txt"),
+        "variantes": _contar_linhas(pasta / "Data_Brindes.txt"),
+        "movimentacoes": _contar_linhas(pasta / "Data_Movimentation.txt"),
+        "pontos": _contar_linhas(pasta / "pontos.txt"),
+    }
+
+    servidor = None
+    if modo == "wsgi":
+        from werkzeug.serving import make_server
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)  # sem log por requisição
+        servidor = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        novo_cliente = lambda: ClienteHTTP(servidor.server_port)
+    else:
+        novo_cliente = lambda: ClienteTeste(app)
+
+    # aquecimento: carrega catálogo, índices e diretório antes de medir
+    aquecimento = novo_cliente()
+    for rota in ("/api/brindes/produtos", "/api/brindes"):
+        aquecimento.request("GET", rota)
+
+    coletor = Coletor()
+    inicio = time.perf_counter()
+    fim = inicio + duracao
+    threads = [threading.Thread(target=_cliente, args=(novo_cliente, coletor, tamanhos, fim, seed + i))
+               for i in range(clientes)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total_s = time.perf_counter() - inicio
+    if servidor:
+        servidor.shutdown()
+
+    endpoints = coletor.resumo(total_s)
+    total = sum(e["requisicoes"] for e in endpoints.values())
+    return {
+        "commit": _commit(),
+        "data": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "storage": db_stats()["backend"],
+        "modo": modo,
+        "clientes": clientes,
+        "duracao_s": total_s,
+        "dados": tamanhos,
+        "total": {"requisicoes": total, "req_s": total / total_s,
+                  "erros": sum(e["erros"] for e in endpoints.values())},
+        "endpoints": endpoints,
+    }
+
+def _imprimir(resultado: Dict[str, Any], base: Optional[Dict[str, Any]] = None):
+    print(f"commit {resultado['commit']}  modo {resultado['modo']}  storage {resultado['storage']}  "
+          f"clientes {resultado['clientes']}  dados {resultado['dados']}")
+    cab = f"{'endpoint':40} {'n':>7} {'erros':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8}"
+    if base:
+        cab += f" {'Δp50':>7} {'Δp95':>7} {'Δreq/s':>7}"
+    print(cab)
+    for endpoint, e in resultado["endpoints"].items():
+        linha = (f"{endpoint:40} {e['requisicoes']:>7} {e['erros']:>5} {e['p50_ms']:>8.2f} "
+                 f"{e['p95_ms']:>8.2f} {e['p99_ms']:>8.2f} {e['req_s']:>8.1f}")
+        anterior = (base or {}).get("endpoints", {}).get(endpoint)
+        if anterior:
+            def delta(chave):
+                return f"{(e[chave] / anterior[chave] - 1) * 100:+6.0f}%" if anterior[chave] else "      -"
+            linha += f" {delta('p50_ms')} {delta('p95_ms')} {delta('req_s')}"
+        print(linha)
+    t = resultado["total"]
+    print(f"total: {t['requisicoes']} requisições, {t['req_s']:.1f} req/s, {t['erros']} erros")
+    if base:
+        print(f"base: commit {base.get('commit')} ({base['total']['req_s']:.1f} req/s)")
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark ponta a ponta da API")
+    ap.add_argument("--dados", help="pasta com a massa (gerada por benchmarks.dados_sinteticos)")
+    ap.add_argument("--escala", type=int, default=10000, help="escala da massa gerada quando --dados não é informado")
+    ap.add_argument("--clientes", type=int, default=8)
+    ap.add_argument("--duracao", type=float, default=10.0, help="segundos de carga")
+    ap.add_argument("--modo", choices=["test", "wsgi"], default="test")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--saida", help="grava o resultado em JSON")
+    ap.add_argument("--comparar", help="JSON de uma execução anterior para comparar")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pasta = Path(tmp) / "dados"
+        if args.dados:
+            shutil.copytree(args.dados, pasta)
+        else:
+            print(f"gerando massa sintética (escala {args.escala})...", file=sys.stderr)
+            dados_sinteticos.gerar(pasta, seed=args.seed, **dados_sinteticos.escalas(args.escala))
+        resultado = executar(pasta, args.clientes, args.duracao, args.modo, args.seed)
+
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+    _imprimir(resultado, base)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
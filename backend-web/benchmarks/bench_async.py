@@ -0,0 +1,159 @@
+# benchmarks/bench_async.py
+"""
+Modo WSGI (werkzeug, uma thread por conexão) x modo async (asgi.py no
+uvicorn) com muitos clientes simultâneos.
+
+Cada servidor roda num processo separado, sobre a sua própria cópia da massa
+sintética, e recebe a mesma carga de benchmarks.bench_api (mesma mistura,
+mesmas sementes, clientes HTTP keep-alive). No fim, o modo async mostra os
+contadores do single-flight (GET /api/admin/cache, "assincrono"): quantas
+leituras rodaram no pool e quantas requisições pegaram carona numa já em
+andamento.
+
+Precisa do uvicorn (`pip install uvicorn`), que não é dependência do app.
+
+Uso (a partir de backend-web/):
+    python -m benchmarks.bench_async --escala 100000 --clientes 64 256 --duracao 15
+"""
+import argparse
+import json
+import logging
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+from benchmarks import dados_sinteticos
+from benchmarks.bench_api import ClienteHTTP, Coletor, _cliente, _configurar, _contar_linhas
+
+MODOS = ("wsgi", "asgi")
+
+def _servir(modo: str, pasta: Path):
+    # processo do servidor: escuta numa porta livre e a informa na primeira linha do stdout
+    _configurar(pasta)
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(1024)
+    print(sock.getsockname()[1], flush=True)
+    if modo == "wsgi":
+        from werkzeug.serving import make_server
+        from app import app, iniciar
+        iniciar()
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        make_server("127.0.0.1", 0, app, threaded=True, fd=sock.fileno()).serve_forever()
+    else:
+        import uvicorn
+        from asgi import app
+        config = uvicorn.Config(app, log_level="warning", access_log=False, backlog=1024)
+        uvicorn.Server(config).run(sockets=[sock])
+
+def _carga(porta: int, pasta: Path, clientes: int, duracao: float, seed: int) -> Dict[str, Any]:
+    tamanhos = {"usuarios": _contar_linhas(pasta / "users.txt"),
+                "variantes": _contar_linhas(pasta / "Data_Brindes.txt")}
+    novo_cliente = lambda: ClienteHTTP(porta)
+    aquecimento = novo_cliente()
+    for rota in ("/api/brindes/produtos", "/api/brindes"):
+        aquecimento.request("GET", rota)
+
+    coletor = Coletor()
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=_cliente, args=(novo_cliente, coletor, tamanhos, inicio + duracao, seed + i))
+               for i in range(clientes)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total_s = time.perf_counter() - inicio
+    endpoints = coletor.resumo(total_s)
+    todas = sorted(a for amostras in coletor.amostras.values() for a in amostras)
+    return {
+        "endpoints": endpoints,
+        "requisicoes": len(todas),
+        "req_s": len(todas) / total_s,
+        "erros": sum(e["erros"] for e in endpoints.values()),
+        "p50_ms": todas[len(todas) // 2] * 1e3 if todas else 0.0,
+        "p99_ms": todas[int(len(todas) * 0.99)] * 1e3 if todas else 0.0,
+    }
+
+def _stats_async(porta: int) -> Dict[str, Any]:
+    admin = ClienteHTTP(porta)
+    admin.request("POST", "/api/login", {"username": str(dados_sinteticos.NP_BASE + 1),
+                                         "password": dados_sinteticos.SENHA})
+    _, body = admin.request("GET", "/api/admin/cache")
+    return (body or {}).get("assincrono", {})
+
+def executar(modo: str, base: Path, clientes: int, duracao: float, seed: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        pasta = Path(tmp) / "dados"
+        shutil.copytree(base, pasta)
+        proc = subprocess.Popen([sys.executable, "-m", "benchmarks.bench_async", "--servir", modo,
+                                 "--dados", str(pasta)], stdout=subprocess.PIPE, text=True)
+        try:
+            porta = int(proc.stdout.readline())
+            resultado = _carga(porta, pasta, clientes, duracao, seed)
+            if modo == "asgi":
+                resultado["assincrono"] = _stats_async(porta)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+    return resultado
+
+def _imprimir(clientes: int, resultados: Dict[str, Dict[str, Any]]):
+    print(f"\n{clientes} clientes")
+    print(f"{'endpoint':40} " + " ".join(f"{m + ' p50':>10} {m + ' p99':>10} {m + ' req/s':>11}" for m in MODOS))
+    endpoints = sorted(set().union(*(r["endpoints"] for r in resultados.values())))
+    for endpoint in endpoints:
+        colunas = []
+        for modo in MODOS:
+            e = resultados[modo]["endpoints"].get(endpoint)
+            colunas.append(f"{e['p50_ms']:>10.2f} {e['p99_ms']:>10.2f} {e['req_s']:>11.1f}" if e else " " * 33)
+        print(f"{endpoint:40} " + " ".join(colunas))
+    for modo in MODOS:
+        r = resultados[modo]
+        print(f"{modo}: {r['requisicoes']} requisições, {r['req_s']:.1f} req/s, p50 {r['p50_ms']:.2f} ms, "
+              f"p99 {r['p99_ms']:.2f} ms, {r['erros']} erros")
+    a = resultados["asgi"].get("assincrono")
+    if a:
+        print(f"single-flight: {a['voos']} leituras no pool, {a['caronas']} caronas; "
+              f"{a['em_thread']} chamadas em_thread, {a['delegadas']} delegadas ao Flask")
+
+def main():
+    ap = argparse.ArgumentParser(description="Modo WSGI x modo async (ASGI) sob alta concorrência")
+    ap.add_argument("--dados", help="pasta com a massa (gerada por benchmarks.dados_sinteticos)")
+    ap.add_argument("--escala", type=int, default=10000, help="escala da massa gerada quando --dados não é informado")
+    ap.add_argument("--clientes", type=int, nargs="+", default=[64, 256])
+    ap.add_argument("--duracao", type=float, default=15.0, help="segundos de carga por modo")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--saida", help="grava os resultados em JSON")
+    ap.add_argument("--servir", choices=MODOS, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.servir:
+        _servir(args.servir, Path(args.dados))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp) / "base"
+        if args.dados:
+            shutil.copytree(args.dados, base)
+        else:
+            print(f"gerando massa sintética (escala {args.escala})...", file=sys.stderr)
+            dados_sinteticos.gerar(base, seed=args.seed, **dados_sinteticos.escalas(args.escala))
+        todos = {}
+        for clientes in args.clientes:
+            resultados = {modo: executar(modo, base, clientes, args.duracao, args.seed) for modo in MODOS}
+            _imprimir(clientes, resultados)
+            todos[str(clientes)] = resultados
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(todos, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/bench_busca.py
+"""
+Benchmark da busca no catálogo (Modules/Brindes/catalogo_busca.py).
+
+Gera um catálogo sintético (padrão ~100k variantes), mede a montagem dos
+índices e a mediana / p99 de consultas típicas (só a busca, sem HTTP), e
+compara com o filtro linear sobre a lista inteira, como o front fazia.
+
+Uso (a partir de backend-web/):
+    python -m benchmarks.bench_busca --produtos 80000
+"""
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_api import _configurar
+from benchmarks.dados_sinteticos import gerar
+
+CONSULTAS = [
+    ("sem filtro, página 1", {}),
+    ("q=produto 1234", {"q": "produto 1234"}),
+    ("q=prod (prefixo)", {"q": "prod"}),
+    ("categoria", {"categorias": ["Tecnologia"]}),
+    ("categoria + tamanho", {"categorias": ["Vestuario"], "tamanhos": ["M", "G"]}),
+    ("faixa de custo", {"custo_min": 50, "custo_max": 100}),
+    ("faixa de custo, ordem -cost", {"custo_min": 50, "custo_max": 100, "ordenar": "-cost"}),
+    ("q + categoria + custo + nome", {"q": "produto", "categorias": ["Casa"], "custo_max": 200, "ordenar": "name"}),
+    ("página 100", {"page": 100}),
+]
+
+def _medir(fn, repeticoes: int):
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn()
+        tempos.append((time.perf_counter() - t0) * 1e3)
+    tempos.sort()
+    return statistics.median(tempos), tempos[int(len(tempos) * 0.99) - 1]
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark da busca indexada do catálogo")
+    ap.add_argument("--produtos", type=int, default=80000, help="produtos (vestuário vira 4 variantes)")
+    ap.add_argument("--repeticoes", type=int, default=200)
+    args = ap.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="bench_busca_"))
+    try:
+        linhas = gerar(tmp, usuarios=10, produtos=args.produtos, movimentacoes=1000, pontos=10)
+        _configurar(tmp)
+        from Modules.Brindes import catalogo_busca
+        from Modules.Brindes.brindes_cache import get_catalogo, get_deltas
+
+        get_catalogo()
+        get_deltas()
+        t0 = time.perf_counter()
+        catalogo_busca.buscar()
+        print(f"{linhas['variantes']} variantes; índices montados em {(time.perf_counter() - t0) * 1e3:.0f} ms")
+
+        for nome, params in CONSULTAS:
+            res = catalogo_busca.buscar(**params)
+            mediana, p99 = _medir(lambda: catalogo_busca.buscar(**params), args.repeticoes)
+            print(f"{nome:<32} total={res['total']:>7}  mediana {mediana:6.3f} ms  p99 {p99:6.3f} ms")
+
+        def linear():
+            # o que o front fazia: filtrar a lista inteira
+            return [it for it in get_catalogo()
+                    if it["category"] == "Casa" and "produto" in it["name"].lower() and it["pointsCost"] <= 200]
+        mediana, p99 = _medir(linear, max(args.repeticoes // 10, 5))
+        print(f"{'filtro linear (referência)':<32} {'':>13}  mediana {mediana:6.3f} ms  p99 {p99:6.3f} ms")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/bench_estoque.py
+"""
+Benchmark do cálculo de estoque (estoque_service).
+
+Gera um log sintético de movimentações e mede a agregação de passada única
+para tamanhos crescentes, mostrando que o tempo cresce linearmente com o
+número de movimentações. Em escala pequena compara com o cálculo antigo
+(uma releitura do log por variante).
+
+Uso (a partir de backend-web/):
+    python -m benchmarks.bench_estoque --variants 10000 --movs 1000000
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from Modules.Movimentacoes import movimentacoes_repository as movs_repo
+from Modules.Brindes import estoque_service
+
+HEADER = "MOV_ID;USER_ID;VARIANT_ID;PRODUCT_ID;SKU;QTD;POINTS_TOTAL;TYPE;STATUS;CREATED_AT\n"
+
+def gerar_log(path: Path, variants: int, movs: int, seed: int = 42):
+    rnd = random.Random(seed)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(HEADER)
+        for i in range(1, movs + 1):
+            vid = rnd.randint(1, variants)
+            tipo = "IN" if rnd.random() < 0.1 else "OUT"
+            status = rnd.choice(("confirmed", "confirmed", "processing", "canceled"))
+            f.write(f"{i};{rnd.randint(1, 5000)};{vid};{vid};BRD-{vid:05d};{rnd.randint(1, 3)};100;{tipo};{status};2025-10-03 10:00:00\n")
+
+def antigo_por_variacao(variant_id: int, stock_initial: int) -> int:
+    # cópia do algoritmo anterior: relê o log inteiro para cada variante
+    movs = movs_repo.load_movs()
+    outs = sum(m["QTD"] for m in movs if m["VARIANT_ID"] == variant_id and m["TYPE"] == "OUT" and m["STATUS"] == "confirmed")
+    ins = sum(m["QTD"] for m in movs if m["VARIANT_ID"] == variant_id and m["TYPE"] == "IN" and m["STATUS"] == "confirmed")
+    return max(stock_initial - outs + ins, 0)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--variants", type=int, default=10_000)
+    ap.add_argument("--movs", type=int, default=1_000_000)
+    ap.add_argument("--steps", type=int, default=4)
+    args = ap.parse_args()
+
+    brindes = [{"id": v, "stockInitial": 1000} for v in range(1, args.variants + 1)]
+    original = movs_repo.MOV_FILE
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "movs.txt"
+        movs_repo.MOV_FILE = path
+        try:
+            # comparação em escala pequena (o algoritmo antigo é O(variantes x movimentações))
+            gerar_log(path, 50, 5_000)
+            t0 = time.perf_counter()
+            antigo = {b["id"]: antigo_por_variacao(b["id"], b["stockInitial"]) for b in brindes[:50]}
+            t_antigo = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            novo = estoque_service.estoque_atual_map(brindes[:50])
+            t_novo = time.perf_counter() - t0
+            assert antigo == novo, "resultado divergente do algoritmo antigo"
+            print(f"50 variantes x 5k movs: antigo {t_antigo:.3f}s | passada única {t_novo:.3f}s")
+
+            print(f"{'movs':>10} {'tempo (s)':>10} {'movs/s':>12} {'ns/mov':>8}")
+            for step in range(1, args.steps + 1):
+                n = args.movs * step // args.steps
+                gerar_log(path, args.variants, n)
+                t0 = time.perf_counter()
+                estoque_service.estoque_atual_map(brindes)
+                dt = time.perf_counter() - t0
+                print(f"{n:>10} {dt:>10.3f} {n / dt:>12.0f} {dt / n * 1e9:>8.0f}")
+        finally:
+            movs_repo.MOV_FILE = original
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+# benchmarks/bench_estoque_compartilhado.py
+"""
+Teste multi-processo dos contadores de estoque compartilhados
+(Modules/Movimentacoes/estoque_compartilhado.py).
+
+1. Consistência: vários processos resgatam, confirmam e cancelam (um a um e
+   em lote) enquanto outros leem os contadores sem parar. Os leitores conferem
+   que nenhuma leitura vê pendente negativo; ao final, contadores, tabela de
+   estoque de cada leitor (brindes_cache.get_estoque) e o fold do log inteiro
+   (tabela_movimentos) precisam coincidir. Com --verificar roda só esta
+   parte e sai com erro (AssertionError) se algo divergir.
+2. Partida: tempo até um processo novo ter a tabela de estoque, derivando do
+   log inteiro (ESTOQUE_COMPARTILHADO desligado) ou copiando os contadores.
+3. Vazão de leitura: processos leitores consultam o estoque de variantes
+   aleatórias enquanto um processo grava resgates num ritmo fixo, com a
+   tabela derivada do log por processo, com a tabela copiada dos contadores
+   e lendo só o slot pedido (stock_for sem tabela).
+
+Uso (a partir de backend-web/):
+    python -m benchmarks.bench_estoque_compartilhado --escala 200000 --escritores 4 --leitores 4
+    python -m benchmarks.bench_estoque_compartilhado --escala 20000 --verificar
+"""
+import argparse
+import multiprocessing as mp
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_api import _configurar
+from benchmarks.dados_sinteticos import escalas, gerar
+
+def _escritor(args):
+    pasta, semente, operacoes, variantes = args
+    _configurar(Path(pasta))
+    from Modules.Movimentacoes import movimentacoes_service as svc
+    rnd = random.Random(semente)
+    criadas, feitas = [], 0
+    for i in range(operacoes):
+        res = svc.criar_resgate(2, [{"variantId": rnd.randrange(1, variantes + 1), "quantity": rnd.randint(1, 3)}], 0)
+        if res["ok"]:
+            criadas.extend(m["MOV_ID"] for m in res["movimentacoes"])
+            feitas += 1
+        if criadas and i % 3 == 0:
+            feitas += svc.confirmar_resgate(criadas.pop(rnd.randrange(len(criadas))))["ok"]
+        if len(criadas) >= 8 and i % 5 == 0:
+            lote = [{"movId": criadas.pop(), "status": rnd.choice(["confirmed", "canceled"])} for _ in range(4)]
+            feitas += svc.atualizar_status_lote(lote)["aplicadas"]
+    return feitas
+
+def _leitor(args):
+    pasta, semente, variantes, parar = args
+    _configurar(Path(pasta))
+    from Modules.Brindes.brindes_cache import get_estoque
+    from Modules.Movimentacoes import estoque_compartilhado
+    rnd = random.Random(semente)
+    leituras = negativos = desistencias = 0
+    while not parar.is_set():
+        ids = [rnd.randrange(1, variantes + 1) for _ in range(16)]
+        contadores = estoque_compartilhado.ler(ids)
+        if contadores is None:
+            desistencias += 1
+            continue
+        negativos += sum(pend < 0 for _, pend in contadores.values())
+        leituras += 1
+    deltas, pendentes = get_estoque()
+    return leituras, negativos, desistencias, dict(deltas), dict(pendentes)
+
+def _ritmo(args):
+    # grava um resgate a cada `intervalo` segundos até `parar`
+    pasta, variantes, intervalo, parar = args
+    _configurar(Path(pasta))
+    from Modules.Movimentacoes import movimentacoes_service as svc
+    rnd = random.Random(0)
+    gravados = 0
+    t0 = time.perf_counter()
+    while not parar.is_set():
+        gravados += svc.criar_resgate(2, [{"variantId": rnd.randrange(1, variantes + 1), "quantity": 1}], 0)["ok"]
+        time.sleep(intervalo)
+    return gravados / (time.perf_counter() - t0)
+
+def _partida(args):
+    # processo novo: tempo até a primeira tabela de estoque
+    pasta, compartilhado = args
+    _configurar(Path(pasta))
+    from Modules.Movimentacoes import estoque_compartilhado
+    estoque_compartilhado.ESTOQUE_COMPARTILHADO = compartilhado
+    from Modules.Brindes.brindes_cache import get_estoque
+    t0 = time.perf_counter()
+    get_estoque()
+    return time.perf_counter() - t0
+
+def _vazao(args):
+    pasta, semente, variantes, segundos, modo, largada = args
+    _configurar(Path(pasta))
+    from Modules.Movimentacoes import estoque_compartilhado
+    estoque_compartilhado.ESTOQUE_COMPARTILHADO = modo != "log"
+    from Modules.Brindes.brindes_cache import get_estoque, get_variacao
+    from Modules.Brindes.estoque_service import stock_for
+    rnd = random.Random(semente)
+    get_estoque()
+    largada.wait()  # todos medem na mesma janela
+    consultas = 0
+    fim = time.perf_counter() + segundos
+    while time.perf_counter() < fim:
+        # o que exibir um brinde faz: estoque inicial do catálogo + movimentações da variante
+        vid = rnd.randrange(1, variantes + 1)
+        v = get_variacao(vid)
+        inicial = v["stockInitial"] if v else 0
+        if modo == "slot":
+            stock_for([vid], {vid: inicial})
+        else:
+            deltas, pendentes = get_estoque()
+            _ = inicial + deltas.get(vid, 0) - pendentes.get(vid, 0)
+        consultas += 1
+    return consultas
+
+def _referencia(variantes: int):
+    # (fold do log inteiro, o mesmo lido dos contadores com ler()), sem as variantes zeradas
+    from Modules.Brindes.estoque_service import tabela_movimentos
+    from Modules.Movimentacoes import estoque_compartilhado
+    pendentes = {}
+    deltas = tabela_movimentos(pendentes=pendentes)
+    ref = ({k: v for k, v in deltas.items() if v}, {k: v for k, v in pendentes.items() if v})
+    valores = estoque_compartilhado.ler(range(1, variantes + 1))
+    assert valores is not None, "contadores indisponíveis"
+    contadores = ({i: c for i, (c, _) in valores.items() if c}, {i: p for i, (_, p) in valores.items() if p})
+    return ref, contadores
+
+def _consistencia(pasta: Path, escritores: int, leitores: int, operacoes: int, variantes: int):
+    """
+    Escritores concorrentes (cada gravação chama estoque_compartilhado.aplicar)
+    e leitores lendo sem parar; confere os contadores contra o fold do log.
+    """
+    with mp.Manager() as manager:
+        parar = manager.Event()
+        with mp.Pool(escritores + leitores) as pool:
+            t0 = time.perf_counter()
+            pendentes = pool.map_async(_leitor, [(str(pasta), s, variantes, parar) for s in range(leitores)])
+            feitas = sum(pool.map(_escritor, [(str(pasta), 100 + s, operacoes, variantes)
+                                              for s in range(escritores)]))
+            dt = time.perf_counter() - t0
+            parar.set()
+            lidos = pendentes.get()
+    ref, contadores = _referencia(variantes)
+    tabelas_ok = sum((d, p) == ref for _, _, _, d, p in lidos)
+    negativos = sum(l[1] for l in lidos)
+    print(f"consistência: {feitas} gravações em {dt:.1f}s por {escritores} processos, "
+          f"{sum(l[0] for l in lidos)} leituras por {leitores} processos")
+    print(f"  pendentes negativos lidos: {negativos}; "
+          f"leituras que caíram para o log: {sum(l[2] for l in lidos)}")
+    print(f"  contadores == fold do log: {contadores == ref}; tabelas dos leitores iguais: {tabelas_ok}/{len(lidos)}")
+    assert feitas, "nenhuma gravação"
+    assert contadores == ref, "contadores divergem do fold do log"
+    assert negativos == 0, f"{negativos} leituras com pendente negativo"
+    assert tabelas_ok == len(lidos), "tabela de algum leitor diverge do fold do log"
+
+def main():
+    ap = argparse.ArgumentParser(description="Contadores de estoque compartilhados entre processos")
+    ap.add_argument("--escala", type=int, default=200000)
+    ap.add_argument("--escritores", type=int, default=4)
+    ap.add_argument("--leitores", type=int, default=4)
+    ap.add_argument("--operacoes", type=int, default=200, help="resgates por escritor")
+    ap.add_argument("--segundos", type=float, default=3.0, help="duração de cada medição de vazão")
+    ap.add_argument("--intervalo", type=float, default=0.01, help="segundos entre gravações na medição de vazão")
+    ap.add_argument("--verificar", action="store_true", help="só a verificação de consistência")
+    args = ap.parse_args()
+
+    pasta = Path(tempfile.mkdtemp(prefix="bench_estoque_"))
+    try:
+        linhas = gerar(pasta, **escalas(args.escala))
+        variantes = linhas["variantes"]
+        _configurar(pasta)
+        from Modules.Movimentacoes import estoque_compartilhado
+        t0 = time.perf_counter()
+        estoque_compartilhado.sincronizar()
+        print(f"{linhas['movimentacoes']} movimentações, {variantes} variantes; "
+              f"contadores montados em {(time.perf_counter() - t0) * 1e3:.0f} ms")
+
+        _consistencia(pasta, args.escritores, args.leitores, args.operacoes, variantes)
+        if args.verificar:
+            return
+
+        for nome, compartilhado in (("derivada do log", False), ("dos contadores", True)):
+            with mp.Pool(1, maxtasksperchild=1) as pool:
+                tempos = sorted(pool.map(_partida, [(str(pasta), compartilhado)] * 3))
+            print(f"partida, tabela {nome:<22} {tempos[1] * 1e3:>8.1f} ms (mediana de 3 processos)")
+
+        # índice lateral do log em dia antes do fork: o escritor não começa refazendo o .idx
+        from Modules.Movimentacoes import movimentacoes_repository
+        movimentacoes_repository.get_mov(1)
+        modos = (("tabela derivada do log", "log"), ("tabela dos contadores", "tabela"), ("slot dos contadores", "slot"))
+        for nome, modo in modos:
+            with mp.Manager() as manager:
+                parar = manager.Event()
+                largada = manager.Barrier(args.leitores)
+                with mp.Pool(args.leitores + 1) as pool:
+                    ritmo = pool.apply_async(_ritmo, [(str(pasta), variantes, args.intervalo, parar)])
+                    consultas = sum(pool.map(_vazao, [(str(pasta), s, variantes, args.segundos, modo, largada)
+                                                      for s in range(args.leitores)]))
+                    parar.set()
+                    gravados = ritmo.get()
+            print(f"vazão, {nome:<24} {consultas / args.segundos:>10.0f} consultas/s "
+                  f"({args.leitores} leitores, escritor a {gravados:.0f} resgates/s)")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
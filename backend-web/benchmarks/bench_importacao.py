@@ -0,0 +1,84 @@
+# benchmarks/bench_importacao.py
+"""
+Benchmark da importação do catálogo (Modules/Brindes/catalogo_importacao.py).
+
+Gera o CSV de um fornecedor (separador vírgula, cabeçalhos em inglês, na
+ordem do fornecedor) direto em disco, importa em streaming e mostra vazão e
+pico de memória do processo (ru_maxrss) antes e depois da importação; por
+fim, para comparação, o pico de carregar o mesmo arquivo inteiro numa lista.
+Também confere a rejeição de um feed com SKU repetido (catálogo intacto).
+
+Uso (a partir de backend-web/):
+    python -m benchmarks.bench_importacao --linhas 2000000
+"""
+import argparse
+import csv
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_api import _configurar
+
+CABECALHO = ["Sku", "Id", "Name", "Description", "Category", "Size", "Cost", "Estoque", "Image", "Tags", "Product"]
+
+def _gerar(path: Path, linhas: int, sku_repetido: bool = False):
+    rnd = random.Random(7)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(CABECALHO)
+        for i in range(1, linhas + 1):
+            sku = f"FOR-{i:09d}" if not (sku_repetido and i == linhas) else "FOR-000000001"
+            writer.writerow([sku, i, f"Produto {i}", f"Descrição do produto {i}, linha {rnd.randrange(100)}",
+                             rnd.choice(["Casa", "Escritorio", "Tecnologia"]), rnd.choice(["", "P", "M", "G"]),
+                             rnd.randrange(5, 500), rnd.randrange(0, 1000),
+                             f"https://cdn.exemplo.com/img/{i}.webp", "brinde,fornecedor", (i + 1) // 2])
+
+def _pico_mb() -> float:
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+def main():
+    ap = argparse.ArgumentParser(description="Importação do catálogo em streaming")
+    ap.add_argument("--linhas", type=int, default=1000000)
+    args = ap.parse_args()
+
+    pasta = Path(tempfile.mkdtemp(prefix="bench_importacao_"))
+    try:
+        _configurar(pasta)
+        from Modules.Brindes import brindes_repository
+        from Modules.Brindes.catalogo_importacao import importar_arquivo
+
+        feed = pasta / "fornecedor.csv"
+        _gerar(feed, args.linhas)
+        tamanho = feed.stat().st_size / 1e6
+        pico_antes = _pico_mb()
+        avisos = []
+        t0 = time.perf_counter()
+        resultado = importar_arquivo(feed, progresso=avisos.append)
+        dt = time.perf_counter() - t0
+        assert resultado["ok"], resultado["erros"][:5]
+        catalogo = brindes_repository.DATA_FILE.stat().st_size / 1e6
+        print(f"feed {tamanho:.0f} MB, {args.linhas} linhas -> catálogo {catalogo:.0f} MB em {dt:.1f}s "
+              f"({args.linhas / dt:,.0f} linhas/s, {tamanho / dt:.1f} MB/s, {len(avisos)} avisos de progresso)")
+        print(f"pico de memória: {pico_antes:.0f} MB antes, {_pico_mb():.0f} MB depois da importação")
+
+        _gerar(feed, args.linhas, sku_repetido=True)
+        antes = brindes_repository.DATA_FILE.stat()
+        rejeitada = importar_arquivo(feed)
+        depois = brindes_repository.DATA_FILE.stat()
+        print(f"feed com SKU repetido: ok={rejeitada['ok']}, erros={rejeitada['erros']}, "
+              f"catálogo intacto={(antes.st_ino, antes.st_size) == (depois.st_ino, depois.st_size)}")
+
+        with open(feed, newline="", encoding="utf-8") as f:
+            tudo = list(csv.reader(f))
+        print(f"referência, arquivo inteiro em memória ({len(tudo)} linhas): pico {_pico_mb():.0f} MB")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# benchmarks/bench_loader.py
+"""
+Benchmark dos leitores de arquivo: implementações antigas (DictReader com
+cadeias de apelidos, f.read().split) contra o leitor compartilhado
+(Modules/Shared/record_loader.py).
+
+Para cada um dos quatro arquivos gera N linhas sintéticas e mede linhas/s e
+pico de memória (tracemalloc) ao carregar o arquivo inteiro numa lista.
+
+Uso (a partir de backend-web/):
+    python -m benchmarks.bench_loader --rows 1000000
+"""
+import argparse
+import csv
+import gc
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from Modules.Shared.record_loader import iter_arquivo
+from Modules.Brindes.brindes_repository import BRINDE_SCHEMA
+from Modules.Movimentacoes.movimentacoes_repository import MOV_SCHEMA
+from Modules.Pontos.pontos_repository import PONTO_SCHEMA
+from Modules.Users.user_repository import USER_SCHEMA
+
+# --- leitores antigos (cópia do comportamento anterior) ----------------------
+
+def _int_or_zero(val):
+    try:
+        return int(str(val).strip())
+    except Exception:
+        return 0
+
+def antigo_brindes(path):
+    items = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f, delimiter=";"):
+            if (row.get("Ativo") or "").strip() != "1":
+                continue
+            items.append({
+                "id": _int_or_zero(row.get("ID") or row.get("Id") or 0),
+                "product_id": _int_or_zero(row.get("PRODUCT_ID") or row.get("Product_ID") or row.get("ProductId") or row.get("Product_Id") or row.get("Product") or row.get("PRODUCTID") or 0),
+                "sku": (row.get("SKU") or row.get("Sku") or "").strip(),
+                "name": (row.get("Nome") or row.get("Name") or "").strip(),
+                "description": (row.get("Descricao") or row.get("Description") or "").strip(),
+                "details": (row.get("Detalhes") or "").strip(),
+                "category": (row.get("Categoria") or row.get("Category") or "").strip(),
+                "size": (row.get("Tamanho") or row.get("Size") or "").strip() or None,
+                "pointsCost": _int_or_zero(row.get("Custo") or row.get("Cost") or 0),
+                "stockInitial": _int_or_zero(row.get("Estoque_Inicial") or row.get("EstoqueInicial") or row.get("Estoque") or 0),
+                "imageUrl": (row.get("URL") or row.get("Url") or row.get("Image") or "").strip() or None,
+                "createdAt": (row.get("Data_Cadastro") or row.get("created_at") or "").strip(),
+                "updatedAt": (row.get("Ultima_Modificacao") or row.get("updated_at") or "").strip(),
+                "active": 1,
+                "tags": (row.get("Tags") or "").strip(),
+            })
+    return items
+
+def antigo_movs(path):
+    movs = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for r in csv.DictReader(f, delimiter=";"):
+            movs.append({
+                "MOV_ID": int(r.get("MOV_ID") or "0"), "USER_ID": int(r.get("USER_ID") or "0"),
+                "VARIANT_ID": int(r.get("VARIANT_ID") or "0"), "PRODUCT_ID": int(r.get("PRODUCT_ID") or "0"),
+                "SKU": (r.get("SKU") or "").strip(), "QTD": int(r.get("QTD") or "0"),
+                "POINTS_TOTAL": int(r.get("POINTS_TOTAL") or "0"), "TYPE": (r.get("TYPE") or "").strip(),
+                "STATUS": (r.get("STATUS") or "").strip(), "CREATED_AT": (r.get("CREATED_AT") or "").strip(),
+            })
+    return movs
+
+def antigo_split(path, chaves):
+    itens = []
+    with open(path, "r", encoding="utf-8") as f:
+        linhas = f.read().strip().split("\n")
+        linhas.pop(0)
+        for linha in linhas:
+            itens.append(dict(zip(chaves, linha.split(";"))))
+    return itens
+
+# --- geração ------------------------------------------------------------------
+
+ARQUIVOS = {
+    "brindes": ("ID;PRODUCT_ID;SKU;Nome;Descricao;Detalhes;Categoria;Tamanho;Custo;Estoque_Inicial;URL;Data_Cadastro;Ultima_Modificacao;Ativo;Tags",
+                lambda i: f"{i};{i // 3 + 1};BRD-{i:07d};Camiseta {i} - M;Camiseta de algodão;;Vestuario;M;{50 + i % 300};{i % 500};https://exemplo/{i}.webp;03/10/2025;03/10/2025;1;roupa,algodao"),
+    "movimentacoes": ("MOV_ID;USER_ID;VARIANT_ID;PRODUCT_ID;SKU;QTD;POINTS_TOTAL;TYPE;STATUS;CREATED_AT",
+                      lambda i: f"{i};{i % 5000};{i % 10000};{i % 3333};BRD-{i % 10000:07d};{1 + i % 3};{100 + i % 900};OUT;confirmed;2025-10-03 10:00:00"),
+    "pontos": ("ID;UsuarioID;Tipo;Quantidade;Status;Origem;ReferenciaID;Observacao;DataMovimento;RegistradoPor",
+               lambda i: f"{i};{i % 5000};credito;{10 + i % 90};confirmado;Campanha;;Bônus mensal;2025-09-27 16:45:00;1"),
+    "users": ("ID;NP;SenhaHash;Perfil;NomeCompleto;Departamento;Ativo;UltimoLogin;DataCadastro",
+              lambda i: f"{i};{100000 + i};$2b$12$UdiSrrrszZEwg25imuXSzeM9sMSu5pM60ZmW9zGVwzwHK5QZxpqyO;user;Usuario {i};TI;1;2025-09-27 14:32:00;2025-01-10 09:00:00"),
+}
+
+LEITORES = {
+    "brindes": (antigo_brindes, BRINDE_SCHEMA),
+    "movimentacoes": (antigo_movs, MOV_SCHEMA),
+    "pontos": (lambda p: antigo_split(p, [c[0] for c in PONTO_SCHEMA.campos]), PONTO_SCHEMA),
+    "users": (lambda p: antigo_split(p, [c[0] for c in USER_SCHEMA.campos]), USER_SCHEMA),
+}
+
+def medir(fn, path):
+    gc.collect()
+    t0 = time.perf_counter()
+    n = len(fn(path))
+    dt = time.perf_counter() - t0
+    gc.collect()
+    tracemalloc.start()
+    dados = fn(path)
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del dados
+    return n / dt, pico / 2**20
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--only", choices=list(ARQUIVOS), nargs="*")
+    args = ap.parse_args()
+
+    print(f"{'arquivo':<14} {'leitor':<8} {'linhas/s':>12} {'pico MiB':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for nome in args.only or ARQUIVOS:
+            header, linha = ARQUIVOS[nome]
+            path = Path(tmp) / f"{nome}.txt"
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(header + "\n")
+                for i in range(1, args.rows + 1):
+                    f.write(linha(i) + "\n")
+            antigo, schema = LEITORES[nome]
+            for rotulo, fn in (("antigo", antigo), ("schema", lambda p, s=schema: list(iter_arquivo(p, s)))):
+                vel, pico = medir(fn, path)
+                print(f"{nome:<14} {rotulo:<8} {vel:>12.0f} {pico:>10.1f}")
+            path.unlink()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# benchmarks/bench_login.py
+"""
+Benchmark de rajada de logins (início de turno).
+
+Gera um users.txt sintético e compara a busca antiga (get_user_by_np relendo o
+arquivo a cada login) com o diretório indexado (user_directory). Em seguida
+dispara logins concorrentes em threads via autenticar() e mostra a vazão e a
+latência. O hash usa custo baixo para medir a busca, não o bcrypt.
+
+Com --tempestade, mede a latência de /api/brindes e /api/pontos (test client
+do Flask) sozinhos e durante uma tempestade de logins com bcrypt de custo 12,
+que passa pelo executor limitado (auth_executor).
+
+Uso (a partir de backend-web/):
+    python -m benchmarks.bench_login --users 50000 --logins 2000 --threads 16
+    python -m benchmarks.bench_login --tempestade
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import bcrypt
+
+from Modules.Users import user_repository
+
+HEADER = "ID;NP;SenhaHash;Perfil;NomeCompleto;Departamento;Ativo;UltimoLogin;DataCadastro\n"
+
+def gerar_users(path: Path, n: int, senha_hash: str):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(HEADER)
+        for i in range(1, n + 1):
+            f.write(f"{i};{100000 + i};{senha_hash};user;Usuario {i};Depto {i % 20};1;2025-09-27 14:32:00;2025-01-10 09:00:00\n")
+
+def _latencias(client, rota: str, n: int):
+    lat = []
+    for _ in range(n):
+        t = time.perf_counter()
+        client.get(rota)
+        lat.append(time.perf_counter() - t)
+    lat.sort()
+    return statistics.median(lat) * 1e3, lat[int(len(lat) * 0.99) - 1] * 1e3
+
+def tempestade(threads: int, n: int):
+    from app import app, iniciar
+    iniciar()
+    from Modules.Auth.auth_executor import auth_stats
+
+    client = app.test_client()
+    client.post("/api/login", json={"username": "1111", "password": "1111"})
+    rotas = ["/api/brindes", "/api/pontos"]
+    base = {rota: _latencias(client, rota, n) for rota in rotas}
+
+    parar = threading.Event()
+    respostas = {"ok": 0, "503": 0, "401": 0}
+
+    def logins():
+        c = app.test_client()
+        while not parar.is_set():
+            r = c.post("/api/login", json={"username": "2222", "password": "1111"})
+            chave = "ok" if r.status_code == 200 else str(r.status_code)
+            respostas[chave] = respostas.get(chave, 0) + 1
+
+    ts = [threading.Thread(target=logins) for _ in range(threads)]
+    for t in ts:
+        t.start()
+    time.sleep(0.5)
+    durante = {rota: _latencias(client, rota, n) for rota in rotas}
+    parar.set()
+    for t in ts:
+        t.join()
+
+    for rota in rotas:
+        print(f"{rota}: sozinho p50 {base[rota][0]:.2f} ms p99 {base[rota][1]:.2f} ms | "
+              f"durante tempestade p50 {durante[rota][0]:.2f} ms p99 {durante[rota][1]:.2f} ms")
+    print(f"logins na tempestade: {respostas} | executor: {auth_stats()}")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=50_000)
+    ap.add_argument("--logins", type=int, default=2_000)
+    ap.add_argument("--threads", type=int, default=16)
+    ap.add_argument("--cost", type=int, default=4, help="custo do bcrypt dos usuários sintéticos")
+    ap.add_argument("--tempestade", action="store_true", help="latência do catálogo/pontos durante rajada de logins reais")
+    args = ap.parse_args()
+
+    if args.tempestade:
+        tempestade(args.threads, 200)
+        return
+
+    senha_hash = bcrypt.hashpw(b"1111", bcrypt.gensalt(args.cost)).decode()
+    original = user_repository.USERS_FILE
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "users.txt"
+        gerar_users(path, args.users, senha_hash)
+        user_repository.USERS_FILE = path
+        try:
+            from Modules.Users import user_directory
+            from Modules.Auth.auth_service import autenticar
+
+            nps = [str(100000 + random.randint(1, args.users)) for _ in range(args.logins)]
+
+            amostra = nps[:50]
+            t0 = time.perf_counter()
+            for np in amostra:
+                user_repository.get_user_by_np(np, path)
+            antigo = (time.perf_counter() - t0) / len(amostra)
+
+            user_directory.get_by_np(nps[0])  # carga inicial
+            t0 = time.perf_counter()
+            for np in nps:
+                user_directory.get_by_np(np)
+            novo = (time.perf_counter() - t0) / len(nps)
+            print(f"busca por NP ({args.users} usuários): antiga {antigo * 1e3:.2f} ms | diretório {novo * 1e6:.2f} µs")
+
+            def login(np):
+                t = time.perf_counter()
+                assert autenticar(np, "1111")
+                return time.perf_counter() - t
+
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(args.threads) as pool:
+                lat = sorted(pool.map(login, nps))
+            dt = time.perf_counter() - t0
+            print(f"rajada: {args.logins} logins em {args.threads} threads, {dt:.2f}s, {args.logins / dt:.0f} logins/s")
+            print(f"latência p50 {statistics.median(lat) * 1e3:.2f} ms | p99 {lat[int(len(lat) * 0.99) - 1] * 1e3:.2f} ms")
+        finally:
+            user_repository.USERS_FILE = original
+
+if __name__ == "__main__":
+    main()
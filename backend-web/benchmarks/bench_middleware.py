@@ -0,0 +1,49 @@
+# benchmarks/bench_middleware.py
+"""
+Microbenchmark do require_auth isolado (sem a view).
+
+Mede o custo por requisição do middleware com o cache de tokens desligado
+(jwt.decode + HMAC toda vez) e ligado.
+
+Uso (a partir de backend-web/):
+    python -m benchmarks.bench_middleware --n 50000
+"""
+import argparse
+import datetime
+import time
+
+import jwt
+from flask import Flask
+
+from Modules.Auth import auth_middleware
+
+def medir(app: Flask, view, token: str, n: int) -> float:
+    with app.test_request_context("/api/me", headers={"Cookie": f"auth={token}"}):
+        view()  # aquece
+        t0 = time.perf_counter()
+        for _ in range(n):
+            view()
+        return (time.perf_counter() - t0) / n
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=50_000)
+    args = ap.parse_args()
+
+    app = Flask(__name__)
+    app.config["SECRET_KEY"] = "chave-de-benchmark-com-32-bytes-ou-mais"
+    exp = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=120)
+    token = jwt.encode({"sub": "1", "role": "user", "nome": "Bench", "exp": exp}, app.config["SECRET_KEY"], algorithm="HS256")
+    view = auth_middleware.require_auth(lambda: None)
+
+    auth_middleware.TOKEN_CACHE_SIZE = 0
+    sem_cache = medir(app, view, token, args.n)
+    auth_middleware.TOKEN_CACHE_SIZE = 10_000
+    com_cache = medir(app, view, token, args.n)
+
+    print(f"require_auth sem cache: {sem_cache * 1e6:.1f} µs/req")
+    print(f"require_auth com cache: {com_cache * 1e6:.1f} µs/req  ({sem_cache / com_cache:.1f}x)")
+    print(auth_middleware.token_cache_stats())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/bench_partida.py
+"""
+Benchmark de partida de um worker: tempo até a primeira resposta, com e sem
+o snapshot de partida (Modules/Shared/aquecimento.py).
+
+Cada medição sobe um processo Python novo que importa o app e faz, em
+sequência, as requisições típicas de um usuário que acabou de entrar:
+login, GET /api/me, GET /api/brindes/produtos e GET /api/pontos (os quatro
+arquivos de dados). Mede-se do início do processo até cada resposta.
+
+Cenários:
+- frio: WARM_START=0, os caches enchem na primeira requisição que precisa deles;
+- sem snapshot: WARM_START=1 sem arquivo (lê tudo na partida e grava o snapshot);
+- snapshot: WARM_START=1 com snapshot válido;
+- snapshot + cauda: snapshot válido e linhas novas nos logs depois dele.
+
+Uso (a partir de backend-web/):
+    python -m benchmarks.bench_partida --escala 200000 --repeticoes 3
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.dados_sinteticos import NP_BASE, SENHA, escalas, gerar
+
+ROTAS = ["login", "GET /api/me", "GET /api/brindes/produtos", "GET /api/pontos?limit=50"]
+
+def filho(pasta: Path, inicio: float):
+    # roda no processo medido: importa o app e faz as primeiras requisições
+    from benchmarks.bench_api import _configurar
+    _configurar(pasta)
+    from app import app, iniciar
+    iniciar()
+    t_import = time.time() - inicio
+    client = app.test_client()
+    tempos = {"import": t_import}
+    resp = client.post("/api/login", json={"username": str(NP_BASE + 2), "password": SENHA})
+    assert resp.status_code == 200, resp.status_code
+    tempos["login"] = time.time() - inicio
+    for rota in ROTAS[1:]:
+        resp = client.get(rota.split(" ", 1)[1])
+        assert resp.status_code == 200, (rota, resp.status_code)
+        tempos[rota] = time.time() - inicio
+    print(json.dumps(tempos))
+
+def _medir(pasta: Path, warm: bool) -> dict:
+    env = {**os.environ, "WARM_START": "1" if warm else "0", "METRICAS": "0"}
+    cmd = [sys.executable, "-m", "benchmarks.bench_partida", "--filho", str(pasta), str(time.time())]
+    saida = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True,
+                           cwd=Path(__file__).resolve().parents[1])
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+def _cauda(pasta: Path, linhas: int):
+    # acrescenta movimentações e lançamentos de pontos depois do snapshot
+    with open(pasta / "Data_Movimentation.txt", "a", encoding="utf-8") as f:
+        f.writelines(f"{10**8 + i};2;1;1;BRD-00001;1;10;OUT;processing;2026-01-01 10:00:00\n" for i in range(linhas))
+    with open(pasta / "pontos.txt", "a", encoding="utf-8") as f:
+        f.writelines(f"{10**8 + i};2;credito;10;confirmado;Campanha;;;2026-01-01 10:00:00;1\n" for i in range(linhas))
+
+def main():
+    ap = argparse.ArgumentParser(description="Tempo até a primeira resposta com e sem snapshot de partida")
+    ap.add_argument("--escala", type=int, default=200000)
+    ap.add_argument("--repeticoes", type=int, default=3)
+    ap.add_argument("--cauda", type=int, default=5000, help="linhas novas nos logs no cenário com cauda")
+    ap.add_argument("--filho", nargs=2, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.filho:
+        filho(Path(args.filho[0]), float(args.filho[1]))
+        return
+
+    pasta = Path(tempfile.mkdtemp(prefix="bench_partida_"))
+    try:
+        gerar(pasta, **escalas(args.escala))
+        snapshot = pasta / "simplifique.snapshot"
+        resultados = {}
+
+        def rodar(nome, warm, preparar=None):
+            medidas = []
+            for _ in range(args.repeticoes):
+                if preparar:
+                    preparar()
+                medidas.append(_medir(pasta, warm))
+            resultados[nome] = {k: statistics.median(m[k] for m in medidas) for k in medidas[0]}
+
+        rodar("frio", False)
+        rodar("sem snapshot", True, lambda: snapshot.unlink(missing_ok=True))
+        _medir(pasta, True)  # garante o snapshot
+        rodar("snapshot", True)
+        _cauda(pasta, args.cauda)
+        rodar("snapshot + cauda", True)
+
+        colunas = ["import"] + ROTAS
+        print(f"escala {args.escala}, snapshot {snapshot.stat().st_size / 1e6:.1f} MB, mediana de {args.repeticoes}")
+        print(f"{'cenário':<18}" + "".join(f"{c[:24]:>26}" for c in colunas))
+        for nome, tempos in resultados.items():
+            print(f"{nome:<18}" + "".join(f"{tempos[c] * 1e3:>24.0f}ms" for c in colunas))
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
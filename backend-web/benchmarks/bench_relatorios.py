@@ -0,0 +1,78 @@
+# benchmarks/bench_relatorios.py
+"""
+Benchmark dos relatórios do admin (Modules/Admin/relatorios_service.py).
+
+Gera (ou reaproveita) uma massa sintética e mede, por relatório:
+- carga inicial das colunas (leitura do .txt e gravação da cópia .npy);
+- reabertura da cópia em disco via mmap (o que um processo novo faz);
+- consultas com o cache quente, com e sem filtro de período.
+
+Uso (a partir de backend-web/):
+    python -m benchmarks.bench_relatorios --escala 1000000
+    python -m benchmarks.bench_relatorios --dados /tmp/dados --repeticoes 50
+"""
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_api import _configurar
+from benchmarks.dados_sinteticos import escalas, gerar
+
+def _medir(fn, repeticoes: int) -> float:
+    # mediana em ms
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn()
+        tempos.append((time.perf_counter() - t0) * 1e3)
+    return statistics.median(tempos)
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark dos relatórios colunares do admin")
+    ap.add_argument("--dados", help="pasta com os arquivos (padrão: gera massa sintética)")
+    ap.add_argument("--escala", type=int, default=1000000)
+    ap.add_argument("--repeticoes", type=int, default=20)
+    args = ap.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="bench_relatorios_"))
+    try:
+        if args.dados:
+            for arquivo in Path(args.dados).glob("*.txt"):
+                shutil.copy(arquivo, tmp)
+        else:
+            t0 = time.perf_counter()
+            gerar(tmp, **escalas(args.escala))
+            print(f"massa sintética ({args.escala} linhas) em {time.perf_counter() - t0:.1f}s")
+        _configurar(tmp)
+
+        from Modules.Admin import colunar, relatorios_service as rs
+
+        for tabela in (colunar.movimentacoes, colunar.pontos):
+            t0 = time.perf_counter()
+            tabela.colunas()
+            print(f"{tabela.nome}: carga inicial {time.perf_counter() - t0:.2f}s ({tabela.stats()['linhas']} linhas)")
+            tabela._limpar()
+            t0 = time.perf_counter()
+            tabela.colunas()
+            print(f"{tabela.nome}: reabertura via mmap {(time.perf_counter() - t0) * 1e3:.1f}ms")
+
+        de, ate = rs.periodo("2025-03-01", "2025-05-31")
+        casos = [
+            ("resgates por variante", lambda: rs.resgates_por_variante()),
+            ("resgates por variante (trimestre)", lambda: rs.resgates_por_variante(de, ate)),
+            ("resgates por dia", lambda: rs.resgates_por_dia()),
+            ("pontos por departamento", lambda: rs.pontos_por_departamento()),
+            ("pontos por departamento (trimestre)", lambda: rs.pontos_por_departamento(de, ate)),
+            ("estoque baixo", lambda: rs.estoque_baixo(10)),
+        ]
+        for nome, fn in casos:
+            fn()
+            print(f"{nome:<38} {_medir(fn, args.repeticoes):8.2f} ms (mediana)")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
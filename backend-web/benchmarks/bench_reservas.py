@@ -0,0 +1,108 @@
+# benchmarks/bench_reservas.py
+"""
+Benchmark da varredura de reservas vencidas (Modules/Movimentacoes/reservas.py).
+
+1. Primeira varredura: lê o log inteiro e cancela as saídas em 'processing'
+   que o gerador deixou (CREATED_AT antigo, já vencidas).
+2. Varredura sem novidade: o custo de cada rodada da thread quando nada venceu.
+3. Carrinhos abandonados: N resgates de um item, com RESERVA_TTL curto; depois
+   do prazo, uma varredura cancela todos em lotes de RESERVA_LOTE. Para
+   comparar, outros N são cancelados um a um (update_status, como a
+   confirmação avulsa). Confere que as saídas pendentes voltaram a zero.
+4. Regressão: uma reserva cancelada pela varredura não pode mais ser
+   confirmada depois que o estoque liberado foi resgatado por outro usuário
+   (o estoque não fica negativo).
+
+Uso (a partir de backend-web/):
+    python -m benchmarks.bench_reservas --escala 200000 --carrinhos 20000
+"""
+import argparse
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_api import _configurar
+from benchmarks.dados_sinteticos import escalas, gerar
+
+def _abandonar(svc, quantos: int, variantes: int, rnd: random.Random):
+    ids = []
+    for _ in range(quantos):
+        res = svc.criar_resgate(2, [{"variantId": rnd.randrange(1, variantes + 1), "quantity": 1}], 0)
+        if res["ok"]:
+            ids.append(res["movimentacoes"][0]["MOV_ID"])
+    return ids
+
+def _disponivel(variant_id: int) -> int:
+    from Modules.Brindes.brindes_cache import get_estoque, get_variacao
+    deltas, pendentes = get_estoque()
+    return get_variacao(variant_id)["stockInitial"] + deltas.get(variant_id, 0) - pendentes.get(variant_id, 0)
+
+def _conferir_varrida_nao_confirma(svc, reservas, variantes: int, ttl: float):
+    vid = next(v for v in range(1, variantes + 1) if _disponivel(v) > 0)
+    qtd = _disponivel(vid)
+    varrida = svc.criar_resgate(2, [{"variantId": vid, "quantity": qtd}], 0)["movimentacoes"][0]["MOV_ID"]
+    time.sleep(ttl)
+    reservas.varrer()
+    outra = svc.criar_resgate(3, [{"variantId": vid, "quantity": qtd}], 0)
+    assert outra["ok"] and svc.confirmar_resgate(outra["movimentacoes"][0]["MOV_ID"])["ok"]
+    res = svc.confirmar_resgate(varrida)
+    assert not res["ok"] and _disponivel(vid) == 0, f"reserva varrida confirmada: {res}"
+    print(f"regressão: reserva varrida recusada na confirmação ({res['error']})")
+
+def main():
+    ap = argparse.ArgumentParser(description="Varredura de reservas vencidas")
+    ap.add_argument("--escala", type=int, default=200000)
+    ap.add_argument("--carrinhos", type=int, default=20000)
+    ap.add_argument("--ttl", type=float, default=2.0, help="RESERVA_TTL usado nos carrinhos (s)")
+    args = ap.parse_args()
+
+    pasta = Path(tempfile.mkdtemp(prefix="bench_reservas_"))
+    try:
+        linhas = gerar(pasta, **escalas(args.escala))
+        _configurar(pasta)
+        from Modules.Brindes.brindes_cache import get_estoque
+        from Modules.Movimentacoes import movimentacoes_repository as repo
+        from Modules.Movimentacoes import movimentacoes_service as svc
+        from Modules.Movimentacoes import reservas
+        reservas.RESERVA_TTL = args.ttl
+        rnd = random.Random(3)
+
+        t0 = time.perf_counter()
+        r = reservas.varrer()
+        print(f"{linhas['movimentacoes']} movimentações; primeira varredura (log inteiro): "
+              f"{r['canceladas']} canceladas em {r['lotes']} lotes, {(time.perf_counter() - t0) * 1e3:.0f} ms")
+
+        tempos = []
+        for _ in range(20):
+            t0 = time.perf_counter()
+            reservas.varrer()
+            tempos.append(time.perf_counter() - t0)
+        print(f"varredura sem novidade: mediana {sorted(tempos)[10] * 1e6:.0f} µs")
+
+        ids = _abandonar(svc, args.carrinhos, linhas["variantes"], rnd)
+        pendentes = sum(get_estoque()[1].values())
+        time.sleep(args.ttl)
+        t0 = time.perf_counter()
+        r = reservas.varrer()
+        dt = time.perf_counter() - t0
+        print(f"{len(ids)} carrinhos abandonados ({pendentes} unidades retidas): varredura cancelou "
+              f"{r['canceladas']} em {r['lotes']} lotes, {dt * 1e3:.0f} ms "
+              f"({dt * 1e3 / max(r['lotes'], 1):.1f} ms de trava por lote); retidas depois: {sum(get_estoque()[1].values())}")
+
+        _conferir_varrida_nao_confirma(svc, reservas, linhas["variantes"], args.ttl)
+
+        reservas.RESERVA_TTL = 0  # só o cancelamento avulso, sem a varredura
+        ids = _abandonar(svc, args.carrinhos, linhas["variantes"], rnd)
+        t0 = time.perf_counter()
+        for mov_id in ids:
+            repo.update_status(mov_id, "canceled")
+        dt = time.perf_counter() - t0
+        print(f"referência, {len(ids)} cancelamentos um a um: {dt * 1e3:.0f} ms; "
+              f"retidas depois: {sum(get_estoque()[1].values())}")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# benchmarks/bench_resgate.py
+"""
+Teste de estresse da transação de resgate (movimentacoes_service.criar_resgate).
+
+Vários processos tentam resgatar, ao mesmo tempo, uma variante com pouco
+estoque. Ao final confere que não houve oversell (soma das saídas gravadas
+<= estoque inicial) e mostra a vazão de resgates.
+
+Depois roda a verificação (também sozinha, com --verificar; sai com erro se
+falhar): processos resgatam, confirmam e cancelam reservas de uma variante com
+pouco estoque, uma vez com as tentativas otimistas e outra validando sempre sob
+lock_log (MAX_TENTATIVAS=1). Confirmado + retido, pelo fold do log inteiro,
+precisa ficar <= estoque inicial e bater com o que os processos gravaram.
+
+Uso (a partir de backend-web/):
+    python -m benchmarks.bench_resgate --procs 16 --stock 200
+    python -m benchmarks.bench_resgate --verificar
+"""
+import argparse
+import multiprocessing as mp
+import random
+import tempfile
+import time
+from pathlib import Path
+
+CATALOGO_HEADER = "ID;PRODUCT_ID;SKU;Nome;Descricao;Detalhes;Categoria;Tamanho;Custo;Estoque_Inicial;URL;Data_Cadastro;Ultima_Modificacao;Ativo;Tags\n"
+
+def _configurar(tmp: str):
+    from Modules.Brindes import brindes_repository
+    from Modules.Movimentacoes import movimentacoes_repository
+    brindes_repository.DATA_FILE = Path(tmp) / "Data_Brindes.txt"
+    movimentacoes_repository.MOV_FILE = Path(tmp) / "Data_Movimentation.txt"
+
+def _worker(args):
+    tmp, user_id, max_qtd = args
+    _configurar(tmp)
+    from Modules.Movimentacoes.movimentacoes_service import criar_resgate, resgate_stats
+    ok = falhas = 0
+    qtd = 1 + user_id % max_qtd
+    while True:
+        res = criar_resgate(user_id, [{"variantId": 1, "quantity": qtd}], 0)
+        if res["ok"]:
+            ok += qtd
+        else:
+            falhas += 1
+            if qtd == 1:
+                break
+            qtd = 1
+    return ok, falhas, resgate_stats()["conflitos"]
+
+def _catalogo(tmp: str, stock: int):
+    (Path(tmp) / "Data_Brindes.txt").write_text(
+        CATALOGO_HEADER + f"1;1;BRD-0001;Caneca;;;Casa;;10;{stock};;;;1;\n", encoding="utf-8")
+
+def _worker_verificacao(args):
+    # resgata, confirma e cancela as próprias reservas; devolve o que gravou
+    tmp, user_id, tentativas, operacoes = args
+    _configurar(tmp)
+    from Modules.Movimentacoes import movimentacoes_service as svc
+    svc.MAX_TENTATIVAS = tentativas
+    rnd = random.Random(user_id)
+    abertas = []  # (mov_id, qtd) ainda em processing
+    confirmado = esgotado = 0
+    for _ in range(operacoes):
+        qtd = rnd.randint(1, 3)
+        res = svc.criar_resgate(user_id, [{"variantId": 1, "quantity": qtd}], 0)
+        if res["ok"]:
+            abertas.append((res["movimentacoes"][0]["MOV_ID"], qtd))
+        else:
+            esgotado += 1
+        if abertas and rnd.random() < 0.4:
+            mov_id, qtd = abertas.pop(rnd.randrange(len(abertas)))
+            if rnd.random() < 0.5:
+                assert svc.confirmar_resgate(mov_id)["ok"]
+                confirmado += qtd
+            else:
+                assert svc.atualizar_status_lote([{"movId": mov_id, "status": "canceled"}])["aplicadas"] == 1
+    return confirmado, sum(q for _, q in abertas), esgotado, svc.resgate_stats()["conflitos"]
+
+def verificar(procs: int, stock: int, operacoes: int):
+    """
+    Confere que não há oversell com processos concorrentes, pelas tentativas
+    otimistas e pela validação sob lock_log. AssertionError se houver.
+    """
+    for nome, tentativas in (("otimista", None), ("sob lock_log", 1)):
+        with tempfile.TemporaryDirectory() as tmp:
+            _catalogo(tmp, stock)
+            _configurar(tmp)
+            from Modules.Brindes.estoque_service import tabela_movimentos
+            from Modules.Movimentacoes.movimentacoes_service import MAX_TENTATIVAS
+            with mp.Pool(procs) as pool:
+                resultados = pool.map(_worker_verificacao, [(tmp, u, tentativas or MAX_TENTATIVAS, operacoes)
+                                                            for u in range(1, procs + 1)])
+            pendentes = {}
+            confirmado = -tabela_movimentos(pendentes=pendentes).get(1, 0)
+            retido = pendentes.get(1, 0)
+            esperado = (sum(r[0] for r in resultados), sum(r[1] for r in resultados))
+            esgotado = sum(r[2] for r in resultados)
+            print(f"verificação {nome}: confirmado {confirmado} + retido {retido} de {stock}; "
+                  f"{esgotado} recusas por estoque, {sum(r[3] for r in resultados)} conflitos otimistas")
+            assert confirmado + retido <= stock, f"oversell: {confirmado} + {retido} > {stock}"
+            assert (confirmado, retido) == esperado, f"log {(confirmado, retido)} != gravado {esperado}"
+            assert esgotado, "o estoque não esgotou: aumente --verificar-operacoes ou diminua --verificar-stock"
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--procs", type=int, default=16)
+    ap.add_argument("--stock", type=int, default=200)
+    ap.add_argument("--max-qtd", type=int, default=3)
+    ap.add_argument("--verificar", action="store_true", help="só a verificação de oversell")
+    ap.add_argument("--verificar-stock", type=int, default=40)
+    ap.add_argument("--verificar-operacoes", type=int, default=40, help="resgates por processo na verificação")
+    args = ap.parse_args()
+
+    if args.verificar:
+        verificar(args.procs, args.verificar_stock, args.verificar_operacoes)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _catalogo(tmp, args.stock)
+
+        t0 = time.perf_counter()
+        with mp.Pool(args.procs) as pool:
+            resultados = pool.map(_worker, [(tmp, u, args.max_qtd) for u in range(1, args.procs + 1)])
+        dt = time.perf_counter() - t0
+
+        _configurar(tmp)
+        from Modules.Movimentacoes.movimentacoes_repository import load_movs
+        gravado = sum(m["QTD"] for m in load_movs() if m["TYPE"] == "OUT")
+        resgatado = sum(r[0] for r in resultados)
+        resgates = len(load_movs())
+        conflitos = sum(r[2] for r in resultados)
+
+        print(f"processos: {args.procs}  estoque inicial: {args.stock}")
+        print(f"unidades resgatadas: {resgatado}  gravadas no log: {gravado}  oversell: {max(gravado - args.stock, 0)}")
+        print(f"resgates: {resgates}  conflitos otimistas: {conflitos}  tempo: {dt:.2f}s  vazão: {resgates / dt:.0f} resgates/s")
+        assert gravado == resgatado <= args.stock, "oversell detectado"
+
+    verificar(args.procs, args.verificar_stock, args.verificar_operacoes)
+
+if __name__ == "__main__":
+    main()
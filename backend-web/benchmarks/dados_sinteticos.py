@@ -0,0 +1,173 @@
+# benchmarks/dados_sinteticos.py
+"""
+Gerador de dados sintéticos nos formatos de dados-teste.
+
+Gera users.txt, Data_Brindes.txt, Data_Movimentation.txt e pontos.txt numa
+pasta, em escala configurável (de 1k a 1M linhas). A popularidade é enviesada
+(distribuição Zipf): poucas variantes concentram a maior parte dos resgates e
+poucos usuários a maior parte dos lançamentos de pontos, como em produção.
+Os lançamentos de pontos saem em ordem cronológica (o extrato é só de acréscimo).
+
+Todos os usuários têm a mesma senha (SENHA) com hash bcrypt de custo baixo,
+para que o benchmark meça a API e não o bcrypt.
+
+Uso (a partir de backend-web/):
+    python -m benchmarks.dados_sinteticos --destino /tmp/dados --escala 100000
+    python -m benchmarks.dados_sinteticos --destino /tmp/dados --usuarios 5000 --movimentacoes 1000000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, List
+
+import bcrypt
+
+SENHA = "bench123"
+NP_BASE = 100000
+
+USERS_HEADER = "ID;NP;SenhaHash;Perfil;NomeCompleto;Departamento;Ativo;UltimoLogin;DataCadastro\n"
+CATALOGO_HEADER = "ID;PRODUCT_ID;SKU;Nome;Descricao;Detalhes;Categoria;Tamanho;Custo;Estoque_Inicial;URL;Data_Cadastro;Ultima_Modificacao;Ativo;Tags\n"
+MOVS_HEADER = "MOV_ID;USER_ID;VARIANT_ID;PRODUCT_ID;SKU;QTD;POINTS_TOTAL;TYPE;STATUS;CREATED_AT\n"
+PONTOS_HEADER = "ID;UsuarioID;Tipo;Quantidade;Status;Origem;ReferenciaID;Observacao;DataMovimento;RegistradoPor\n"
+
+CATEGORIAS = ["Escritorio", "Vestuario", "Casa", "Tecnologia", "Esporte"]
+TAMANHOS = ["P", "M", "G", "GG"]
+DEPARTAMENTOS = ["TI", "Marketing", "Financeiro", "RH", "Operacoes", "Vendas", "Juridico", "Logistica"]
+
+# linhas gravadas por chamada de write
+_LOTE = 10000
+
+def escalas(escala: int) -> Dict[str, int]:
+    # tamanhos padrão de cada arquivo para uma escala (linhas do maior arquivo)
+    return {
+        "usuarios": max(escala // 10, 10),
+        "produtos": min(max(escala // 200, 5), 5000),
+        "movimentacoes": escala,
+        "pontos": escala,
+    }
+
+def pesos_zipf(n: int, s: float) -> List[float]:
+    # pesos acumulados: o item de posição k tem peso 1 / k^s
+    return list(accumulate(1.0 / (k ** s) for k in range(1, n + 1)))
+
+def _escrever(path: Path, header: str, linhas):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(header)
+        lote = []
+        for linha in linhas:
+            lote.append(linha)
+            if len(lote) >= _LOTE:
+                f.write("".join(lote))
+                lote.clear()
+        f.write("".join(lote))
+
+def _usuarios(n: int, senha_hash: str, rnd: random.Random):
+    for i in range(1, n + 1):
+        perfil = "admin" if i == 1 else "user"
+        depto = DEPARTAMENTOS[rnd.randrange(len(DEPARTAMENTOS))]
+        yield f"{i};{NP_BASE + i};{senha_hash};{perfil};Usuario {i};{depto};1;2025-09-27 14:32:00;2025-01-10 09:00:00\n"
+
+def _catalogo(produtos: int, rnd: random.Random) -> List[Dict]:
+    # variantes do catálogo; produtos de vestuário têm uma variante por tamanho
+    variantes = []
+    for pid in range(1, produtos + 1):
+        categoria = CATEGORIAS[pid % len(CATEGORIAS)]
+        custo = rnd.choice([10, 20, 50, 80, 100, 150, 200, 300, 500])
+        tamanhos = TAMANHOS if categoria == "Vestuario" else [None]
+        for tamanho in tamanhos:
+            variantes.append({
+                "id": len(variantes) + 1,
+                "product_id": pid,
+                "nome": f"Produto {pid}" + (f" - {tamanho}" if tamanho else ""),
+                "categoria": categoria,
+                "tamanho": tamanho or "",
+                "custo": custo,
+                "estoque": rnd.choice([0, 50, 100, 500, 1000, 100000]),
+            })
+    return variantes
+
+def _linhas_catalogo(variantes: List[Dict]):
+    for v in variantes:
+        yield (f"{v['id']};{v['product_id']};BRD-{v['id']:05d};{v['nome']};Descricao do {v['nome']};;"
+               f"{v['categoria']};{v['tamanho']};{v['custo']};{v['estoque']};"
+               f"https://exemplo.local/img/{v['product_id']}.webp;03/10/2025;03/10/2025;1;\n")
+
+def _movimentacoes(n: int, usuarios: int, variantes: List[Dict], skew: float, rnd: random.Random, inicio: datetime):
+    pesos_v = pesos_zipf(len(variantes), skew)
+    pesos_u = pesos_zipf(usuarios, skew)
+    passo = timedelta(days=365) / max(n, 1)
+    for mov_id in range(1, n + 1):
+        v = rnd.choices(variantes, cum_weights=pesos_v)[0]
+        user_id = rnd.choices(range(1, usuarios + 1), cum_weights=pesos_u)[0]
+        ts = (inicio + passo * mov_id).strftime("%Y-%m-%d %H:%M:%S")
+        if rnd.random() < 0.05:
+            qtd, tipo, status = rnd.choice([10, 50, 100]), "IN", "confirmed"
+        else:
+            qtd, tipo = rnd.choice([1, 1, 1, 2, 3]), "OUT"
+            status = rnd.choices(["confirmed", "processing", "canceled"], cum_weights=[70, 90, 100])[0]
+        yield (f"{mov_id};{user_id};{v['id']};{v['product_id']};BRD-{v['id']:05d};{qtd};"
+               f"{qtd * v['custo'] if tipo == 'OUT' else 0};{tipo};{status};{ts}\n")
+
+def _pontos(n: int, usuarios: int, skew: float, rnd: random.Random, inicio: datetime):
+    # um crédito inicial por usuário e depois lançamentos enviesados, em ordem de data
+    pesos_u = pesos_zipf(usuarios, skew)
+    iniciais = min(usuarios, n)
+    passo = timedelta(days=365) / max(n, 1)
+    for i in range(1, n + 1):
+        ts = (inicio + passo * i).strftime("%Y-%m-%d %H:%M:%S")
+        if i <= iniciais:
+            yield f"{i};{i};credito;{rnd.choice([500, 1000, 5000])};confirmado;Saldo inicial importado;;;{ts};1\n"
+            continue
+        uid = rnd.choices(range(1, usuarios + 1), cum_weights=pesos_u)[0]
+        if rnd.random() < 0.6:
+            tipo, origem, qtd = "credito", "Campanha", rnd.choice([10, 50, 100, 200])
+        else:
+            tipo, origem, qtd = "debito", "Resgate", rnd.choice([10, 20, 50, 100])
+        status = rnd.choices(["confirmado", "processando", "cancelado"], cum_weights=[80, 95, 100])[0]
+        yield f"{i};{uid};{tipo};{qtd};{status};{origem};;;{ts};1\n"
+
+def gerar(destino: Path, usuarios: int, produtos: int, movimentacoes: int, pontos: int,
+          skew: float = 1.1, seed: int = 42) -> Dict[str, int]:
+    """
+    Grava os quatro arquivos em `destino` e devolve a quantidade de linhas de cada um.
+    Mesma seed, mesmos dados (para comparar commits sobre a mesma massa).
+    """
+    destino = Path(destino)
+    destino.mkdir(parents=True, exist_ok=True)
+    rnd = random.Random(seed)
+    inicio = datetime(2025, 1, 1)
+    senha_hash = bcrypt.hashpw(SENHA.encode("utf-8"), bcrypt.gensalt(4)).decode("utf-8")
+
+    variantes = _catalogo(produtos, rnd)
+    _escrever(destino / "users.txt", USERS_HEADER, _usuarios(usuarios, senha_hash, rnd))
+    _escrever(destino / "Data_Brindes.txt", CATALOGO_HEADER, _linhas_catalogo(variantes))
+    _escrever(destino / "Data_Movimentation.txt", MOVS_HEADER,
+              _movimentacoes(movimentacoes, usuarios, variantes, skew, rnd, inicio))
+    _escrever(destino / "pontos.txt", PONTOS_HEADER, _pontos(pontos, usuarios, skew, rnd, inicio))
+    return {"usuarios": usuarios, "variantes": len(variantes), "movimentacoes": movimentacoes, "pontos": pontos}
+
+def main():
+    ap = argparse.ArgumentParser(description="Gera dados sintéticos no formato de dados-teste")
+    ap.add_argument("--destino", required=True)
+    ap.add_argument("--escala", type=int, default=10000, help="linhas de movimentações e de pontos (1k a 1M)")
+    ap.add_argument("--usuarios", type=int)
+    ap.add_argument("--produtos", type=int)
+    ap.add_argument("--movimentacoes", type=int)
+    ap.add_argument("--pontos", type=int)
+    ap.add_argument("--skew", type=float, default=1.1, help="expoente da distribuição Zipf")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    tamanhos = escalas(args.escala)
+    for chave in tamanhos:
+        if getattr(args, chave) is not None:
+            tamanhos[chave] = getattr(args, chave)
+    t0 = time.perf_counter()
+    linhas = gerar(Path(args.destino), skew=args.skew, seed=args.seed, **tamanhos)
+    print(f"{linhas} em {time.perf_counter() - t0:.1f}s -> {args.destino}")
+
+if __name__ == "__main__":
+    main()
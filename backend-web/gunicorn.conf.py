@@ -0,0 +1,14 @@
+# gunicorn.conf.py
+"""
+Configuração lida pelo gunicorn quando ele é iniciado a partir de backend-web/:
+
+    gunicorn app:app --workers 4 --bind 0.0.0.0:5000
+
+Cada worker chama app.iniciar() logo depois do fork (com ou sem --preload),
+então o warm start e a varredura das reservas acontecem no processo que
+atende as requisições.
+"""
+
+def post_fork(server, worker):
+    from app import iniciar
+    iniciar()
@@ -0,0 +1,86 @@
+# manage.py
+"""
+Comandos de manutenção do backend (rodar a partir de backend-web/).
+
+    python manage.py compactar-movimentacoes
+    python manage.py migrar-log-movimentacoes
+    python manage.py migrar-sqlite [--db caminho.db]
+    python manage.py snapshot [--arquivo caminho]
+    python manage.py importar-catalogo fornecedor.csv [--validar]
+    python manage.py expirar-reservas
+"""
+import argparse
+import json
+import sys
+
+def cmd_compactar_movimentacoes(args):
+    from Modules.Movimentacoes.movimentacoes_repository import compactar
+    print(json.dumps(compactar(), ensure_ascii=False))
+
+def cmd_migrar_log_movimentacoes(args):
+    from Modules.Movimentacoes.movimentacoes_repository import migrar_cabecalho
+    print(json.dumps(migrar_cabecalho(), ensure_ascii=False))
+
+def cmd_migrar_sqlite(args):
+    from Modules.Shared import db_connection
+    from Modules.Shared.migracao_sqlite import migrar_arquivos
+    db_connection.configurar(caminho=args.db)
+    resultado = migrar_arquivos()
+    resultado["banco"] = str(db_connection.db_stats()["caminho"])
+    print(json.dumps(resultado, ensure_ascii=False))
+
+def cmd_snapshot(args):
+    from Modules.Shared import aquecimento
+    print(json.dumps(aquecimento.salvar(args.arquivo), ensure_ascii=False))
+
+def cmd_importar_catalogo(args):
+    from Modules.Brindes.catalogo_importacao import importar_arquivo
+
+    def progresso(estado):
+        total = estado["total_bytes"]
+        pct = f" {estado['bytes'] * 100 / total:5.1f}%" if total else ""
+        print(f"\r{estado['fase']:<12}{pct} {estado['linhas']} linhas, {estado['total_erros']} erros",
+              end="", file=sys.stderr, flush=True)
+
+    resultado = importar_arquivo(args.arquivo, validar_apenas=args.validar, progresso=progresso)
+    print(file=sys.stderr)
+    print(json.dumps(resultado, ensure_ascii=False))
+    if not resultado["ok"]:
+        sys.exit(1)
+
+def cmd_expirar_reservas(args):
+    from Modules.Movimentacoes.reservas import varrer
+    print(json.dumps(varrer(), ensure_ascii=False))
+
+def main():
+    parser = argparse.ArgumentParser(description="Comandos de manutenção do Simplifique")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("compactar-movimentacoes", help="aplica os eventos de status e regrava o log de movimentações")
+    p.set_defaults(func=cmd_compactar_movimentacoes)
+
+    p = sub.add_parser("migrar-log-movimentacoes",
+                       help="converte um log de movimentações com cabeçalho antigo (guarda o original como .legado)")
+    p.set_defaults(func=cmd_migrar_log_movimentacoes)
+
+    p = sub.add_parser("migrar-sqlite", help="importa os arquivos .txt de dados-teste para o banco SQLite")
+    p.add_argument("--db", help="arquivo do banco (padrão: SQLITE_PATH)")
+    p.set_defaults(func=cmd_migrar_sqlite)
+
+    p = sub.add_parser("snapshot", help="grava o snapshot de partida dos caches (warm start)")
+    p.add_argument("--arquivo", help="arquivo do snapshot (padrão: SNAPSHOT_PATH)")
+    p.set_defaults(func=cmd_snapshot)
+
+    p = sub.add_parser("importar-catalogo", help="valida o CSV do fornecedor e substitui o catálogo de forma atômica")
+    p.add_argument("arquivo", help="CSV com os cabeçalhos aceitos pelo catálogo (separador ; , ou tab)")
+    p.add_argument("--validar", action="store_true", help="só valida, sem trocar o catálogo")
+    p.set_defaults(func=cmd_importar_catalogo)
+
+    p = sub.add_parser("expirar-reservas", help="cancela os resgates em 'processing' com a reserva vencida (RESERVA_TTL)")
+    p.set_defaults(func=cmd_expirar_reservas)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()